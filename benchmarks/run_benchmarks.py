@@ -0,0 +1,296 @@
+# benchmarks/run_benchmarks.py
+# moomoo-grid-optimizer/benchmarks/run_benchmarks.py
+
+"""
+合成数据基准测试
+
+用固定种子生成 Moomoo 订单导出格式的合成数据, 分别计时:
+CSV加载 (ParameterOptimizer._load_csv)、单次回测 (GridBacktester.run_backtest,
+tick 与 event 模式)、指标计算 (_calculate_metrics) 与完整参数优化 (optimize),
+并记录每个数据规模的峰值内存。结果写为JSON, 可用 --compare 与之前的结果对比。
+
+示例:
+    python benchmarks/run_benchmarks.py --sizes 1e3 1e4 1e5 --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json --fail-on-regression
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from src.backtest_engine import GridBacktester
+from src.parameter_optimizer import ParameterOptimizer
+from src.synthetic import generate_export
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 结果文件格式版本, 对比时只比较相同版本的结果
+RESULT_FORMAT_VERSION = 1
+
+DEFAULT_SIZES = ['1e3', '1e4', '1e5']
+
+# 越大越好的吞吐量指标, 用于回归检查
+THROUGHPUT_METRICS = [
+    'load_rows_per_sec', 'tick_backtests_per_sec', 'event_backtests_per_sec',
+    'metrics_calls_per_sec', 'optimize_backtests_per_sec'
+]
+
+def _best_time(func: Callable, repeats: int, min_time: float = 0.2) -> float:
+    """
+    多次运行取最短耗时
+
+    Args:
+        func: 被计时的函数
+        repeats: 最多运行次数
+        min_time: 累计耗时达到该值后不再重复
+
+    Returns:
+        float: 最短一次的耗时 (秒)
+    """
+    best = float('inf')
+    total = 0.0
+    for _ in range(max(1, repeats)):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        total += elapsed
+        if total >= min_time:
+            break
+    return best
+
+def _peak_rss_mb() -> Optional[float]:
+    """当前进程的峰值常驻内存 (MB), 不支持的平台返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位, macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def benchmark_file(path: str, timeframe: str, repeats: int = 5,
+                   max_optimize_rows: int = 100000) -> Dict:
+    """
+    对一个订单导出文件运行全部基准测试 (应在独立进程中调用, 以便统计峰值内存)
+
+    Args:
+        path: 订单导出文件
+        timeframe: 时间周期
+        repeats: 每项计时的最多重复次数
+        max_optimize_rows: 超过该行数时跳过完整参数优化
+
+    Returns:
+        Dict: 各项耗时与吞吐量
+    """
+    result = {}
+    baseline_rss = _peak_rss_mb()
+
+    started = time.perf_counter()
+    optimizer = ParameterOptimizer(path, timeframe)
+    result['init_seconds'] = time.perf_counter() - started
+    rows = len(optimizer.orders_df)
+    result['rows'] = rows
+
+    load_seconds = _best_time(lambda: optimizer._load_csv(path), repeats)
+    result['load_seconds'] = load_seconds
+    result['load_rows_per_sec'] = rows / load_seconds
+
+    param_combinations = optimizer._generate_param_combinations()
+    params = param_combinations[len(param_combinations) // 2]
+    series = optimizer.price_series
+    for mode in ('tick', 'event'):
+        seconds = _best_time(
+            lambda: GridBacktester(series, params, keep_equity_curve=False,
+                                   record_trades=False).run_backtest(mode),
+            repeats
+        )
+        result[f'{mode}_backtest_seconds'] = seconds
+        result[f'{mode}_backtests_per_sec'] = 1.0 / seconds
+
+    # 指标计算: 在记录了成交明细的回测上重复计算 (包含按明细统计盈利次数)
+    backtester = GridBacktester(series, params, keep_equity_curve=False)
+    backtester.run_backtest('event')
+    result['trade_count'] = backtester.trade_count
+    calls = 1000
+    seconds = _best_time(lambda: [backtester._calculate_metrics() for _ in range(calls)], repeats)
+    result['metrics_calls_per_sec'] = calls / seconds
+
+    if rows <= max_optimize_rows:
+        started = time.perf_counter()
+        valid = optimizer.optimize(verbose=False)
+        seconds = time.perf_counter() - started
+        result['optimize_seconds'] = seconds
+        result['optimize_backtests'] = len(param_combinations)
+        result['optimize_backtests_per_sec'] = len(param_combinations) / seconds
+        result['optimize_valid_results'] = len(valid)
+        result['optimize_pruned'] = optimizer.prune_report['pruned'] if optimizer.prune_report else 0
+
+    result['baseline_rss_mb'] = baseline_rss
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+def ensure_dataset(data_dir: str, model: str, timeframe: str, size: int, seed: int) -> str:
+    """生成 (或复用已生成的) 合成订单导出文件"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f'synthetic-{model}-{timeframe}-{size}-seed{seed}.csv')
+    if not os.path.exists(path):
+        temp_path = path + '.tmp'
+        generate_export(temp_path, size, model, timeframe, seed=seed)
+        os.replace(temp_path, path)
+    return path
+
+def run_benchmarks(sizes: List[int], models: List[str], timeframes: List[str], data_dir: str,
+                   seed: int = 0, repeats: int = 5, max_optimize_rows: int = 100000) -> Dict:
+    """
+    运行所有规模/模型/时间周期组合的基准测试
+
+    每个组合在新启动的子进程中运行, 峰值内存互不影响
+    (baseline_rss_mb 为导入依赖之后、加载数据之前的峰值内存)。
+
+    Returns:
+        Dict: metadata 与 results (每个组合一条记录)
+    """
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for model in models:
+        for timeframe in timeframes:
+            for size in sizes:
+                # 子进程的峰值内存从父进程继承, 数据生成也放在单独的子进程中
+                started = time.perf_counter()
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    path = executor.submit(ensure_dataset, data_dir, model, timeframe,
+                                           size, seed).result()
+                generate_seconds = time.perf_counter() - started
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    result = executor.submit(benchmark_file, path, timeframe, repeats,
+                                             max_optimize_rows).result()
+                result.update({'model': model, 'timeframe': timeframe, 'size': size,
+                               'seed': seed, 'generate_seconds': generate_seconds})
+                results.append(result)
+                print(_format_result(result), flush=True)
+
+    return {
+        'format_version': RESULT_FORMAT_VERSION,
+        'metadata': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+
+def _format_result(result: Dict) -> str:
+    """一行基准测试结果摘要"""
+    text = (f"{result['model']:>3} {result['timeframe']:>5} {result['size']:>9}: "
+            f"加载 {result['load_rows_per_sec']:,.0f} 行/s, "
+            f"回测 tick {result['tick_backtests_per_sec']:,.1f}/s "
+            f"event {result['event_backtests_per_sec']:,.1f}/s, "
+            f"指标 {result['metrics_calls_per_sec']:,.0f}/s")
+    if 'optimize_backtests_per_sec' in result:
+        text += f", 优化 {result['optimize_backtests_per_sec']:,.1f} 回测/s"
+    if result['peak_rss_mb'] is not None:
+        text += f", 峰值内存 {result['peak_rss_mb']:,.0f}MB"
+    return text
+
+def compare_results(old: Dict, new: Dict, threshold: float = 0.2) -> List[Dict]:
+    """
+    对比两次基准测试的吞吐量
+
+    Args:
+        old: 之前的结果
+        new: 本次的结果
+        threshold: 吞吐量下降超过该比例时视为性能回归
+
+    Returns:
+        List[Dict]: 每个可对比指标一条记录 (key, metric, old, new, ratio, regression)
+    """
+    if old.get('format_version') != new.get('format_version'):
+        raise ValueError("结果文件格式版本不同, 无法对比")
+
+    def key(result: Dict) -> tuple:
+        return (result['model'], result['timeframe'], result['size'], result['seed'])
+
+    previous = {key(result): result for result in old['results']}
+    rows = []
+    for result in new['results']:
+        baseline = previous.get(key(result))
+        if baseline is None:
+            continue
+        for metric in THROUGHPUT_METRICS:
+            if metric not in result or metric not in baseline:
+                continue
+            ratio = result[metric] / baseline[metric]
+            rows.append({
+                'key': key(result), 'metric': metric,
+                'old': baseline[metric], 'new': result[metric],
+                'ratio': ratio, 'regression': ratio < 1 - threshold
+            })
+    return rows
+
+def _parse_size(text: str) -> int:
+    """解析规模参数, 支持 1e5 这样的写法"""
+    return int(float(text))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='网格回测与参数优化的合成数据基准测试')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help='成交数量, 例如 1e3 1e5 1e7 (默认: %(default)s)')
+    parser.add_argument('--models', nargs='+', default=['gbm', 'ou'], choices=['gbm', 'ou'])
+    parser.add_argument('--timeframes', nargs='+', default=['30min'], choices=['daily', '30min'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=5, help='每项计时的最多重复次数')
+    parser.add_argument('--max-optimize-rows', type=_parse_size, default=100000,
+                        help='超过该行数时跳过完整参数优化')
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'),
+                        help='合成数据目录 (相同参数的数据只生成一次)')
+    parser.add_argument('--output', help='结果JSON文件')
+    parser.add_argument('--compare', help='与之前的结果JSON对比')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='吞吐量下降超过该比例时视为回归 (默认: %(default)s)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='存在性能回归时返回非零退出码')
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        [_parse_size(size) for size in args.sizes], args.models, args.timeframes,
+        args.data_dir, args.seed, args.repeats, args.max_optimize_rows
+    )
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            old = json.load(f)
+        rows = compare_results(old, report, args.threshold)
+        print(f"\n与 {args.compare} 对比:")
+        for row in rows:
+            flag = '  <-- 回归' if row['regression'] else ''
+            model, timeframe, size, _ = row['key']
+            print(f"{model:>3} {timeframe:>5} {size:>9} {row['metric']:<28} "
+                  f"{row['old']:>12,.1f} -> {row['new']:>12,.1f} ({row['ratio']:.2f}x){flag}")
+        if args.fail_on_regression and any(row['regression'] for row in rows):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,25 @@
+# src/__init__.py - 初始化文件
+# moomoo-grid-optimizer/src/__init__.py
+
+import importlib
+
+__version__ = "0.1.0"
+
+# 公开名称 -> 所在模块; 首次访问时才导入, 导入包本身不加载 pandas/numpy
+_LAZY_EXPORTS = {
+    'GridOrderAnalyzer': '.order_analyzer',
+    'Config': '.config',
+}
+
+__all__ = list(_LAZY_EXPORTS) + ['__version__']
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
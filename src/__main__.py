@@ -0,0 +1,7 @@
+# src/__main__.py
+# moomoo-grid-optimizer/src/__main__.py
+
+import sys
+from .cli import main
+
+sys.exit(main())
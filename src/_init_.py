@@ -1,7 +0,0 @@
-# src/__init__.py - 初始化文件
-# moomoo-grid-optimizer/src/__init__.py
-
-from .order_analyzer import GridOrderAnalyzer
-from .config import Config
-
-__version__ = "0.1.0"
\ No newline at end of file
@@ -1,51 +1,268 @@
 # src/backtest_engine.py
 # moomoo-grid-optimizer/src/backtest_engine.py
 
+import dataclasses
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+from .checkpoint import BacktestCheckpoint
 from .config import Config
+from .grid_ladder import GridLadder
+from .instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from .market_data import PriceSeries
+from .metrics import EquityTracker, count_wins, summarize_backtest
+from .pruning import PruningBounds, buys_per_run, mark_pruned
+from .trade_log import TradeLog
 from tqdm import tqdm
 
 class GridBacktester:
     """网格策略回测引擎"""
     
-    def __init__(self, orders_df: pd.DataFrame, params: Dict):
+    def __init__(self, orders: Union[PriceSeries, pd.DataFrame], params: Dict,
+                 keep_equity_curve: bool = True, record_trades: bool = True,
+                 bounds: Optional[PruningBounds] = None,
+                 instrumentation: Optional[Instrumentation] = None):
         """
         初始化回测引擎
         
         Args:
-            orders_df: 历史订单数据
+            orders: 预处理后的价格序列, 或历史订单数据 (将转换为价格序列)
             params: 策略参数
+            keep_equity_curve: 是否保存逐价格点的市值资金曲线,
+                               False 时只流式计算回撤等指标
+            record_trades: 是否记录成交明细, False 时只累计指标所需的计数
+            bounds: 提前终止的判定边界 (基于同一价格序列构建),
+                    提供时在结果必然无效时停止回测
+            instrumentation: 性能统计, 提供时记录各阶段耗时与信号/成交计数
         """
-        self.orders_df = orders_df
+        if not isinstance(orders, PriceSeries):
+            orders = PriceSeries.from_orders(orders)
+        self.series = orders
         self.params = params
-        self.positions = {}
-        self.trades = []
+        self.ladder = None
+        self.positions = np.zeros(0, dtype=np.int64)
+        self.trades = TradeLog() if record_trades else None
         self.cash = Config.INITIAL_CAPITAL
+        self.held_quantity = 0
+        self.trade_count = 0
+        self.win_count = 0
         self.grid_prices = []
+        self.keep_equity_curve = keep_equity_curve
+        self.equity = None
+        self.bounds = bounds
+        self.pruned = None  # 提前终止时为 (原因编号, 块编号)
+        self._trade_capacity = None
+        self._resumed_from = None  # 从检查点继续回放时的检查点
+        self.evaluated = 0  # 检查过买卖信号的价格点数量
+        self.rejected_buys = 0  # 资金不足未能执行的买入信号数量
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        if self.instrumentation.enabled:
+            # 只在开启统计时替换为计时版本, 关闭时成交路径上没有额外开销
+            self._record_trade = self.instrumentation.timed('backtest.record_trade', self._record_trade)
         
-    def run_backtest(self) -> Dict:
-        """执行回测"""
-        self._initialize_grids(verbose=False)  # 关闭初始化时的详细输出
+    def run_backtest(self, mode: str = 'tick') -> Dict:
+        """
+        执行回测
         
-        valid_orders = self.orders_df[
-            (self.orders_df['成交时间'].notna()) & 
-            (self.orders_df['成交价格'] > 0)
-        ].sort_values('成交时间')
+        Args:
+            mode: 'tick' 逐个价格点回放; 'event' 利用价格穿越索引
+                  直接跳到下一个可能改变持仓的价格点, 结果与 'tick' 完全一致
+        """
+        instrumentation = self.instrumentation
+        if self.ladder is None:
+            with instrumentation.phase('backtest.initialize_grids'):
+                self._initialize_grids(verbose=False)  # 关闭初始化时的详细输出
+        self.equity = EquityTracker(self.series.prices, Config.INITIAL_CAPITAL,
+                                    keep_curve=self.keep_equity_curve)
+        if self._resumed_from is not None:
+            checkpoint = self._resumed_from
+            self.equity.restore(checkpoint.cash, checkpoint.held_quantity, checkpoint.peak,
+                                checkpoint.max_drawdown, checkpoint.last_equity)
         
-        trade_count = 0
-        for _, row in tqdm(valid_orders.iterrows(), desc="回测进行中", 
-                          disable=True):  # 关闭单个回测的进度条
-            price = row['成交价格']
-            time = row['成交时间']
-            
-            buys = self._check_buy_signals(price, time)
-            sells = self._check_sell_signals(price, time)
-            trade_count += len(buys) + len(sells)
+        if mode not in ('tick', 'event'):
+            raise ValueError(f"未知的回测模式: {mode}")
+        initial_trades = self.trade_count
+        with instrumentation.phase('backtest.replay'):
+            if mode == 'tick':
+                self._run_ticks()
+            else:
+                self._run_events()
+        if instrumentation.enabled:
+            self._count_run(initial_trades)
         
-        metrics = self._calculate_metrics()
+        with instrumentation.phase('backtest.metrics'):
+            if self.pruned is not None:
+                reason, block = self.pruned
+                return mark_pruned(self._calculate_metrics(), reason, self.bounds.fraction(block))
+            
+            self.equity.finalize()
+            metrics = self._calculate_metrics()
         return metrics
+    
+    def _count_run(self, initial_trades: int):
+        """把本次回放的计数累加到性能统计"""
+        count = self.instrumentation.count
+        fills = self.trade_count - initial_trades
+        covered = len(self.series)
+        if self.pruned is not None:
+            covered = int(self.bounds.starts[self.pruned[1]])
+            count('backtest.pruned')
+        count('backtest.runs')
+        count('backtest.ticks', covered)
+        count('backtest.signal_checks', self.evaluated)
+        count('backtest.signals', fills + self.rejected_buys)
+        count('backtest.fills', fills)
+    
+    def checkpoint(self) -> BacktestCheckpoint:
+        """
+        回测完成后的状态检查点
+
+        新数据追加后可用 GridBacktester.resume 只回放新增的价格点。
+        """
+        if self.equity is None or self.pruned is not None:
+            raise ValueError("只能为完整运行的回测保存检查点")
+        
+        previous = self._resumed_from
+        processed = (previous.processed if previous else 0) + len(self.series)
+        if len(self.series):
+            last_time = int(self.series.times[-1])
+        else:
+            last_time = previous.last_time if previous else np.iinfo(np.int64).min
+        return BacktestCheckpoint(
+            params=dict(self.params),
+            center_price=self.series.mean_price,
+            processed=processed,
+            last_time=last_time,
+            cash=float(self.cash),
+            positions=self.positions.copy(),
+            held_quantity=int(self.held_quantity),
+            trade_count=self.trade_count,
+            win_count=self.win_count,
+            peak=self.equity.peak,
+            max_drawdown=self.equity.max_drawdown,
+            last_equity=self.equity.last_equity,
+            trades=self.trades.to_columns() if self.trades is not None else None
+        )
+    
+    @classmethod
+    def resume(cls, checkpoint: BacktestCheckpoint, new_orders: Union[PriceSeries, pd.DataFrame],
+               keep_equity_curve: bool = True, record_trades: bool = True) -> 'GridBacktester':
+        """
+        从检查点继续回测
+        
+        网格中心价格固定为检查点中的价格 (不随新数据的平均价格变化),
+        调用 run_backtest 后的指标与用该中心价格完整回放全部数据相同。
+        资金曲线只包含新增的价格点。
+        
+        Args:
+            checkpoint: checkpoint() 保存的检查点
+            new_orders: 检查点之后新增的价格序列或订单数据
+            keep_equity_curve: 是否保存新增价格点的资金曲线
+            record_trades: 是否记录成交明细 (需要检查点中包含成交记录)
+        """
+        if not isinstance(new_orders, PriceSeries):
+            new_orders = PriceSeries.from_orders(new_orders)
+        if len(new_orders) and int(new_orders.times[0]) < checkpoint.last_time:
+            raise ValueError("新增数据早于检查点的最后一个价格点")
+        if record_trades and checkpoint.trades is None:
+            raise ValueError("检查点不包含成交记录, 请使用 record_trades=False")
+        
+        series = dataclasses.replace(new_orders, mean_price=checkpoint.center_price)
+        backtester = cls(series, checkpoint.params, keep_equity_curve=keep_equity_curve,
+                         record_trades=record_trades)
+        backtester._initialize_grids(verbose=False)
+        backtester.positions[:] = checkpoint.positions
+        backtester.cash = checkpoint.cash
+        backtester.held_quantity = checkpoint.held_quantity
+        backtester.trade_count = checkpoint.trade_count
+        backtester.win_count = checkpoint.win_count
+        if record_trades:
+            backtester.trades = TradeLog.from_columns(checkpoint.trades)
+        backtester._resumed_from = checkpoint
+        return backtester
+    
+    def _pending_checks(self) -> List[Tuple[int, int]]:
+        """尚未进行的提前终止检查 (块编号, 价格点下标), 逆序存放以便弹出"""
+        if self.bounds is None:
+            return []
+        self._trade_capacity = self.bounds.trade_capacity(
+            self.ladder.levels, self.ladder.take_profit_prices,
+            buys_per_run(self.params['position_limit'], self.params['min_order_quantity'])
+        )
+        return list(enumerate(self.bounds.positions.tolist(), start=1))[::-1]
+    
+    def _should_prune(self, block: int) -> bool:
+        """在第 block 个检查点判断结果是否必然无效"""
+        self.equity.advance(int(self.bounds.starts[block]))
+        reason = int(self.bounds.violations(
+            block, self.equity.last_equity, self.equity.max_drawdown,
+            self.trade_count, self.win_count,
+            self._trade_capacity[0][block], self._trade_capacity[1][block]
+        ))
+        if reason:
+            self.pruned = (reason, block)
+        return bool(reason)
+    
+    def _run_ticks(self):
+        """逐个价格点检查买卖信号"""
+        checks = self._pending_checks()
+        for position, (price, time) in enumerate(tqdm(
+                zip(self.series.prices.tolist(), self.series.times.tolist()),
+                total=len(self.series), desc="回测进行中",
+                disable=True)):  # 关闭单个回测的进度条
+            if checks and checks[-1][1] == position:
+                if self._should_prune(checks.pop()[0]):
+                    self.evaluated = position
+                    return
+            trade_count = self.trade_count
+            self._check_buy_signals(price, time)
+            self._check_sell_signals(price, time)
+            if self.trade_count != trade_count:
+                self.equity.update(position, self.cash, self.held_quantity)
+        self.evaluated = len(self.series)
+    
+    def _run_events(self):
+        """
+        事件驱动回放
+        
+        持仓不变时, 只有价格跌到可买入档位或涨到持仓档位的止盈价格
+        才可能产生交易, 其余价格点直接跳过。
+        """
+        prices = self.series.prices
+        times = self.series.times
+        index = self.series.crossing_index
+        length = len(prices)
+        quantity = self.params['min_order_quantity']
+        checks = self._pending_checks()
+        
+        position = 0
+        while position < length:
+            next_event = length
+            buy_trigger = self.ladder.buy_trigger_price(self.cash, quantity)
+            if buy_trigger is not None:
+                next_event = index.next_at_or_below(position, buy_trigger)
+            sell_trigger = self.ladder.sell_trigger_price()
+            if sell_trigger is not None:
+                next_event = min(next_event, index.next_at_or_above(position, sell_trigger))
+            if next_event >= length:
+                break
+            # 两次事件之间持仓不变, 跳过的检查点可以用当前状态判断
+            while checks and checks[-1][1] <= next_event:
+                if self._should_prune(checks.pop()[0]):
+                    return
+            
+            price, time = float(prices[next_event]), int(times[next_event])
+            self.evaluated += 1
+            trade_count = self.trade_count
+            self._check_buy_signals(price, time)
+            self._check_sell_signals(price, time)
+            if self.trade_count != trade_count:
+                self.equity.update(next_event, self.cash, self.held_quantity)
+            position = next_event + 1
+        # 最后一次事件之后持仓不再变化, 剩余的检查点与逐点回放一样依次判断
+        while checks:
+            if self._should_prune(checks.pop()[0]):
+                return
         
     def _initialize_grids(self, verbose: bool = True):
         """
@@ -54,143 +271,92 @@ class GridBacktester:
         Args:
             verbose: 是否打印详细信息
         """
-        avg_price = self.orders_df['成交价格'].mean()
+        avg_price = self.series.mean_price
         grid_count = self.params['grid_count']
         deviation = self.params['price_deviation']
         
-        self.grid_prices = []
-        half_grids = grid_count // 2
+        self.ladder = GridLadder(avg_price, grid_count, deviation,
+                                 self.params['profit_ratio'], self.params['position_limit'])
+        self.grid_prices = self.ladder.levels.tolist()
+        self.positions = self.ladder.positions  # 按整数档位索引的持仓
         
         if verbose:
             print("\n初始化网格:")
             print(f"平均价格: {avg_price:.2f}")
             print(f"网格数量: {grid_count}")
             print(f"价格偏差: {deviation:.3f}")
-        
-        for i in range(-half_grids, half_grids + 1):
-            grid_price = avg_price * (1 + i * deviation)
-            grid_price = round(grid_price, 2)  # 保留两位小数
-            self.grid_prices.append(grid_price)
-            self.positions[grid_price] = 0
-            
-            if verbose:
-                print(f"网格 {i+half_grids+1}: {grid_price:.2f}")
+            for level, grid_price in enumerate(self.grid_prices):
+                print(f"网格 {level+1}: {grid_price:.2f}")
             
-    def _check_buy_signals(self, price: float, time: pd.Timestamp) -> List[Dict]:
-        """检查买入信号"""
-        signals = []
-        for grid_price in self.grid_prices:
-            if (price <= grid_price and 
-                self.positions.get(grid_price, 0) < self.params['position_limit']):
-                signal = {
-                    'grid_price': grid_price,
-                    'price': price,
-                    'time': time
-                }
-                signals.append(signal)
-                self._execute_buy(grid_price, price, time)
-        return signals
+    def _check_buy_signals(self, price: float, time: int) -> int:
+        """检查买入信号 (只检查价格不高于网格价格的档位), 返回信号数量"""
+        signal_count = 0
+        position_limit = self.params['position_limit']
+        for level in self.ladder.buy_candidates(price):
+            if self.positions[level] < position_limit:
+                signal_count += 1
+                self._execute_buy(level, price, time)
+        return signal_count
 
-    def _check_sell_signals(self, price: float, time: pd.Timestamp) -> List[Dict]:
-        """检查卖出信号"""
-        signals = []
-        for grid_price in self.grid_prices:
-            if self.positions.get(grid_price, 0) > 0:
-                profit_ratio = (price - grid_price) / grid_price
-                if profit_ratio >= self.params['profit_ratio']:
-                    signal = {
-                        'grid_price': grid_price,
-                        'price': price,
-                        'time': time,
-                        'profit_ratio': profit_ratio
-                    }
-                    signals.append(signal)
-                    self._execute_sell(grid_price, price, time)
-        return signals
+    def _check_sell_signals(self, price: float, time: int) -> int:
+        """检查卖出信号 (只检查可能达到止盈价格的档位), 返回信号数量"""
+        signal_count = 0
+        for level in self.ladder.sell_candidates(price):
+            if self.positions[level] > 0 and self.ladder.is_take_profit(level, price):
+                signal_count += 1
+                self._execute_sell(level, price, time)
+        return signal_count
                     
-    def _execute_buy(self, grid_price: float, price: float, time: pd.Timestamp):
+    def _execute_buy(self, level: int, price: float, time: int):
         """执行买入"""
         quantity = self.params['min_order_quantity']
         cost = quantity * price
         
         if cost <= self.cash:
             self.cash -= cost
-            self.positions[grid_price] += quantity
-            self.trades.append({
-                'time': time,
-                'type': 'buy',
-                'price': price,
-                'quantity': quantity,
-                'grid_price': grid_price
-            })
+            self.positions[level] += quantity
+            self.held_quantity += quantity
+            self._record_trade(TradeLog.BUY, level, price, quantity, time)
+        else:
+            self.rejected_buys += 1
             
-    def _execute_sell(self, grid_price: float, price: float, time: pd.Timestamp):
+    def _execute_sell(self, level: int, price: float, time: int):
         """执行卖出"""
-        quantity = self.positions[grid_price]
+        quantity = int(self.positions[level])
         revenue = quantity * price
         
         self.cash += revenue
-        self.positions[grid_price] = 0
-        self.trades.append({
-            'time': time,
-            'type': 'sell',
-            'price': price,
-            'quantity': quantity,
-            'grid_price': grid_price
-        })
+        self.positions[level] = 0
+        self.held_quantity -= quantity
+        self._record_trade(TradeLog.SELL, level, price, quantity, time)
+        
+    def _record_trade(self, side: int, level: int, price: float, quantity: int, time: int):
+        """记录成交并累计交易次数与盈利次数"""
+        self.trade_count += 1
+        if self.trades is not None:
+            self.trades.append(time, side, price, quantity, level)
+        if price > self.ladder.level_price(level):
+            self.win_count += 1
+        
+    @property
+    def equity_curve(self) -> np.ndarray:
+        """逐价格点的市值资金曲线 (keep_equity_curve=False 时为None)"""
+        return self.equity.curve if self.equity is not None else None
         
     def _calculate_metrics(self) -> Dict:
-        """计算回测指标"""
-        if not self.trades:
+        """计算回测指标 (收益与回撤按最后价格点的市值计算)"""
+        if self.trade_count == 0:
             return {}
-            
-        trades_df = pd.DataFrame(self.trades)
-        
-        # 计算收益
-        total_value = self.cash
-        for grid_price, qty in self.positions.items():
-            if qty > 0:
-                current_price = trades_df['price'].iloc[-1]
-                total_value += qty * current_price
-        
-        profit = total_value - Config.INITIAL_CAPITAL
-        profit_ratio = profit / Config.INITIAL_CAPITAL
-        
-        return {
-            'total_profit': profit,
-            'profit_ratio': profit_ratio,
-            'trade_count': len(trades_df),
-            'win_rate': len(trades_df[trades_df['price'] > trades_df['grid_price']]) / len(trades_df) if len(trades_df) > 0 else 0,
-            'max_drawdown': self._calculate_max_drawdown(trades_df),
-            'final_value': total_value
-        }
-        
-    def _calculate_max_drawdown(self, trades_df: pd.DataFrame) -> float:
-        """计算最大回撤"""
-        if len(trades_df) == 0:
-            return 0
-            
-        equity_curve = []
-        current_equity = Config.INITIAL_CAPITAL
         
-        for _, trade in trades_df.iterrows():
-            if trade['type'] == 'buy':
-                current_equity -= trade['price'] * trade['quantity']
-            else:
-                current_equity += trade['price'] * trade['quantity']
-            equity_curve.append(current_equity)
-            
-        equity_curve = np.array(equity_curve)
-        peak = equity_curve[0]
-        max_drawdown = 0
-        
-        for value in equity_curve:
-            if value > peak:
-                peak = value
-            drawdown = (peak - value) / peak
-            max_drawdown = max(max_drawdown, drawdown)
-            
-        return max_drawdown
+        win_count = self.win_count
+        if self.trades is not None:
+            win_count = count_wins(self.trades.price, self.ladder.levels[self.trades.level])
+        return summarize_backtest(
+            final_equity=self.equity.last_equity,
+            max_drawdown=self.equity.max_drawdown,
+            trade_count=self.trade_count,
+            win_count=win_count
+        )
     
     def _is_valid_result(self, metrics: Dict) -> bool:
         """检查回测结果是否满足基本条件"""
@@ -0,0 +1,281 @@
+# src/bar_pyramid.py
+# moomoo-grid-optimizer/src/bar_pyramid.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from .data_cache import CACHE_FORMAT_VERSION, OrderDataCache, file_content_hash
+from .market_data import PriceSeries
+
+# 缓存格式版本, 修改K线列布局或聚合规则时递增
+PYRAMID_FORMAT_VERSION = 1
+
+_MINUTE = 60 * 10**9
+_DAY = 24 * 60 * _MINUTE
+
+# K线周期 -> 周期长度 (纳秒); 周线从周一开始
+BAR_LEVELS = {
+    '1min': _MINUTE,
+    '5min': 5 * _MINUTE,
+    '15min': 15 * _MINUTE,
+    '30min': 30 * _MINUTE,
+    '60min': 60 * _MINUTE,
+    'daily': _DAY,
+    'weekly': 7 * _DAY,
+}
+
+# 默认生成的K线周期 (对应 Config.GRID_PARAMS 的两种参数范围)
+DEFAULT_LEVELS = ('30min', 'daily')
+
+# 1970-01-01 是周四, 向前偏移3天使周线从周一开始
+_WEEK_OFFSET = 3 * _DAY
+
+# 每根K线的数组列
+BAR_COLUMNS = ('times', 'open', 'high', 'low', 'close', 'volume', 'trades')
+
+@dataclass(frozen=True)
+class BarSeries:
+    """
+    一个标的、一个周期的K线序列
+
+    times 为每根K线的起始时间 (纳秒时间戳), 只包含有成交的周期;
+    从缓存读取时各列为只读内存映射数组。
+    """
+
+    symbol: str
+    level: str
+    times: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray   # 成交数量之和
+    trades: np.ndarray   # 成交笔数
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def timeframe(self) -> str:
+        """对应的参数范围 ('daily' 或 '30min'), 与 detect_timeframe 的划分一致"""
+        return 'daily' if BAR_LEVELS[self.level] >= _DAY else '30min'
+
+    def to_orders(self) -> pd.DataFrame:
+        """
+        以每根K线的收盘价作为一笔成交, 转换为与 read_order_csv 相同列名的订单数据
+
+        Returns:
+            pd.DataFrame: 代码、交易状态、成交数量、成交价格、成交时间 列
+        """
+        count = len(self)
+        return pd.DataFrame({
+            '代码': pd.Categorical.from_codes(np.zeros(count, dtype=np.int8), [self.symbol]),
+            '交易状态': pd.Categorical.from_codes(np.zeros(count, dtype=np.int8), ['全部成交']),
+            '成交数量': np.asarray(self.volume),
+            '成交价格': np.asarray(self.close),
+            '成交时间': np.asarray(self.times).view('datetime64[ns]')
+        }, copy=False)
+
+    def to_price_series(self) -> PriceSeries:
+        """收盘价序列 (与 PriceSeries.from_orders(self.to_orders()) 相同)"""
+        return PriceSeries(self.close, self.times, pd.Series(self.close).mean())
+
+def resample_bars(times: np.ndarray, prices: np.ndarray, quantities: np.ndarray,
+                  level: str, symbol: str = '') -> BarSeries:
+    """
+    把按时间排序的成交聚合为K线 (向量化, 不逐笔循环)
+
+    Args:
+        times: 成交时间 (纳秒时间戳, 已排序)
+        prices: 成交价格
+        quantities: 成交数量 (NaN 按 0 计)
+        level: BAR_LEVELS 中的周期
+        symbol: 标的代码
+
+    Returns:
+        BarSeries: 只包含有成交的周期的K线
+    """
+    if level not in BAR_LEVELS:
+        raise ValueError(f"不支持的K线周期: {level}")
+    width = BAR_LEVELS[level]
+    offset = _WEEK_OFFSET if level == 'weekly' else 0
+    buckets = (np.asarray(times, dtype=np.int64) + offset) // width
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.nan_to_num(np.asarray(quantities, dtype=np.float64))
+    if len(buckets) == 0:
+        empty = np.empty(0)
+        return BarSeries(symbol, level, buckets, empty, empty, empty, empty, empty,
+                         np.empty(0, dtype=np.int64))
+
+    # 每根K线在成交数组中的 [start, end) 区间
+    starts = np.flatnonzero(np.concatenate([[True], buckets[1:] != buckets[:-1]]))
+    ends = np.append(starts[1:], len(buckets))
+    return BarSeries(
+        symbol=symbol,
+        level=level,
+        times=buckets[starts] * width - offset,
+        open=prices[starts],
+        high=np.maximum.reduceat(prices, starts),
+        low=np.minimum.reduceat(prices, starts),
+        close=prices[ends - 1],
+        volume=np.add.reduceat(quantities, starts),
+        trades=ends - starts
+    )
+
+def build_pyramid(orders_df: pd.DataFrame,
+                  levels: Sequence[str] = DEFAULT_LEVELS) -> Dict[str, Dict[str, BarSeries]]:
+    """
+    从最细粒度的订单数据一次生成各标的、各周期的K线
+
+    与 PriceSeries.from_orders 相同: 过滤无成交时间或成交价格不为正的订单,
+    按成交时间稳定排序。
+
+    Args:
+        orders_df: 订单数据, 需包含 代码、成交数量、成交价格、成交时间 列
+        levels: 需要生成的K线周期
+
+    Returns:
+        Dict[str, Dict[str, BarSeries]]: 标的 -> 周期 -> K线
+    """
+    valid = orders_df[(orders_df['成交时间'].notna()) & (orders_df['成交价格'] > 0)]
+    pyramid = {}
+    for symbol, orders in valid.groupby('代码', sort=True, observed=True):
+        orders = orders.sort_values('成交时间', kind='stable')
+        times = orders['成交时间'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        prices = orders['成交价格'].to_numpy(dtype=np.float64)
+        quantities = orders['成交数量'].to_numpy(dtype=np.float64)
+        pyramid[str(symbol)] = {
+            level: resample_bars(times, prices, quantities, level, str(symbol)) for level in levels
+        }
+    return pyramid
+
+class BarPyramid:
+    """一份订单导出生成的全部K线 (标的 -> 周期 -> BarSeries)"""
+
+    def __init__(self, bars: Dict[str, Dict[str, BarSeries]]):
+        self.bars = bars
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.bars)
+
+    @property
+    def levels(self) -> List[str]:
+        return list(next(iter(self.bars.values()), {}))
+
+    def get(self, level: str, symbol: Optional[str] = None) -> BarSeries:
+        """
+        读取一个周期的K线
+
+        Args:
+            level: K线周期
+            symbol: 标的代码, 导出中只有一个标的时可以省略
+        """
+        if symbol is None:
+            if len(self.bars) != 1:
+                raise ValueError(f"订单导出包含多个标的, 需要指定 symbol: {self.symbols}")
+            symbol = self.symbols[0]
+        try:
+            return self.bars[symbol][level]
+        except KeyError:
+            raise KeyError(f"没有 {symbol} 的 {level} K线") from None
+
+class BarPyramidCache(OrderDataCache):
+    """
+    K线金字塔缓存
+
+    每个CSV文件只解析一次, 生成的各标的、各周期K线按列保存为 .npy,
+    读取时以内存映射方式打开。缓存有效性判断与 OrderDataCache 相同
+    (大小/修改时间, 其次是内容哈希); 请求的周期不在缓存中时重新生成,
+    已缓存的周期一并保留, 交替请求不同周期时不会反复解析CSV。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, levels: Iterable[str] = DEFAULT_LEVELS):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录, 默认为 Config.CACHE_DIR
+            levels: 需要的K线周期
+        """
+        super().__init__(cache_dir)
+        self.levels = tuple(levels)
+        for level in self.levels:
+            if level not in BAR_LEVELS:
+                raise ValueError(f"不支持的K线周期: {level}")
+
+    def load(self, csv_path: str) -> BarPyramid:
+        """
+        读取K线金字塔, 缓存有效时不再解析CSV
+
+        Args:
+            csv_path: 最细粒度的订单导出CSV
+
+        Returns:
+            BarPyramid: 各标的、各周期的K线
+        """
+        return super().load(csv_path)
+
+    def _entry_dir(self, csv_path: str) -> str:
+        key = hashlib.sha1(csv_path.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'bars', key)
+
+    def _is_fresh(self, manifest: Dict, csv_path: str, stat: os.stat_result) -> bool:
+        if manifest.get('pyramid_version') != PYRAMID_FORMAT_VERSION:
+            return False
+        if not set(self.levels) <= set(manifest['levels']):
+            return False
+        return super()._is_fresh(manifest, csv_path, stat)
+
+    def _load_entry(self, entry_dir: str, manifest: Dict) -> BarPyramid:
+        bars = {}
+        for symbol, prefix in manifest['symbols'].items():
+            bars[symbol] = {}
+            for level in self.levels:
+                columns = {
+                    name: np.load(os.path.join(entry_dir, f'{prefix}-{level}-{name}.npy'), mmap_mode='r')
+                    for name in BAR_COLUMNS
+                }
+                bars[symbol][level] = BarSeries(symbol=symbol, level=level, **columns)
+        return BarPyramid(bars)
+
+    def _write_entry(self, entry_dir: str, csv_path: str, stat: os.stat_result, df: pd.DataFrame):
+        """写入缓存: 先写临时目录, 完成后再替换"""
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(entry_dir), prefix='.tmp-')
+        # 请求的周期与已缓存的周期的并集 (按周期长度排列)
+        levels = set(self.levels)
+        cached = self._read_manifest(entry_dir)
+        if cached is not None and cached.get('pyramid_version') == PYRAMID_FORMAT_VERSION:
+            levels.update(level for level in cached['levels'] if level in BAR_LEVELS)
+        levels = sorted(levels, key=BAR_LEVELS.get)
+        pyramid = build_pyramid(df, levels)
+        manifest = {
+            'version': CACHE_FORMAT_VERSION,
+            'pyramid_version': PYRAMID_FORMAT_VERSION,
+            'source': csv_path,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_content_hash(csv_path),
+            'rows': len(df),
+            'levels': levels,
+            'symbols': {}
+        }
+        try:
+            for index, (symbol, levels) in enumerate(pyramid.items()):
+                # 标的代码可能包含不适合作为文件名的字符, 文件名使用序号
+                prefix = f's{index}'
+                manifest['symbols'][symbol] = prefix
+                for level, bars in levels.items():
+                    for name in BAR_COLUMNS:
+                        np.save(os.path.join(tmp_dir, f'{prefix}-{level}-{name}.npy'), getattr(bars, name))
+            self._save_manifest(tmp_dir, manifest)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self._publish_entry(tmp_dir, entry_dir)
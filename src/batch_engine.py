@@ -0,0 +1,270 @@
+# src/batch_engine.py
+# moomoo-grid-optimizer/src/batch_engine.py
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+from .config import Config
+from .grid_ladder import build_grid_levels
+from .market_data import PriceSeries
+from .metrics import summarize_backtest
+from .pruning import PruningBounds, buys_per_run, mark_pruned
+
+class BatchGridBacktester:
+    """
+    批量网格回测引擎
+
+    把价格序列视为一个NumPy数组, 参数组合视为一组参数数组,
+    逐个价格点同时推进所有组合的资金/持仓状态。
+    每个组合的交易规则与 GridBacktester 完全一致, 返回相同格式的指标字典。
+    """
+
+    # 随参数组合 (行) 变化的状态数组, 提前终止的组合会从这些数组中移除
+    _ROW_STATE = ('rows', 'grid_prices', 'position_limits', 'order_quantities', 'profit_ratios',
+                  'positions', 'cash', 'held_quantities', 'trade_counts', 'win_counts',
+                  'equities', 'peaks', 'max_drawdowns', 'remaining_buys', 'remaining_sells')
+
+    # 可保存到检查点并恢复的状态数组
+    STATE_ARRAYS = ('positions', 'cash', 'held_quantities', 'trade_counts', 'win_counts',
+                    'equities', 'peaks', 'max_drawdowns')
+
+    def __init__(self, orders: Optional[Union[PriceSeries, pd.DataFrame]], param_list: List[Dict],
+                 bounds: Optional[PruningBounds] = None):
+        """
+        初始化批量回测引擎
+
+        Args:
+            orders: 预处理后的价格序列或历史订单数据, 直接调用 run_on_prices 时可为None
+            param_list: 策略参数列表, 每个元素与 GridBacktester 的 params 相同
+            bounds: 提前终止的判定边界 (基于同一价格数组构建),
+                    提供时结果必然无效的组合会提前停止
+        """
+        if orders is not None and not isinstance(orders, PriceSeries):
+            orders = PriceSeries.from_orders(orders)
+        self.series = orders
+        self.param_list = list(param_list)
+        self.bounds = bounds
+
+    def run_backtest(self, state: Optional[Dict[str, np.ndarray]] = None) -> List[Dict]:
+        """
+        执行批量回测
+
+        Args:
+            state: 之前数据上的回测状态 (见 run_on_prices)
+
+        Returns:
+            List[Dict]: 与 param_list 一一对应的回测指标
+        """
+        return self.run_on_prices(self.series.prices, self.series.mean_price, state)
+
+    def run_on_prices(self, prices: np.ndarray, avg_price: float,
+                      state: Optional[Dict[str, np.ndarray]] = None) -> List[Dict]:
+        """
+        在已过滤、已排序的价格数组上执行批量回测
+
+        Args:
+            prices: 按成交时间排序的有效成交价格
+            avg_price: 网格中心价格 (订单数据的平均成交价)
+            state: 之前数据上的回测状态 (get_state 的结果), 提供时从该状态继续回放,
+                   prices 只需包含新增的价格点
+
+        Returns:
+            List[Dict]: 与 param_list 一一对应的回测指标
+        """
+        if not self.param_list:
+            return []
+
+        self._initialize_state(avg_price)
+        if state is not None:
+            self._restore_state(state)
+        checks = self._pending_checks()
+        for position, price in enumerate(np.asarray(prices, dtype=np.float64).tolist()):
+            if checks and checks[-1][1] == position:
+                self._prune(checks.pop()[0])
+                if len(self.rows) == 0:
+                    break
+            self._process_tick(price)
+
+        return self._calculate_metrics()
+
+    def run_on_paths(self, paths: np.ndarray, avg_prices: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        每个参数组合在各自的价格路径上回测 (用于蒙特卡洛等重采样评估)
+
+        param_list 的第 i 个组合使用 paths 的第 i 行; 同一组参数在多条路径上评估时
+        在 param_list 中重复即可。交易规则与 run_on_prices 完全一致。
+
+        Args:
+            paths: 形状为 (组合数, 价格点数) 的价格矩阵
+            avg_prices: 每行的网格中心价格, 默认为各行价格的平均值
+
+        Returns:
+            List[Dict]: 与 param_list 一一对应的回测指标
+        """
+        paths = np.asarray(paths, dtype=np.float64)
+        if paths.ndim != 2 or len(paths) != len(self.param_list):
+            raise ValueError("价格路径的行数必须与参数组合数量一致")
+        if self.bounds is not None:
+            raise ValueError("按行使用不同价格路径时不能提前终止")
+        if not self.param_list:
+            return []
+
+        self._initialize_state(paths.mean(axis=1) if avg_prices is None else avg_prices)
+        # 转置为按价格点连续存放, 每个价格点取一整列
+        for prices in np.ascontiguousarray(paths.T):
+            self._process_tick(prices)
+        return self._calculate_metrics()
+
+    def _initialize_state(self, avg_price: Union[float, np.ndarray]):
+        """初始化所有组合的网格价格与资金/持仓状态 (avg_price 可以按组合分别指定)"""
+        combo_count = len(self.param_list)
+        level_count = max(p['grid_count'] // 2 * 2 + 1 for p in self.param_list)
+        centers = np.broadcast_to(np.asarray(avg_price, dtype=np.float64), (combo_count,))
+
+        # 网格数较少的组合用NaN填充, NaN参与比较时恒为False, 不会触发信号
+        self.grid_prices = np.full((combo_count, level_count), np.nan)
+        # 重复的 (中心价格, 网格数, 偏差) 只生成一次网格价格
+        ladders = {}
+        for row, params in enumerate(self.param_list):
+            key = (float(centers[row]), params['grid_count'], params['price_deviation'])
+            levels = ladders.get(key)
+            if levels is None:
+                levels = ladders[key] = build_grid_levels(*key)
+            self.grid_prices[row, :len(levels)] = levels
+
+        self.position_limits = np.array([p['position_limit'] for p in self.param_list], dtype=np.int64)
+        self.order_quantities = np.array([p['min_order_quantity'] for p in self.param_list], dtype=np.int64)
+        self.profit_ratios = np.array([p['profit_ratio'] for p in self.param_list], dtype=np.float64)
+
+        self.positions = np.zeros((combo_count, level_count), dtype=np.int64)
+        self.cash = np.full(combo_count, float(Config.INITIAL_CAPITAL))
+        self.held_quantities = np.zeros(combo_count, dtype=np.int64)
+        self.trade_counts = np.zeros(combo_count, dtype=np.int64)
+        self.win_counts = np.zeros(combo_count, dtype=np.int64)
+        # 按市值计算的权益、峰值与最大回撤, 峰值从初始资金开始
+        self.equities = self.cash.copy()
+        self.peaks = self.cash.copy()
+        self.max_drawdowns = np.zeros(combo_count)
+
+        # 当前仍在回测的组合在 param_list 中的下标, 以及已确定的结果
+        self.rows = np.arange(combo_count)
+        self.results = [None] * combo_count
+        self.remaining_buys = np.zeros((combo_count, 0), dtype=np.int64)
+        self.remaining_sells = np.zeros((combo_count, 0), dtype=np.int64)
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """
+        回测结束时的状态数组 (每行对应一个参数组合), 可保存为检查点
+
+        Returns:
+            Dict[str, np.ndarray]: STATE_ARRAYS 中各数组的副本
+        """
+        if len(self.rows) != len(self.param_list):
+            raise ValueError("提前终止的批量回测无法保存状态")
+        return {name: getattr(self, name).copy() for name in self.STATE_ARRAYS}
+
+    def _restore_state(self, state: Dict[str, np.ndarray]):
+        """恢复 get_state 保存的状态; 持仓数组可能因其他组合而更宽, 多出的档位均为空仓"""
+        if self.bounds is not None:
+            raise ValueError("从检查点继续回放时不能提前终止")
+        for name in self.STATE_ARRAYS:
+            values = np.asarray(state[name])
+            if len(values) != len(self.param_list):
+                raise ValueError(f"状态数组 {name} 与参数组合数量不一致")
+            if name == 'positions':
+                level_count = self.positions.shape[1]
+                if values.shape[1] > level_count and values[:, level_count:].any():
+                    raise ValueError("持仓状态与网格档位不一致")
+                self.positions[:, :min(level_count, values.shape[1])] = values[:, :level_count]
+            else:
+                setattr(self, name, values.astype(getattr(self, name).dtype, copy=True))
+
+    def _pending_checks(self) -> List[Tuple[int, int]]:
+        """尚未进行的提前终止检查 (块编号, 价格点下标), 逆序存放以便弹出"""
+        if self.bounds is None:
+            return []
+        take_profit_prices = self.grid_prices * (1 + self.profit_ratios[:, None])
+        self.remaining_buys, self.remaining_sells = self.bounds.trade_capacity(
+            self.grid_prices, take_profit_prices,
+            buys_per_run(self.position_limits, self.order_quantities)
+        )
+        return list(enumerate(self.bounds.positions.tolist(), start=1))[::-1]
+
+    def _prune(self, block: int):
+        """在第 block 个检查点移除结果必然无效的组合, 保存其终止时的指标"""
+        reasons = self.bounds.violations(
+            block, self.equities, self.max_drawdowns, self.trade_counts,
+            self.win_counts, self.remaining_buys[:, block], self.remaining_sells[:, block]
+        )
+        pruned = reasons > 0
+        if not pruned.any():
+            return
+
+        fraction = self.bounds.fraction(block)
+        for index in np.flatnonzero(pruned):
+            self.results[self.rows[index]] = mark_pruned(self._row_metrics(index), int(reasons[index]), fraction)
+        keep = ~pruned
+        for name in self._ROW_STATE:
+            setattr(self, name, getattr(self, name)[keep])
+
+    def _process_tick(self, price: Union[float, np.ndarray]):
+        """
+        处理一个价格点: 先按网格从低到高买入, 再检查卖出, 最后按市值更新权益
+
+        price 为所有组合共用的价格, 或每个组合各自的价格数组 (run_on_paths)
+        """
+        self._process_signals(price)
+
+        equities = self.cash + self.held_quantities * price
+        np.maximum(self.peaks, equities, out=self.peaks)
+        np.maximum(self.max_drawdowns, (self.peaks - equities) / self.peaks, out=self.max_drawdowns)
+        self.equities = equities
+
+    def _process_signals(self, price: Union[float, np.ndarray]):
+        """检查并执行一个价格点上所有组合的买卖信号"""
+        per_row = isinstance(price, np.ndarray)
+        level_price = price[:, None] if per_row else price
+        buy_mask = (level_price <= self.grid_prices) & (self.positions < self.position_limits[:, None])
+        if buy_mask.any():
+            costs = self.order_quantities * price
+            # 同一组合内按网格顺序依次扣减资金, 保证与逐笔回放的结果一致
+            for col in np.flatnonzero(buy_mask.any(axis=0)):
+                executed = buy_mask[:, col] & (costs <= self.cash)
+                if not executed.any():
+                    continue
+                self.cash[executed] -= costs[executed]
+                self.positions[executed, col] += self.order_quantities[executed]
+                self.held_quantities[executed] += self.order_quantities[executed]
+                self._record_trades(executed, price, col)
+
+        held = self.positions > 0
+        if not held.any():
+            return
+        with np.errstate(invalid='ignore'):
+            sell_mask = held & ((level_price - self.grid_prices) / self.grid_prices >= self.profit_ratios[:, None])
+        for col in np.flatnonzero(sell_mask.any(axis=0)):
+            executed = sell_mask[:, col]
+            self.cash[executed] += self.positions[executed, col] * (price[executed] if per_row else price)
+            self.held_quantities[executed] -= self.positions[executed, col]
+            self.positions[executed, col] = 0
+            self._record_trades(executed, price, col)
+
+    def _record_trades(self, executed: np.ndarray, price: Union[float, np.ndarray], col: int):
+        """记录成交: 更新交易次数与胜率计数"""
+        self.trade_counts[executed] += 1
+        self.win_counts[executed & (price > self.grid_prices[:, col])] += 1
+
+    def _row_metrics(self, index: int) -> Dict:
+        """状态数组中第 index 行的回测指标"""
+        return summarize_backtest(
+            final_equity=float(self.equities[index]),
+            max_drawdown=float(self.max_drawdowns[index]),
+            trade_count=int(self.trade_counts[index]),
+            win_count=int(self.win_counts[index])
+        )
+
+    def _calculate_metrics(self) -> List[Dict]:
+        """计算每个组合的回测指标 (收益与回撤按最后价格点的市值计算)"""
+        for index, row in enumerate(self.rows):
+            self.results[row] = self._row_metrics(index)
+        return self.results
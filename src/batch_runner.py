@@ -0,0 +1,190 @@
+# src/batch_runner.py
+# moomoo-grid-optimizer/src/batch_runner.py
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+from .data_loader import detect_timeframe, read_order_csv
+from .parameter_optimizer import ParameterOptimizer
+
+# 少于该数量的成交无法判断时间周期, 不参与优化
+MIN_JOB_ORDERS = 2
+
+@dataclass
+class SymbolJob:
+    """一个标的、一个时间周期的优化任务"""
+
+    symbol: str
+    timeframe: str
+    orders: pd.DataFrame
+    sources: List[str]
+
+    @property
+    def size(self) -> int:
+        """任务规模 (成交数量), 用于调度排序"""
+        return len(self.orders)
+
+def load_symbol_jobs(path: str) -> List[SymbolJob]:
+    """
+    读取订单导出并按 代码 与时间周期拆分为优化任务
+
+    Args:
+        path: CSV文件, 或包含多个CSV文件的目录; 单个文件可以包含多个标的
+
+    Returns:
+        List[SymbolJob]: 按任务规模从大到小排序的任务
+    """
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, '*.csv')))
+    else:
+        files = [path]
+
+    # 同一标的、同一时间周期分布在多个文件中时合并为一个任务
+    groups: Dict[tuple, List[tuple]] = {}
+    for file_path in files:
+        df = read_order_csv(file_path)
+        df = df[(df['成交价格'].notna()) & (df['成交数量'].notna()) & (df['成交时间'].notna())]
+        for symbol, orders in df.groupby('代码', sort=True, observed=True):
+            if len(orders) < MIN_JOB_ORDERS:
+                continue
+            timeframe = detect_timeframe(orders['成交时间'])
+            groups.setdefault((str(symbol), timeframe), []).append((file_path, orders))
+
+    jobs = []
+    for (symbol, timeframe), parts in groups.items():
+        orders = pd.concat([part for _, part in parts], ignore_index=True)
+        jobs.append(SymbolJob(symbol, timeframe, orders, [file_path for file_path, _ in parts]))
+    jobs.sort(key=lambda job: job.size, reverse=True)
+    return jobs
+
+def _optimize_job(job: SymbolJob, engine: str, prune: bool, top_k: Optional[int] = None) -> Dict:
+    """优化一个任务 (在工作进程中运行)"""
+    started = time.perf_counter()
+    try:
+        optimizer = ParameterOptimizer(None, job.timeframe, orders_df=job.orders)
+        results = optimizer.optimize(engine=engine, workers=1, prune=prune, verbose=False,
+                                     top_k=top_k)
+        error = None
+    except Exception as e:
+        results, error = [], str(e)
+    return {
+        'symbol': job.symbol,
+        'timeframe': job.timeframe,
+        'orders': job.size,
+        'results': results,
+        'error': error,
+        'elapsed': time.perf_counter() - started
+    }
+
+def run_symbol_jobs(jobs: List[SymbolJob], engine: str = 'batch', workers: Optional[int] = None,
+                    prune: bool = True,
+                    on_progress: Optional[Callable[[Dict], None]] = None,
+                    top_k: Optional[int] = None) -> List[Dict]:
+    """
+    在共享的进程池中运行所有优化任务
+
+    任务按规模从大到小提交 (最长任务优先), 避免大任务最后才开始导致进程空闲。
+    单个任务失败不影响其他任务, 错误信息记录在该任务的结果中。
+
+    Args:
+        jobs: load_symbol_jobs 生成的任务
+        engine: 回测引擎 ('batch'、'loop' 或 'event')
+        workers: 工作进程数, 1 为在当前进程中依次运行, None 表示使用全部CPU
+        prune: 是否提前终止结果必然无效的回测
+        on_progress: 每完成一个任务时回调, 参数为该任务的结果
+        top_k: 每个任务只保留最优的 K 组有效结果, None 表示全部保留
+
+    Returns:
+        List[Dict]: 每个任务的结果 (symbol, timeframe, orders, results, error, elapsed),
+                    顺序与 jobs 相同
+    """
+    ordered = sorted(range(len(jobs)), key=lambda index: jobs[index].size, reverse=True)
+    outcomes = [None] * len(jobs)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for index in ordered:
+            outcomes[index] = _optimize_job(jobs[index], engine, prune, top_k)
+            if on_progress is not None:
+                on_progress(outcomes[index])
+        return outcomes
+
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(jobs)))) as executor:
+        futures = {
+            executor.submit(_optimize_job, jobs[index], engine, prune, top_k): index
+            for index in ordered
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            outcomes[index] = future.result()
+            if on_progress is not None:
+                on_progress(outcomes[index])
+    return outcomes
+
+def build_ranking(outcomes: List[Dict], top_n: Optional[int] = 3) -> pd.DataFrame:
+    """
+    汇总所有标的的优化结果
+
+    Args:
+        outcomes: run_symbol_jobs 的结果
+        top_n: 每个标的/时间周期保留的最优参数组数, None 表示全部保留
+
+    Returns:
+        pd.DataFrame: 每行一组参数, 按收益率从高到低排序,
+                      symbol_rank 为该参数组在所属标的/时间周期内的排名
+    """
+    rows = []
+    for outcome in outcomes:
+        results = outcome['results'] if top_n is None else outcome['results'][:top_n]
+        for rank, result in enumerate(results, start=1):
+            row = {'symbol': outcome['symbol'], 'timeframe': outcome['timeframe'], 'symbol_rank': rank}
+            row.update(result['params'])
+            row.update(result['metrics'])
+            rows.append(row)
+
+    ranking = pd.DataFrame(rows)
+    if ranking.empty:
+        return ranking
+    return ranking.sort_values(['profit_ratio', 'symbol', 'timeframe'],
+                               ascending=[False, True, True], kind='stable').reset_index(drop=True)
+
+def optimize_symbols(path: str, output_path: Optional[str] = None, engine: str = 'batch',
+                     workers: Optional[int] = None, top_n: Optional[int] = 3,
+                     prune: bool = True, verbose: bool = True) -> pd.DataFrame:
+    """
+    多标的批量优化: 拆分任务、并行优化并生成汇总排名
+
+    Args:
+        path: CSV文件或目录
+        output_path: 汇总排名的CSV输出路径, None 表示不写文件
+        engine: 回测引擎
+        workers: 工作进程数
+        top_n: 每个标的/时间周期保留的最优参数组数
+        prune: 是否提前终止结果必然无效的回测
+        verbose: 是否打印每个任务的完成情况
+
+    Returns:
+        pd.DataFrame: 汇总排名 (见 build_ranking)
+    """
+    jobs = load_symbol_jobs(path)
+    if verbose:
+        print(f"\n共 {len(jobs)} 个优化任务 ({len({job.symbol for job in jobs})} 个标的)")
+
+    def report(outcome: Dict):
+        if not verbose:
+            return
+        if outcome['error']:
+            print(f"{outcome['symbol']} {outcome['timeframe']}: 失败 - {outcome['error']}")
+        else:
+            print(f"{outcome['symbol']} {outcome['timeframe']}: {len(outcome['results'])} 组有效参数 "
+                  f"({outcome['orders']} 笔成交, {outcome['elapsed']:.1f}s)")
+
+    outcomes = run_symbol_jobs(jobs, engine, workers, prune, on_progress=report, top_k=top_n)
+    ranking = build_ranking(outcomes, top_n)
+    if output_path is not None:
+        ranking.to_csv(output_path, index=False, encoding='utf-8-sig')
+    return ranking
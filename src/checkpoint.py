@@ -0,0 +1,72 @@
+# src/checkpoint.py
+# moomoo-grid-optimizer/src/checkpoint.py
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import numpy as np
+
+@dataclass
+class BacktestCheckpoint:
+    """
+    单个参数组合的回测检查点
+
+    记录回放到某个价格点为止的全部状态: 网格中心价格、现金、各档位持仓、
+    成交记录以及收益/回撤的累计量。新数据追加后从检查点继续回放,
+    结果与用同一网格中心价格完整回放全部数据相同。
+    """
+
+    params: Dict
+    center_price: float      # 网格中心价格 (之后的回放固定使用该价格)
+    processed: int           # 已回放的价格点数量
+    last_time: int           # 最后一个已回放价格点的时间 (纳秒时间戳)
+    cash: float
+    positions: np.ndarray    # 按档位索引的持仓
+    held_quantity: int
+    trade_count: int
+    win_count: int
+    peak: float              # 权益峰值
+    max_drawdown: float
+    last_equity: float
+    trades: Optional[Dict[str, np.ndarray]] = field(default=None)  # TradeLog 各列
+
+    def save(self, path: str):
+        """保存为 .npz 文件 (先写临时文件再替换)"""
+        arrays = {
+            'positions': np.asarray(self.positions, dtype=np.int64),
+            'state': np.array([self.cash, self.peak, self.max_drawdown, self.last_equity, self.center_price]),
+            'counters': np.array([self.processed, self.last_time, self.held_quantity,
+                                  self.trade_count, self.win_count], dtype=np.int64),
+            'params': np.array(json.dumps(self.params, sort_keys=True)),
+        }
+        if self.trades is not None:
+            arrays.update({f'trades_{name}': values for name, values in self.trades.items()})
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BacktestCheckpoint':
+        """读取 save 保存的检查点"""
+        with np.load(path) as data:
+            cash, peak, max_drawdown, last_equity, center_price = data['state'].tolist()
+            processed, last_time, held_quantity, trade_count, win_count = data['counters'].tolist()
+            trades = {
+                name[len('trades_'):]: data[name] for name in data.files if name.startswith('trades_')
+            }
+            return cls(
+                params=json.loads(str(data['params'])),
+                center_price=center_price,
+                processed=processed,
+                last_time=last_time,
+                cash=cash,
+                positions=data['positions'],
+                held_quantity=held_quantity,
+                trade_count=trade_count,
+                win_count=win_count,
+                peak=peak,
+                max_drawdown=max_drawdown,
+                last_equity=last_equity,
+                trades=trades or None
+            )
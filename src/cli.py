@@ -0,0 +1,323 @@
+# src/cli.py
+# moomoo-grid-optimizer/src/cli.py
+
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+from . import __version__
+from .config import Config
+from .result_collector import to_jsonable
+
+# 本模块只依赖标准库与 config; pandas/numpy 等在子命令真正需要时才导入,
+# --help、config 子命令与命中输出缓存时都不会加载它们
+
+BENCHMARK_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'benchmarks', 'run_benchmarks.py')
+
+class StartupProfiler:
+    """记录子命令延迟导入各模块的耗时 (--profile-startup)"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.imports: List[tuple] = []
+        self.started = time.perf_counter()
+
+    def load(self, module_name: str):
+        """导入 src 包内的模块 (例如 '.parameter_optimizer') 并计时"""
+        started = time.perf_counter()
+        module = importlib.import_module(module_name, __package__)
+        self.imports.append((module_name.lstrip('.'), time.perf_counter() - started))
+        return module
+
+    def report(self) -> str:
+        """导入耗时与总耗时"""
+        total = time.perf_counter() - self.started
+        imported = sum(elapsed for _, elapsed in self.imports)
+        lines = [f"{elapsed * 1000:>9.1f} ms  导入 {name}" for name, elapsed in self.imports]
+        lines.append(f"{imported * 1000:>9.1f} ms  导入合计")
+        lines.append(f"{total * 1000:>9.1f} ms  命令总耗时 (不含解释器启动)")
+        lines.append("逐模块明细可使用: python -X importtime -m src ...")
+        return '\n'.join(lines)
+
+class OutputCache:
+    """
+    命令输出缓存
+
+    以输入文件的路径/大小/修改时间、命令参数、版本号与配置取值为键保存命令的JSON输出。
+    命中时直接返回, 不导入 pandas/numpy, 也不重新解析CSV。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.directory = os.path.join(cache_dir or Config.CACHE_DIR, 'cli')
+
+    def key(self, command: str, csv_path: str, options: Dict) -> str:
+        stat = os.stat(csv_path)
+        payload = json.dumps({
+            'command': command,
+            'source': os.path.abspath(csv_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'options': options,
+            'version': __version__,
+            'config': _config_fingerprint()
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, key + '.json'), encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key: str, text: str):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key + '.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(path + '.tmp', path)
+
+def _config_fingerprint() -> str:
+    """Config 中全部配置项的取值 (配置变化时输出缓存失效)"""
+    values = {name: repr(value) for name, value in vars(Config).items()
+              if name.isupper()}
+    return hashlib.sha256(json.dumps(values, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, indent=2, default=to_jsonable)
+
+def run_analyze(args: argparse.Namespace, profiler: StartupProfiler) -> Dict:
+    """analyze: 分析订单并给出参数建议"""
+    order_analyzer = profiler.load('.order_analyzer')
+    analyzer = order_analyzer.GridOrderAnalyzer(args.capital)
+    analyzer.load_orders(args.csv, use_cache=args.use_cache)
+    return {
+        'symbol': analyzer.symbol,
+        'time_frame': analyzer.time_frame,
+        'orders': len(analyzer.orders_df),
+        'analysis': analyzer.analyze_price_movement(),
+        'suggestions': analyzer.suggest_parameters()
+    }
+
+def run_optimize(args: argparse.Namespace, profiler: StartupProfiler) -> Dict:
+    """optimize: 完整网格搜索, 输出排名靠前的参数"""
+    parameter_optimizer = profiler.load('.parameter_optimizer')
+    ParameterOptimizer = parameter_optimizer.ParameterOptimizer
+    if args.timeframe == 'auto':
+        data_loader = profiler.load('.data_loader')
+        if args.use_cache:
+            orders = profiler.load('.data_cache').OrderDataCache().load(args.csv)
+        else:
+            orders = data_loader.read_order_csv(args.csv)
+        timeframe = data_loader.detect_timeframe(orders['成交时间'])
+        optimizer = ParameterOptimizer(None, timeframe, orders_df=orders,
+                                       use_result_cache=args.use_result_cache)
+    else:
+        optimizer = ParameterOptimizer(args.csv, args.timeframe, use_cache=args.use_cache,
+                                       use_result_cache=args.use_result_cache)
+    results = optimizer.optimize(engine=args.engine, workers=args.workers, prune=not args.no_prune,
+                                 verbose=args.verbose, top_k=args.top, rank_by=args.rank_by,
+                                 result_sink=args.result_sink)
+    return {
+        'symbol': str(optimizer.orders_df['代码'].iloc[0]) if len(optimizer.orders_df) else None,
+        'timeframe': optimizer.timeframe,
+        'combinations': optimizer._count_param_combinations(),
+        'prune_report': optimizer.prune_report,
+        'results': results
+    }
+
+def run_benchmark(args: argparse.Namespace, profiler: StartupProfiler) -> int:
+    """benchmark: 运行 benchmarks/run_benchmarks.py, 其余参数原样传递"""
+    if not os.path.exists(BENCHMARK_SCRIPT):
+        raise FileNotFoundError(f"找不到基准测试脚本: {BENCHMARK_SCRIPT}")
+    started = time.perf_counter()
+    spec = importlib.util.spec_from_file_location('run_benchmarks', BENCHMARK_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    profiler.imports.append(('benchmarks.run_benchmarks', time.perf_counter() - started))
+    arguments = args.benchmark_args
+    if arguments and arguments[0] == '--':
+        arguments = arguments[1:]
+    return module.main(arguments)
+
+def run_config(args: argparse.Namespace, profiler: StartupProfiler) -> int:
+    """config: 检查配置, 可选打印全部配置项"""
+    if args.show:
+        print(_dumps({name: value for name, value in vars(Config).items() if name.isupper()}))
+    problems = Config.validate()
+    for problem in problems:
+        print(f"配置错误: {problem}", file=sys.stderr)
+    if not problems:
+        print("配置有效")
+    return 1 if problems else 0
+
+def run_serve(args: argparse.Namespace, profiler: StartupProfiler) -> int:
+    """serve: 常驻优化服务, 订单数据与优化器保留在内存中"""
+    import asyncio
+    service = profiler.load('.service')
+    if profiler.enabled:
+        print(profiler.report(), file=sys.stderr)
+        profiler.enabled = False
+    workers = args.workers or os.cpu_count() or 1
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix, workers, args.max_datasets,
+                                  args.use_cache, args.preload))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def run_watch(args: argparse.Namespace, profiler: StartupProfiler) -> int:
+    """watch: 监视导出目录, 文件新增或追加后发布更新的参数建议"""
+    import asyncio
+    export_watcher = profiler.load('.export_watcher')
+    if profiler.enabled:
+        print(profiler.report(), file=sys.stderr)
+        profiler.enabled = False
+    write = export_watcher.publish_json(args.output) if args.output else None
+
+    def publish(update: Dict):
+        if write is not None:
+            write(update)
+        best = update['optimization']['results'][:1]
+        print(json.dumps({
+            'file': update['file'],
+            'symbol': update['symbol'],
+            'orders': update['orders'],
+            'new_orders': update['new_orders'],
+            'suggestions': update['suggestions'],
+            'best': best[0] if best else None,
+            'elapsed': round(update['elapsed'], 3)
+        }, ensure_ascii=False, default=to_jsonable), flush=True)
+
+    watcher = export_watcher.ExportWatcher(args.directory, publish, pattern=args.pattern,
+                                           poll_interval=args.poll_interval, debounce=args.debounce,
+                                           max_concurrent=args.max_concurrent, top_k=args.top)
+    try:
+        asyncio.run(watcher.run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--profile-startup', action='store_true',
+                        help='在标准错误输出中报告模块导入与命令耗时')
+
+    parser = argparse.ArgumentParser(prog='python -m src', description='Moomoo 网格策略参数优化工具')
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subparsers.add_parser('analyze', parents=[common], help='分析订单并给出参数建议')
+    analyze.add_argument('csv', help='Moomoo 订单导出CSV')
+    analyze.add_argument('--capital', type=float, default=Config.INITIAL_CAPITAL, help='初始资金')
+    analyze.add_argument('--use-cache', action='store_true', help='使用解析后订单数据的二进制缓存')
+    analyze.add_argument('--cache-output', action='store_true',
+                         help='输入文件与参数不变时直接返回上次的输出')
+
+    optimize = subparsers.add_parser('optimize', parents=[common], help='参数优化')
+    optimize.add_argument('csv', help='Moomoo 订单导出CSV')
+    optimize.add_argument('--timeframe', choices=['auto', 'daily', '30min'], default='auto',
+                          help='参数范围, auto 按成交时间间隔判断 (默认: %(default)s)')
+    optimize.add_argument('--engine', choices=['batch', 'loop', 'event'], default='batch')
+    optimize.add_argument('--workers', type=int, default=1, help='并行进程数, 0 表示使用全部CPU')
+    optimize.add_argument('--top', type=int, default=10, help='输出的结果数量 (默认: %(default)s)')
+    optimize.add_argument('--rank-by', default='profit_ratio', help='排序指标 (默认: %(default)s)')
+    optimize.add_argument('--no-prune', action='store_true', help='不提前终止结果必然无效的回测')
+    optimize.add_argument('--use-cache', action='store_true', help='使用解析后订单数据的二进制缓存')
+    optimize.add_argument('--use-result-cache', action='store_true', help='使用回测结果持久化缓存')
+    optimize.add_argument('--result-sink', help='流式输出全部回测结果 (.jsonl / .csv)')
+    optimize.add_argument('--cache-output', action='store_true',
+                          help='输入文件与参数不变时直接返回上次的输出')
+    optimize.add_argument('--verbose', action='store_true', help='显示进度条与统计信息 (输出到标准错误)')
+
+    benchmark = subparsers.add_parser('benchmark', parents=[common],
+                                      help='合成数据基准测试 (参数见 benchmark -- --help)')
+    benchmark.add_argument('benchmark_args', nargs=argparse.REMAINDER,
+                           help='传递给 benchmarks/run_benchmarks.py 的参数')
+
+    serve = subparsers.add_parser('serve', parents=[common], help='常驻优化服务 (本机HTTP或Unix socket)')
+    serve.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: %(default)s)')
+    serve.add_argument('--port', type=int, default=8765, help='监听端口 (默认: %(default)s)')
+    serve.add_argument('--unix', help='改为监听该 Unix socket')
+    serve.add_argument('--workers', type=int, default=Config.SERVICE_WORKERS,
+                       help='执行请求的线程数, 0 表示使用全部CPU (默认: %(default)s)')
+    serve.add_argument('--max-datasets', type=int, default=Config.SERVICE_MAX_DATASETS,
+                       help='常驻内存的订单文件数量上限 (默认: %(default)s)')
+    serve.add_argument('--use-cache', action='store_true', help='使用解析后订单数据的二进制缓存')
+    serve.add_argument('--preload', nargs='*', default=[], help='启动时预先加载的订单CSV')
+
+    watch = subparsers.add_parser('watch', parents=[common], help='监视导出目录并增量更新参数建议')
+    watch.add_argument('directory', help='Moomoo 订单导出所在目录')
+    watch.add_argument('--output', help='把每个文件的最新结果写入该目录 (<文件名>.json)')
+    watch.add_argument('--pattern', default='*.csv', help='文件名匹配模式 (默认: %(default)s)')
+    watch.add_argument('--poll-interval', type=float, default=Config.WATCH_POLL_INTERVAL,
+                       help='扫描目录的间隔秒数 (默认: %(default)s)')
+    watch.add_argument('--debounce', type=float, default=Config.WATCH_DEBOUNCE,
+                       help='文件保持不变该秒数后才处理 (默认: %(default)s)')
+    watch.add_argument('--max-concurrent', type=int, default=Config.WATCH_MAX_CONCURRENT,
+                       help='同时处理的文件数量上限 (默认: %(default)s)')
+    watch.add_argument('--top', type=int, default=10, help='发布的最优参数组合数量 (默认: %(default)s)')
+
+    config = subparsers.add_parser('config', parents=[common], help='检查配置')
+    config.add_argument('--show', action='store_true', help='打印全部配置项')
+    return parser
+
+# 输出JSON的子命令: 命令名 -> (处理函数, 参与输出缓存键的参数)
+_JSON_COMMANDS: Dict[str, tuple] = {
+    'analyze': (run_analyze, ('capital',)),
+    'optimize': (run_optimize, ('timeframe', 'engine', 'top', 'rank_by', 'no_prune')),
+}
+
+_EXIT_COMMANDS: Dict[str, Callable] = {
+    'benchmark': run_benchmark,
+    'serve': run_serve,
+    'watch': run_watch,
+    'config': run_config,
+}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口, 返回退出码"""
+    args = build_parser().parse_args(argv)
+    profiler = StartupProfiler(args.profile_startup)
+    try:
+        if args.command in _EXIT_COMMANDS:
+            return _EXIT_COMMANDS[args.command](args, profiler)
+
+        handler, key_options = _JSON_COMMANDS[args.command]
+        if getattr(args, 'workers', None) == 0:
+            args.workers = None
+        cache = key = None
+        # 流式输出全部结果时每次都需要真正运行
+        if args.cache_output and not getattr(args, 'result_sink', None):
+            cache = OutputCache()
+            key = cache.key(args.command, args.csv, {name: getattr(args, name) for name in key_options})
+            text = cache.get(key)
+            if text is not None:
+                print(text)
+                return 0
+
+        if getattr(args, 'verbose', False):
+            # 进度与统计信息输出到标准错误, 标准输出只包含JSON
+            stdout, sys.stdout = sys.stdout, sys.stderr
+            try:
+                text = _dumps(handler(args, profiler))
+            finally:
+                sys.stdout = stdout
+        else:
+            text = _dumps(handler(args, profiler))
+        if cache is not None:
+            cache.put(key, text)
+        print(text)
+        return 0
+    except Exception as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if profiler.enabled:
+            print(profiler.report(), file=sys.stderr)
@@ -1,6 +1,9 @@
 # src/config.py - 配置文件
 # moomoo-grid-optimizer/src/config.py
 
+import os
+from typing import List
+
 class Config:
     """配置参数管理"""
     
@@ -35,6 +38,92 @@ class Config:
         'min_win_rate': 0.25         # 最小胜率25%
     }
     
+    # 回测引擎
+    BATCH_SIZE = 512  # 批量回测每批参数组合数量
+    PRUNE_CHECKPOINTS = 32  # 提前终止检查点数量 (价格序列等分的块数)
+    RESULT_CHUNK_SIZE = 16384  # 完整网格搜索时每批回测并汇总的参数组合数量
+    SHARD_SIZE = 16384  # 分片扫描时每个分片的参数组合数量
+    SHARD_LOCK_TIMEOUT = 1800  # 分片锁文件超过该秒数没有更新视为持有者已退出
+    
+    # 常驻优化服务 (python -m src serve)
+    SERVICE_WORKERS = 4  # 执行请求的线程数
+    SERVICE_MAX_DATASETS = 16  # 常驻内存的订单文件数量上限, 超出时淘汰最久未使用的文件
+    SERVICE_BACKTEST_MEMO = 4096  # 每个订单文件保留的最近回测结果数量
+    SERVICE_OPTIMIZE_WORKERS = 4  # 单个 optimize 请求最多使用的回测进程数
+    
+    # 导出目录监视 (python -m src watch)
+    WATCH_POLL_INTERVAL = 0.5  # 扫描目录的间隔 (秒)
+    WATCH_DEBOUNCE = 1.0  # 文件大小与修改时间保持不变该秒数后才处理, 合并连续写入
+    WATCH_MAX_CONCURRENT = 2  # 同时处理的文件数量上限
+    
+    # 分块读取CSV时每块的行数
+    CSV_CHUNK_SIZE = 200000
+    
+    # 数据缓存目录 (可通过环境变量 GRID_OPTIMIZER_CACHE 覆盖)
+    CACHE_DIR = os.environ.get(
+        'GRID_OPTIMIZER_CACHE',
+        os.path.join(os.path.expanduser('~'), '.cache', 'moomoo-grid-optimizer')
+    )
+    
+    # 回测结果缓存大小上限 (MB), 超出时淘汰最久未使用的结果
+    RESULT_CACHE_MAX_MB = 256
+    
+    # 订单分析
+    DEFAULT_GRID_COUNT = {'daily': 5, '30min': 7}  # 建议的网格数量 (参数优化范围的中间值)
+    ROLLING_VOLATILITY_WINDOW = 20  # 滚动波动率使用的最近成交数量
+    
     # 交易相关
     MIN_ORDER_SIZE = 100    # 最小交易数量
-    SIZE_STEP = 100        # 数量步长
\ No newline at end of file
+    SIZE_STEP = 100        # 数量步长
+    MIN_ORDER_QUANTITY = 100   # 建议的单次交易数量下限
+    MAX_ORDER_QUANTITY = 1000  # 建议的单次交易数量上限
+    
+    @classmethod
+    def validate(cls) -> List[str]:
+        """
+        检查配置取值 (只使用标准库, 不导入 pandas/numpy)
+
+        Returns:
+            List[str]: 问题描述, 为空表示配置有效
+        """
+        problems = []
+
+        def check(condition: bool, message: str):
+            if not condition:
+                problems.append(message)
+
+        check(cls.INITIAL_CAPITAL > 0, "INITIAL_CAPITAL 必须为正数")
+        for name in ('MAX_CAPITAL_USAGE', 'SINGLE_GRID_MAX_RATIO'):
+            check(0 < getattr(cls, name) <= 1, f"{name} 必须在 (0, 1] 之间")
+
+        for timeframe, params in cls.GRID_PARAMS.items():
+            check(len(params['grid_counts']) > 0 and all(count > 0 for count in params['grid_counts']),
+                  f"GRID_PARAMS['{timeframe}']['grid_counts'] 必须为非空的正整数序列")
+            for name in ('deviation_ratios', 'profit_ratios', 'position_steps'):
+                check(len(params[name]) > 0 and all(0 < value < 1 for value in params[name]),
+                      f"GRID_PARAMS['{timeframe}']['{name}'] 必须为 (0, 1) 之间的非空序列")
+            check(0 < params['position_limit_ratio'] <= 1,
+                  f"GRID_PARAMS['{timeframe}']['position_limit_ratio'] 必须在 (0, 1] 之间")
+
+        metrics = cls.BACKTEST_METRICS
+        check(0 < metrics['max_drawdown'] <= 1, "BACKTEST_METRICS['max_drawdown'] 必须在 (0, 1] 之间")
+        check(0 <= metrics['min_win_rate'] <= 1, "BACKTEST_METRICS['min_win_rate'] 必须在 [0, 1] 之间")
+        check(metrics['min_trade_count'] >= 0, "BACKTEST_METRICS['min_trade_count'] 不能为负数")
+
+        for name in ('BATCH_SIZE', 'PRUNE_CHECKPOINTS', 'RESULT_CHUNK_SIZE', 'SHARD_SIZE',
+                     'SHARD_LOCK_TIMEOUT', 'CSV_CHUNK_SIZE', 'RESULT_CACHE_MAX_MB',
+                     'ROLLING_VOLATILITY_WINDOW', 'SERVICE_WORKERS', 'SERVICE_MAX_DATASETS',
+                     'SERVICE_BACKTEST_MEMO', 'SERVICE_OPTIMIZE_WORKERS', 'WATCH_POLL_INTERVAL', 'WATCH_MAX_CONCURRENT'):
+            check(getattr(cls, name) > 0, f"{name} 必须为正数")
+        check(cls.WATCH_DEBOUNCE >= 0, "WATCH_DEBOUNCE 不能为负数")
+        check(set(cls.DEFAULT_GRID_COUNT) >= {'daily', '30min'},
+              "DEFAULT_GRID_COUNT 必须包含 daily 与 30min")
+        check(0 < cls.MIN_ORDER_QUANTITY <= cls.MAX_ORDER_QUANTITY,
+              "MIN_ORDER_QUANTITY 必须为正数且不大于 MAX_ORDER_QUANTITY")
+
+        # 缓存目录不存在时检查最近的已存在上级目录是否可写
+        directory = cls.CACHE_DIR
+        while not os.path.exists(directory) and os.path.dirname(directory) != directory:
+            directory = os.path.dirname(directory)
+        check(os.access(directory, os.W_OK), f"缓存目录不可写: {cls.CACHE_DIR}")
+        return problems
@@ -0,0 +1,87 @@
+# src/crossing_index.py
+# moomoo-grid-optimizer/src/crossing_index.py
+
+from typing import Callable, List
+import numpy as np
+
+class CrossingIndex:
+    """
+    价格穿越索引
+
+    对价格数组逐层计算分块最小值/最大值, 用来快速查找
+    "从某个位置开始, 价格第一次不高于(或不低于)某个价格" 的位置。
+    每次查询只需检查各层中不超过一个分块的数据, 复杂度约为 O(B * log_B N)。
+    """
+
+    BLOCK_SIZE = 64
+
+    def __init__(self, prices: np.ndarray):
+        """
+        构建穿越索引
+
+        Args:
+            prices: 按时间排序的价格数组
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        self.length = len(prices)
+        self._min_levels = self._build_levels(prices, np.minimum)
+        self._max_levels = self._build_levels(prices, np.maximum)
+
+    def _build_levels(self, prices: np.ndarray, reducer: np.ufunc) -> List[np.ndarray]:
+        """逐层按块归约, 直到最高层不超过一个分块"""
+        levels = [prices]
+        while len(levels[-1]) > self.BLOCK_SIZE:
+            current = levels[-1]
+            levels.append(reducer.reduceat(current, np.arange(0, len(current), self.BLOCK_SIZE)))
+        return levels
+
+    def next_at_or_below(self, start: int, threshold: float) -> int:
+        """
+        从 start 开始第一个价格 <= threshold 的位置
+
+        Returns:
+            int: 位置下标, 不存在时返回价格数组长度
+        """
+        return self._search(self._min_levels, start, lambda values: values <= threshold)
+
+    def next_at_or_above(self, start: int, threshold: float) -> int:
+        """
+        从 start 开始第一个价格 >= threshold 的位置
+
+        Returns:
+            int: 位置下标, 不存在时返回价格数组长度
+        """
+        return self._search(self._max_levels, start, lambda values: values >= threshold)
+
+    def _search(self, levels: List[np.ndarray], start: int,
+                matches: Callable[[np.ndarray], np.ndarray]) -> int:
+        """先逐层向上找到包含目标的分块, 再逐层向下定位到具体位置"""
+        if start >= self.length:
+            return self.length
+
+        block = self.BLOCK_SIZE
+        depth, pos = 0, start
+        while True:
+            values = levels[depth]
+            end = len(values) if depth == len(levels) - 1 else min(len(values), (pos // block + 1) * block)
+            hit = self._first_match(matches(values[pos:end]))
+            if hit >= 0:
+                pos += hit
+                break
+            if end >= len(values):
+                return self.length
+            depth, pos = depth + 1, end // block
+
+        while depth > 0:
+            depth -= 1
+            lo = pos * block
+            pos = lo + self._first_match(matches(levels[depth][lo:lo + block]))
+        return pos
+
+    @staticmethod
+    def _first_match(mask: np.ndarray) -> int:
+        """布尔数组中第一个True的下标, 没有时返回-1"""
+        if len(mask) == 0:
+            return -1
+        index = int(mask.argmax())
+        return index if mask[index] else -1
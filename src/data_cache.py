@@ -0,0 +1,201 @@
+# src/data_cache.py
+# moomoo-grid-optimizer/src/data_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from .config import Config
+from .data_loader import ORDER_COLUMNS, read_order_csv_chunked
+
+# 缓存格式版本, 修改列布局或清洗规则时递增, 使旧缓存自动失效
+CACHE_FORMAT_VERSION = 1
+
+# 数值列与字符串列的存储方式
+_NUMERIC_COLUMNS = {'成交数量': np.float64, '成交价格': np.float64}
+_CATEGORY_COLUMNS = ['代码', '方向', '交易状态']
+
+# 与其他进程同时写入同一缓存时的最多写入次数
+_WRITE_ATTEMPTS = 3
+
+def file_content_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class OrderDataCache:
+    """
+    订单数据二进制列式缓存
+
+    每个CSV文件对应缓存目录下的一个子目录, 清洗后的各列分别保存为 .npy,
+    读取时以内存映射方式打开。缓存以文件路径为键, 并记录文件大小、
+    修改时间与内容哈希: 大小和修改时间不变时直接命中; 有变化时重新计算
+    内容哈希, 内容确实改变才重新解析CSV。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录, 默认为 Config.CACHE_DIR
+        """
+        self.cache_dir = cache_dir or Config.CACHE_DIR
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, csv_path: str) -> pd.DataFrame:
+        """
+        读取订单数据, 缓存有效时直接从缓存加载
+
+        Args:
+            csv_path: CSV文件路径
+
+        Returns:
+            pd.DataFrame: 清洗后的订单数据 (只包含 ORDER_COLUMNS,
+                          代码/方向/交易状态 为分类类型)
+        """
+        csv_path = os.path.abspath(csv_path)
+        entry_dir = self._entry_dir(csv_path)
+        stat = os.stat(csv_path)
+
+        entry = self._load_fresh(entry_dir, csv_path, stat)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        df = read_order_csv_chunked(csv_path)
+        for _ in range(_WRITE_ATTEMPTS):
+            self._write_entry(entry_dir, csv_path, stat, df)
+            # 其他进程可能同时写入同一缓存 (本次替换失败, 或刚写入的缓存被替换):
+            # 磁盘上的缓存有效时直接使用, 否则重新写入
+            entry = self._load_fresh(entry_dir, csv_path, stat)
+            if entry is not None:
+                return entry
+        raise OSError(f"缓存写入冲突, 重试 {_WRITE_ATTEMPTS} 次后仍未完成: {entry_dir}")
+
+    def invalidate(self, csv_path: str):
+        """删除指定文件的缓存"""
+        shutil.rmtree(self._entry_dir(os.path.abspath(csv_path)), ignore_errors=True)
+
+    def _entry_dir(self, csv_path: str) -> str:
+        """缓存子目录 (以绝对路径的哈希命名)"""
+        key = hashlib.sha1(csv_path.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
+    def _load_fresh(self, entry_dir: str, csv_path: str, stat: os.stat_result):
+        """
+        读取有效的缓存, 没有有效缓存时返回 None
+
+        其他进程正在替换同一缓存 (旧目录已被删除) 时同样返回 None。
+        """
+        manifest = self._read_manifest(entry_dir)
+        if manifest is None:
+            return None
+        try:
+            if not self._is_fresh(manifest, csv_path, stat):
+                return None
+            return self._load_entry(entry_dir, manifest)
+        except FileNotFoundError:
+            return None
+
+    def _read_manifest(self, entry_dir: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(entry_dir, 'manifest.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_fresh(self, manifest: Dict, csv_path: str, stat: os.stat_result) -> bool:
+        """检查缓存是否与当前文件一致"""
+        if manifest.get('version') != CACHE_FORMAT_VERSION or manifest.get('source') != csv_path:
+            return False
+        if manifest['size'] == stat.st_size and manifest['mtime_ns'] == stat.st_mtime_ns:
+            return True
+
+        # 大小或修改时间变化 (例如文件被重新复制), 内容未变时仍可复用
+        if manifest['size'] != stat.st_size or manifest['sha256'] != file_content_hash(csv_path):
+            return False
+        manifest['mtime_ns'] = stat.st_mtime_ns
+        self._save_manifest(self._entry_dir(csv_path), manifest)
+        return True
+
+    def _load_entry(self, entry_dir: str, manifest: Dict) -> pd.DataFrame:
+        """以内存映射方式读取缓存的各列"""
+        columns = {}
+        for name in ORDER_COLUMNS:
+            file_name = manifest['files'][name]
+            values = np.load(os.path.join(entry_dir, file_name), mmap_mode='r')
+            if name in _CATEGORY_COLUMNS:
+                columns[name] = pd.Categorical.from_codes(
+                    np.asarray(values), categories=manifest['categories'][name]
+                )
+            elif name == '成交时间':
+                columns[name] = values.view('datetime64[ns]')
+            else:
+                columns[name] = values
+        return pd.DataFrame(columns, copy=False)
+
+    def _write_entry(self, entry_dir: str, csv_path: str, stat: os.stat_result, df: pd.DataFrame):
+        """写入缓存: 先写临时目录, 完成后再替换, 避免读到写了一半的缓存"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        manifest = {
+            'version': CACHE_FORMAT_VERSION,
+            'source': csv_path,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_content_hash(csv_path),
+            'rows': len(df),
+            'files': {},
+            'categories': {}
+        }
+        try:
+            for index, name in enumerate(ORDER_COLUMNS):
+                file_name = f'col{index}.npy'
+                if name in _CATEGORY_COLUMNS:
+                    categorical = pd.Categorical(df[name])
+                    values = categorical.codes.astype(np.int32)
+                    manifest['categories'][name] = categorical.categories.tolist()
+                elif name == '成交时间':
+                    values = df[name].to_numpy(dtype='datetime64[ns]').view(np.int64)
+                else:
+                    values = df[name].to_numpy(dtype=_NUMERIC_COLUMNS[name])
+                np.save(os.path.join(tmp_dir, file_name), values)
+                manifest['files'][name] = file_name
+            self._save_manifest(tmp_dir, manifest)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self._publish_entry(tmp_dir, entry_dir)
+
+    def _publish_entry(self, tmp_dir: str, entry_dir: str):
+        """
+        用写好的临时目录替换缓存目录
+
+        其他进程在删除旧目录与替换之间写入了同一缓存时, 替换会失败
+        (目标目录非空); 此时删除临时目录, 由 load 检查对方写入的缓存。
+
+        Args:
+            tmp_dir: 写好的临时目录
+            entry_dir: 缓存目录
+        """
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _save_manifest(self, entry_dir: str, manifest: Dict):
+        path = os.path.join(entry_dir, 'manifest.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
@@ -0,0 +1,158 @@
+# src/data_loader.py
+# moomoo-grid-optimizer/src/data_loader.py
+
+import csv
+from typing import BinaryIO, Iterator, List, Optional, Union
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from .config import Config
+
+# Moomoo 订单导出中常见的成交时间格式 (日线带秒, 分钟线不带秒)
+TIME_FORMATS = ['%Y/%m/%d %H:%M:%S', '%Y/%m/%d %H:%M']
+
+# 分析器与回测引擎实际使用的列
+ORDER_COLUMNS = ['代码', '方向', '交易状态', '成交数量', '成交价格', '成交时间']
+
+# 分块读取时按分类类型存储的低基数字符串列
+CATEGORY_COLUMNS = ['代码', '方向', '交易状态']
+
+def parse_trade_times(times: pd.Series, time_format: Optional[str] = None) -> pd.Series:
+    """
+    解析成交时间列
+
+    Args:
+        times: 原始成交时间字符串
+        time_format: 时间格式, 为None时依次尝试 TIME_FORMATS
+
+    Returns:
+        pd.Series: datetime64 类型的成交时间
+    """
+    times = times.astype('string').str.strip()
+    if time_format is not None:
+        return pd.to_datetime(times, format=time_format)
+
+    for candidate in TIME_FORMATS:
+        try:
+            return pd.to_datetime(times, format=candidate)
+        except ValueError:
+            continue
+    return pd.to_datetime(times, format='mixed')
+
+def detect_timeframe(times: pd.Series) -> str:
+    """
+    按成交时间间隔的中位数判断时间周期
+
+    Args:
+        times: 成交时间
+
+    Returns:
+        str: 间隔不小于一天为 'daily', 否则为 '30min'
+    """
+    median_diff = times.dropna().sort_values().diff().dropna().median()
+    if pd.notna(median_diff) and median_diff.total_seconds() >= 24 * 3600:
+        return 'daily'
+    return '30min'
+
+def read_order_csv(csv_path: Union[str, BinaryIO], time_format: Optional[str] = None) -> pd.DataFrame:
+    """
+    读取并清洗 Moomoo 订单导出CSV
+
+    依次尝试 QUOTE_MINIMAL 与 QUOTE_ALL 两种格式, 解析成交时间,
+    把成交数量/成交价格转换为数值, 并只保留 全部成交 的订单。
+
+    Args:
+        csv_path: CSV文件路径, 或可以重新定位的二进制文件对象 (例如表头加新增行的 BytesIO)
+        time_format: 成交时间格式, 为None时自动识别
+
+    Returns:
+        pd.DataFrame: 清洗后的订单数据
+    """
+    try:
+        df = pd.read_csv(csv_path, quoting=csv.QUOTE_MINIMAL)
+    except Exception:
+        if hasattr(csv_path, 'seek'):
+            csv_path.seek(0)
+        df = pd.read_csv(csv_path, quoting=csv.QUOTE_ALL)
+
+    df['成交时间'] = parse_trade_times(df['成交时间'], time_format)
+    df['成交价格'] = pd.to_numeric(df['成交价格'], errors='coerce')
+    df['成交数量'] = pd.to_numeric(df['成交数量'], errors='coerce')
+
+    return df[df['交易状态'] == '全部成交']
+
+def iter_order_chunks(csv_path: str, chunksize: Optional[int] = None,
+                      time_format: Optional[str] = None,
+                      price_dtype: type = np.float64) -> Iterator[pd.DataFrame]:
+    """
+    分块读取 Moomoo 订单导出CSV
+
+    只读取 ORDER_COLUMNS, 每块单独完成时间解析、数值转换与 全部成交 过滤,
+    峰值内存只与保留的列和分块大小有关, 与原始文件大小无关。
+
+    Args:
+        csv_path: CSV文件路径
+        chunksize: 每块行数, 默认为 Config.CSV_CHUNK_SIZE
+        time_format: 成交时间格式, 为None时自动识别
+        price_dtype: 成交价格的数据类型 (np.float64 或 np.float32)
+
+    Yields:
+        pd.DataFrame: 清洗后的订单数据块, 代码/方向/交易状态 为分类类型
+    """
+    chunksize = chunksize or Config.CSV_CHUNK_SIZE
+    dtype = {name: 'category' for name in CATEGORY_COLUMNS}
+    dtype.update({'成交数量': str, '成交价格': str, '成交时间': str})
+
+    started = False
+    for quoting in (csv.QUOTE_MINIMAL, csv.QUOTE_ALL):
+        try:
+            reader = pd.read_csv(csv_path, usecols=ORDER_COLUMNS, dtype=dtype,
+                                 chunksize=chunksize, quoting=quoting)
+            for chunk in reader:
+                started = True
+                yield _clean_chunk(chunk, time_format, price_dtype)
+            return
+        except Exception:
+            # 已经输出过数据块时无法安全重试
+            if started or quoting == csv.QUOTE_ALL:
+                raise
+
+def _clean_chunk(chunk: pd.DataFrame, time_format: Optional[str], price_dtype: type) -> pd.DataFrame:
+    """清洗一个数据块"""
+    chunk = chunk[chunk['交易状态'] == '全部成交'].copy()
+    chunk['成交时间'] = parse_trade_times(chunk['成交时间'], time_format)
+    chunk['成交价格'] = pd.to_numeric(chunk['成交价格'], errors='coerce').astype(price_dtype)
+    chunk['成交数量'] = pd.to_numeric(chunk['成交数量'], errors='coerce').astype(np.float64)
+    return chunk[ORDER_COLUMNS]
+
+def concat_order_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    合并订单数据块, 分类列合并类别后保持分类类型
+
+    Args:
+        chunks: iter_order_chunks 输出的数据块
+    """
+    if not chunks:
+        return pd.DataFrame({name: pd.Series(dtype=object) for name in ORDER_COLUMNS})
+
+    columns = {}
+    for name in ORDER_COLUMNS:
+        if name in CATEGORY_COLUMNS:
+            columns[name] = union_categoricals([chunk[name] for chunk in chunks])
+        else:
+            columns[name] = np.concatenate([chunk[name].to_numpy() for chunk in chunks])
+    return pd.DataFrame(columns)
+
+def read_order_csv_chunked(csv_path: str, chunksize: Optional[int] = None,
+                           time_format: Optional[str] = None,
+                           price_dtype: type = np.float64) -> pd.DataFrame:
+    """
+    以分块方式读取并清洗订单CSV, 结果只包含 ORDER_COLUMNS
+
+    Args:
+        csv_path: CSV文件路径
+        chunksize: 每块行数, 默认为 Config.CSV_CHUNK_SIZE
+        time_format: 成交时间格式, 为None时自动识别
+        price_dtype: 成交价格的数据类型 (np.float64 或 np.float32)
+    """
+    return concat_order_chunks(list(iter_order_chunks(csv_path, chunksize, time_format, price_dtype)))
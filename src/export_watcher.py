@@ -0,0 +1,326 @@
+# src/export_watcher.py
+# moomoo-grid-optimizer/src/export_watcher.py
+
+import asyncio
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+import pandas as pd
+from .config import Config
+from .data_loader import read_order_csv
+from .incremental_sweep import IncrementalSweep
+from .market_data import AppendablePriceSeries, PriceSeries
+from .order_analyzer import GridOrderAnalyzer
+from .parameter_optimizer import ParameterOptimizer
+from .result_collector import to_jsonable
+
+# 判断文件是否被整体改写时比较的文件开头字节数
+_HEAD_BYTES = 4096
+
+class ExportTail:
+    """
+    持续追加的订单导出文件的读取位置
+
+    只解析上次读取位置之后的完整行 (以换行结尾), 正在写入的半行留到下次读取。
+    文件变短、被替换为新文件, 或开头/最后一个已读行的内容发生变化时,
+    视为整体改写, 从头重新读取。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0          # 已解析到的字节位置 (总是位于行首)
+        self.header = b''        # 表头行 (包括 BOM 与换行)
+        self._identity = None    # (设备号, inode)
+        self._head = b''         # 文件开头的字节
+        self._last_line = b''    # 最后一个已解析的行
+
+    def read_new_rows(self) -> Tuple[Optional[pd.DataFrame], bool]:
+        """
+        解析新增的行
+
+        Returns:
+            Tuple[Optional[pd.DataFrame], bool]: (新增的订单, 没有完整新行时为 None;
+                                                  是否从头重新读取了整个文件)
+        """
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            reset = self._is_rewritten(f, stat)
+            if reset:
+                self.offset = 0
+                self.header = b''
+                self._head = b''
+                self._last_line = b''
+                self._identity = (stat.st_dev, stat.st_ino)
+            f.seek(self.offset)
+            data = f.read(max(0, stat.st_size - self.offset))
+
+        # 只处理完整的行
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return None, reset
+        data = data[:end]
+        if not self.header:
+            header_end = data.find(b'\n') + 1
+            self.header = data[:header_end]
+            self._head = data[:_HEAD_BYTES]
+            data = data[header_end:]
+            self.offset = header_end
+        if data.strip():
+            self._last_line = data[data.rfind(b'\n', 0, len(data) - 1) + 1:]
+        self.offset += len(data)
+        if not data.strip():
+            return None, reset
+        return read_order_csv(io.BytesIO(self.header + data)), reset
+
+    def _is_rewritten(self, f, stat: os.stat_result) -> bool:
+        if self._identity != (stat.st_dev, stat.st_ino) or stat.st_size < self.offset:
+            return True
+        if self._head:
+            f.seek(0)
+            if f.read(len(self._head)) != self._head:
+                return True
+        if self._last_line:
+            f.seek(self.offset - len(self._last_line))
+            if f.read(len(self._last_line)) != self._last_line:
+                return True
+        return False
+
+class WatchedExport:
+    """
+    一个被监视的导出文件: 读取位置、增量更新的分析器与增量回放检查点
+
+    文件只是追加时, 分析器保存新增的数据块, 价格序列由新增订单扩展,
+    增量回放只处理新增的价格点, 每次更新的开销与新增行数成正比。
+    """
+
+    def __init__(self, path: str, checkpoint_root: str, top_k: int = 10):
+        self.path = path
+        self.tail = ExportTail(path)
+        self.analyzer = GridOrderAnalyzer()
+        self.prices = AppendablePriceSeries()
+        self._anchored = False  # 检查点是否已按当前文件内容核对 (从头读取后需要重新核对)
+        self.top_k = top_k
+        key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        self.checkpoint_dir = os.path.join(checkpoint_root, key)
+
+    def update(self) -> Optional[Dict]:
+        """
+        解析新增的行并更新统计、参数建议与增量回测
+
+        Returns:
+            Optional[Dict]: 更新后的结果, 没有新增订单时为 None
+        """
+        started = time.perf_counter()
+        new_orders, reset = self.tail.read_new_rows()
+        # 首次读取之外的整体重读 (文件被改写或替换)
+        reloaded = reset and self.analyzer.order_count > 0
+        if reset:
+            self.analyzer = GridOrderAnalyzer()
+            self.prices = AppendablePriceSeries()
+            self._anchored = False
+            if reloaded:
+                # 旧检查点的网格中心价格与参数组合不再适用
+                shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+        if new_orders is None or new_orders.empty:
+            return None
+        self.analyzer.add_orders(new_orders)
+        analyzer = self.analyzer
+        appended = self.prices.add_orders(new_orders[
+            (new_orders['成交价格'].notna()) &
+            (new_orders['成交数量'].notna())
+        ])
+
+        # 网格回测从检查点继续, 只回放新增的价格点
+        if not self._anchored or not appended:
+            # 从头读取, 或新增订单早于已有数据 (已回放部分的顺序变化): 按全部订单重新锚定
+            optimizer = ParameterOptimizer(None, analyzer.time_frame, orders_df=analyzer.orders_df)
+            self._discard_stale_checkpoint(optimizer.price_series, not appended)
+        else:
+            optimizer = ParameterOptimizer(None, analyzer.time_frame, price_series=self.prices.series)
+        results = optimizer.optimize(checkpoint_dir=self.checkpoint_dir, verbose=False,
+                                     top_k=self.top_k)
+        self._anchored = True
+        return {
+            'file': self.path,
+            'symbol': str(analyzer.symbol),
+            'time_frame': analyzer.time_frame,
+            'orders': analyzer.order_count,
+            'new_orders': len(new_orders),
+            'reloaded': reloaded,
+            'analysis': analyzer.analyze_price_movement(),
+            'suggestions': analyzer.suggest_parameters(),
+            'optimization': {
+                'incremental': optimizer.incremental_report,
+                'results': results
+            },
+            'elapsed': time.perf_counter() - started,
+            'updated_at': time.time()
+        }
+
+    def _discard_stale_checkpoint(self, series: PriceSeries, changed: bool):
+        """
+        新进程首次读取, 或新增订单插入到已有数据之前时, 删除与当前数据不符的检查点
+
+        IncrementalSweep 在已回放部分变化时只会改为完整回放, 仍沿用旧的
+        网格中心价格与参数组合; 删除检查点后按当前数据重新锚定。
+        """
+        sweep = IncrementalSweep(self.checkpoint_dir)
+        if sweep.manifest is not None and (changed or not sweep.matches(series)):
+            shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+def publish_json(output_dir: str) -> Callable[[Dict], None]:
+    """
+    把每次更新写入 output_dir/<文件名>.json (先写临时文件再替换)
+
+    Args:
+        output_dir: 输出目录
+    """
+    def publish(update: Dict):
+        os.makedirs(output_dir, exist_ok=True)
+        name = os.path.splitext(os.path.basename(update['file']))[0] + '.json'
+        path = os.path.join(output_dir, name)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(update, f, ensure_ascii=False, indent=2, default=to_jsonable)
+        os.replace(path + '.tmp', path)
+    return publish
+
+class ExportWatcher:
+    """
+    监视导出目录, 文件新增或追加后增量更新分析与回测
+
+    定期扫描目录 (只比较文件大小与修改时间, 不依赖平台相关的文件通知),
+    文件在 debounce 秒内没有再变化时才处理, 连续写入只触发一次更新。
+    待处理的文件放入队列 (同一文件不重复排队), 由 max_concurrent 个任务
+    在线程池中处理, 一次涌入大量文件时也只有固定数量的文件同时解析。
+    """
+
+    def __init__(self, directory: str, publish: Callable[[Dict], None],
+                 pattern: str = '*.csv', poll_interval: float = Config.WATCH_POLL_INTERVAL,
+                 debounce: float = Config.WATCH_DEBOUNCE,
+                 max_concurrent: int = Config.WATCH_MAX_CONCURRENT,
+                 checkpoint_root: Optional[str] = None, top_k: int = 10):
+        """
+        初始化监视器
+
+        Args:
+            directory: 导出目录
+            publish: 每次更新后调用, 参数为 WatchedExport.update 的结果
+            pattern: 文件名匹配模式
+            poll_interval: 扫描目录的间隔 (秒)
+            debounce: 文件保持不变该秒数后才处理
+            max_concurrent: 同时处理的文件数量上限
+            checkpoint_root: 增量回放检查点目录, 默认为 Config.CACHE_DIR/watch
+            top_k: 每次更新发布的最优参数组合数量
+        """
+        self.directory = directory
+        self.publish = publish
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.max_concurrent = max_concurrent
+        self.checkpoint_root = checkpoint_root or os.path.join(Config.CACHE_DIR, 'watch')
+        self.top_k = top_k
+        self.exports: Dict[str, WatchedExport] = {}
+        self.errors: Dict[str, str] = {}
+        self.updates = 0
+        self._seen: Dict[str, Tuple[int, int]] = {}       # 最近一次扫描到的 (大小, 修改时间)
+        self._changed_at: Dict[str, float] = {}           # 尚未处理的文件最后一次变化的时间
+        self._processed: Dict[str, Tuple[int, int]] = {}  # 已处理 (或已排队) 时的 (大小, 修改时间)
+        self._queued = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """当前目录中匹配的文件 -> (大小, 修改时间)"""
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def poll(self, files: Dict[str, Tuple[int, int]], now: float):
+        """
+        根据一次扫描结果更新去抖状态, 把已稳定的文件放入队列
+
+        Args:
+            files: scan 的结果
+            now: 当前时间 (time.monotonic)
+        """
+        for path in set(self._seen) - set(files):
+            # 文件被删除: 丢弃读取状态, 重新出现时从头读取
+            self._changed_at.pop(path, None)
+            self._processed.pop(path, None)
+            self.exports.pop(path, None)
+        for path, key in files.items():
+            if self._seen.get(path) != key:
+                self._changed_at[path] = now
+            elif (path in self._changed_at and now - self._changed_at[path] >= self.debounce
+                  and path not in self._queued):
+                del self._changed_at[path]
+                if self._processed.get(path) != key:
+                    self._processed[path] = key
+                    self._queued.add(path)
+                    self._queue.put_nowait(path)
+        self._seen = files
+
+    def process(self, path: str) -> Optional[Dict]:
+        """在工作线程中处理一个文件 (同一文件不会同时处理)"""
+        export = self.exports.get(path)
+        if export is None:
+            export = self.exports[path] = WatchedExport(path, self.checkpoint_root, self.top_k)
+        return export.update()
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """
+        持续监视, 直到 stop 被设置 (或任务被取消)
+
+        Args:
+            stop: 停止信号
+        """
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                            thread_name_prefix='export-watcher')
+        workers = [asyncio.ensure_future(self._work(loop)) for _ in range(self.max_concurrent)]
+        stop = stop or asyncio.Event()
+        try:
+            while not stop.is_set():
+                files = await loop.run_in_executor(None, self.scan)
+                self.poll(files, time.monotonic())
+                try:
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._executor.shutdown(wait=True)
+
+    async def _work(self, loop: asyncio.AbstractEventLoop):
+        while True:
+            path = await self._queue.get()
+            try:
+                update = await loop.run_in_executor(self._executor, self.process, path)
+                self.errors.pop(path, None)
+                if update is not None:
+                    self.updates += 1
+                    self.publish(update)
+            except Exception as e:
+                # 解析失败 (例如文件写到一半的格式错误) 时等待文件再次变化后重试
+                self.errors[path] = f"{type(e).__name__}: {e}"
+                self._processed.pop(path, None)
+                self.exports.pop(path, None)
+            finally:
+                self._queued.discard(path)
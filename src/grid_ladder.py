@@ -0,0 +1,129 @@
+# src/grid_ladder.py
+# moomoo-grid-optimizer/src/grid_ladder.py
+
+from bisect import bisect_left, bisect_right
+from typing import List, Optional
+import numpy as np
+
+# 候选区间/触发价格的相对容差: 用阈值查找时略微放宽边界,
+# 再对候选档位逐个做精确判断, 避免浮点舍入导致漏掉边界档位
+TRIGGER_TOLERANCE = 1e-9
+
+def build_grid_levels(center_price: float, grid_count: int, deviation: float) -> List[float]:
+    """
+    生成网格价格 (从低到高)
+
+    Args:
+        center_price: 网格中心价格
+        grid_count: 网格数量
+        deviation: 相邻网格的价格偏差比例
+
+    Returns:
+        List[float]: 保留两位小数的网格价格
+    """
+    half_grids = grid_count // 2
+    return [
+        round(center_price * (1 + i * deviation), 2)
+        for i in range(-half_grids, half_grids + 1)
+    ]
+
+class GridLadder:
+    """
+    网格价格阶梯
+
+    网格价格与止盈价格存放在有序NumPy数组中, 持仓按整数档位索引,
+    即使两个网格四舍五入后价格相同也不会互相覆盖。
+    每个价格点只需二分查找出可能触发的档位区间, 而不用扫描全部网格。
+    """
+
+    def __init__(self, center_price: float, grid_count: int, deviation: float,
+                 profit_ratio: float, position_limit: int):
+        """
+        初始化网格阶梯
+
+        Args:
+            center_price: 网格中心价格
+            grid_count: 网格数量
+            deviation: 相邻网格的价格偏差比例
+            profit_ratio: 止盈比例
+            position_limit: 单个网格的持仓上限
+        """
+        self.levels = np.array(build_grid_levels(center_price, grid_count, deviation), dtype=np.float64)
+        self.take_profit_prices = self.levels * (1 + profit_ratio)
+        self.profit_ratio = profit_ratio
+        self.position_limit = position_limit
+        self.positions = np.zeros(len(self.levels), dtype=np.int64)
+
+        # 二分查找使用的Python列表副本, 避免每个价格点都把标量转换为NumPy类型
+        self._level_list = self.levels.tolist()
+        self._take_profit_list = self.take_profit_prices.tolist()
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def buy_candidates(self, price: float) -> range:
+        """
+        价格不高于网格价格的档位区间 (从低到高)
+
+        Args:
+            price: 当前价格
+
+        Returns:
+            range: 满足 price <= 网格价格 的档位
+        """
+        return range(bisect_left(self._level_list, price), len(self._level_list))
+
+    def sell_candidates(self, price: float) -> range:
+        """
+        可能达到止盈条件的档位区间 (从低到高)
+
+        区间只用于缩小检查范围, 调用方仍需用 is_take_profit 精确判断。
+
+        Args:
+            price: 当前价格
+
+        Returns:
+            range: 止盈价格不高于当前价格 (含容差) 的档位
+        """
+        return range(bisect_right(self._take_profit_list, price * (1 + TRIGGER_TOLERANCE)))
+
+    def level_price(self, level: int) -> float:
+        """档位对应的网格价格"""
+        return self._level_list[level]
+
+    def is_take_profit(self, level: int, price: float) -> bool:
+        """按网格价格计算的收益率是否达到止盈比例"""
+        grid_price = self._level_list[level]
+        return (price - grid_price) / grid_price >= self.profit_ratio
+
+    def buy_trigger_price(self, cash: float, order_quantity: int) -> Optional[float]:
+        """
+        可能触发买入的最高价格
+
+        只有持仓未满的档位才能买入, 且单笔成本不能超过可用资金,
+        价格高于该值的价格点一定不会产生买入。
+
+        Args:
+            cash: 可用资金
+            order_quantity: 单笔买入数量
+
+        Returns:
+            Optional[float]: 触发价格, 没有可买入档位时为None
+        """
+        open_levels = self.levels[self.positions < self.position_limit]
+        if len(open_levels) == 0:
+            return None
+        affordable = cash / order_quantity * (1 + TRIGGER_TOLERANCE)
+        return min(float(open_levels[-1]), affordable)
+
+    def sell_trigger_price(self) -> Optional[float]:
+        """
+        可能触发卖出的最低价格 (持仓档位中最低的止盈价格, 含容差)
+
+        Returns:
+            Optional[float]: 触发价格, 没有持仓时为None
+        """
+        held = self.take_profit_prices[self.positions > 0]
+        if len(held) == 0:
+            return None
+        return float(held.min()) * (1 - TRIGGER_TOLERANCE)
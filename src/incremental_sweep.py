@@ -0,0 +1,185 @@
+# src/incremental_sweep.py
+# moomoo-grid-optimizer/src/incremental_sweep.py
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+import numpy as np
+from .batch_engine import BatchGridBacktester
+from .market_data import PriceSeries
+from .search_strategies import param_key
+
+# 检查点格式版本, 修改状态布局时递增
+SWEEP_FORMAT_VERSION = 2
+
+# 检查已回放部分是否变化时比较的价格点数量 (已回放部分的最后若干个)
+CHECK_WINDOW = 1024
+
+def window_hash(series: PriceSeries, stop: int, window: Optional[int] = None) -> str:
+    """价格序列第 stop 个价格点之前最后 window (默认 CHECK_WINDOW) 个价格点 (价格与时间) 的内容哈希"""
+    start = max(0, stop - (window or CHECK_WINDOW))
+    digest = hashlib.sha256()
+    digest.update(series.prices[start:stop].tobytes())
+    digest.update(series.times[start:stop].tobytes())
+    return digest.hexdigest()
+
+class IncrementalSweep:
+    """
+    参数扫描的增量回放
+
+    为每个参数组合保存批量回测的状态 (现金、持仓、成交计数、权益峰值与回撤),
+    订单数据追加后只回放新增的价格点, 每次刷新的开销与新增数据量成正比。
+
+    网格中心价格在第一次回放时确定并固定下来 (锚定), 之后不随新数据的
+    平均价格变化, 结果与用该中心价格完整回放全部数据相同。检查点只保存
+    已回放部分最后 CHECK_WINDOW 个价格点的哈希与已回放数量, 这部分内容
+    变化 (例如导出文件被改写) 时自动改为完整回放; 更早的历史不再逐次核对,
+    历史订单被修改时需要删除检查点。
+    新加入的参数组合在全部数据上回放一次, 之后同样增量更新。
+    """
+
+    def __init__(self, directory: str):
+        """
+        初始化增量回放
+
+        Args:
+            directory: 检查点目录
+        """
+        self.directory = directory
+        self.manifest = self._read_manifest()
+        self.report = {}
+
+    @property
+    def param_combinations(self) -> List[Dict]:
+        """检查点中保存的参数组合 (没有检查点时为空)"""
+        return self.manifest['params'] if self.manifest else []
+
+    @property
+    def center_price(self) -> Optional[float]:
+        """锚定的网格中心价格 (没有检查点时为None)"""
+        return self.manifest['center_price'] if self.manifest else None
+
+    def matches(self, series: PriceSeries) -> bool:
+        """
+        series 是否以已回放的数据开头 (只比较已回放部分最后 CHECK_WINDOW 个价格点)
+
+        Args:
+            series: 完整的价格序列
+        """
+        manifest = self.manifest
+        return (manifest is not None and manifest['processed'] <= len(series)
+                and window_hash(series, manifest['processed']) == manifest['window_hash'])
+
+    def update(self, series: PriceSeries, param_combinations: Optional[List[Dict]] = None,
+               center_price: Optional[float] = None) -> List[Dict]:
+        """
+        回放新增数据并更新检查点
+
+        Args:
+            series: 完整的价格序列 (包括已回放的部分)
+            param_combinations: 参数组合, 默认沿用检查点中的参数组合
+            center_price: 网格中心价格, 默认沿用检查点中的价格,
+                          没有检查点时使用 series.mean_price
+
+        Returns:
+            List[Dict]: 与参数组合一一对应、覆盖全部数据的回测指标
+        """
+        if param_combinations is None:
+            param_combinations = self.param_combinations
+        if center_price is None:
+            center_price = self.center_price if self.center_price is not None else series.mean_price
+
+        # 只有中心价格相同、已回放部分的数据未变时才能继续回放
+        saved_rows = {}
+        start = 0
+        manifest = self.manifest
+        if manifest is not None and manifest['center_price'] == center_price and self.matches(series):
+            start = manifest['processed']
+            saved_rows = {param_key(params): row for row, params in enumerate(manifest['params'])}
+        resumed = [index for index, params in enumerate(param_combinations) if param_key(params) in saved_rows]
+        fresh = [index for index, params in enumerate(param_combinations) if param_key(params) not in saved_rows]
+
+        metrics_list = [None] * len(param_combinations)
+        states = {}
+        if resumed:
+            saved = self._load_state(manifest)
+            rows = [saved_rows[param_key(param_combinations[index])] for index in resumed]
+            state = {name: values[rows] for name, values in saved.items()}
+            self._run([param_combinations[index] for index in resumed], resumed,
+                      series.prices[start:], center_price, state, metrics_list, states)
+        if fresh:
+            self._run([param_combinations[index] for index in fresh], fresh,
+                      series.prices, center_price, None, metrics_list, states)
+
+        self._save(param_combinations, states, series, center_price)
+        self.report = {
+            'resumed': len(resumed),
+            'replayed_full': len(fresh),
+            'new_prices': len(series) - start,
+            'total_prices': len(series)
+        }
+        return metrics_list
+
+    def _run(self, param_list: List[Dict], indices: List[int], prices: np.ndarray, center_price: float,
+             state: Optional[Dict[str, np.ndarray]], metrics_list: List, states: Dict):
+        """回放一组参数组合, 把指标与结束状态按原始下标写回"""
+        backtester = BatchGridBacktester(None, param_list)
+        for index, metrics in zip(indices, backtester.run_on_prices(prices, center_price, state)):
+            metrics_list[index] = metrics
+        for name, values in backtester.get_state().items():
+            for index, row_values in zip(indices, values):
+                states.setdefault(name, {})[index] = row_values
+
+    def _save(self, param_combinations: List[Dict], states: Dict, series: PriceSeries, center_price: float):
+        """写入新的状态文件, 再替换清单; 清单替换完成前旧检查点保持有效"""
+        os.makedirs(self.directory, exist_ok=True)
+        generation = (self.manifest['generation'] + 1) if self.manifest else 0
+        state_file = f'state-{generation}.npz'
+
+        arrays = {}
+        for name, rows in states.items():
+            values = [rows[index] for index in range(len(param_combinations))]
+            if name == 'positions':
+                # 不同组合的档位数不同, 按最宽的档位数补零
+                width = max(len(row) for row in values)
+                values = [np.pad(row, (0, width - len(row))) for row in values]
+            arrays[name] = np.stack(values)
+        tmp_path = os.path.join(self.directory, state_file + '.tmp.npz')
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, os.path.join(self.directory, state_file))
+
+        manifest = {
+            'version': SWEEP_FORMAT_VERSION,
+            'generation': generation,
+            'state_file': state_file,
+            'center_price': center_price,
+            'processed': len(series),
+            'window_hash': window_hash(series, len(series)),
+            'params': param_combinations
+        }
+        manifest_path = os.path.join(self.directory, 'manifest.json')
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+        if self.manifest and self.manifest['state_file'] != state_file:
+            try:
+                os.remove(os.path.join(self.directory, self.manifest['state_file']))
+            except OSError:
+                pass
+        self.manifest = manifest
+
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.directory, 'manifest.json'), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != SWEEP_FORMAT_VERSION:
+            return None
+        return manifest
+
+    def _load_state(self, manifest: Dict) -> Dict[str, np.ndarray]:
+        with np.load(os.path.join(self.directory, manifest['state_file'])) as data:
+            return {name: data[name] for name in data.files}
@@ -0,0 +1,195 @@
+# src/instrumentation.py
+# moomoo-grid-optimizer/src/instrumentation.py
+
+import cProfile
+import io
+import json
+import pstats
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Union
+
+@dataclass
+class PhaseStats:
+    """一个阶段的累计耗时"""
+
+    calls: int = 0
+    wall: float = 0.0  # 墙钟时间 (秒)
+    cpu: float = 0.0   # 当前进程的CPU时间 (秒)
+
+@dataclass
+class InstrumentationReport:
+    """
+    性能统计报告
+
+    phases 中的阶段可以嵌套 (例如 optimizer.backtests 包含 backtest.replay),
+    各阶段耗时不应相加。
+    """
+
+    phases: Dict[str, PhaseStats] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    profile_params: Optional[Dict] = None
+    profile: Optional[str] = None  # 被剖析组合的 pstats 文本输出
+
+    def to_dict(self) -> Dict:
+        """转换为可直接序列化为JSON的字典"""
+        return asdict(self)
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """
+        导出为JSON
+
+        Args:
+            path: 指定时同时写入该文件
+
+        Returns:
+            str: JSON文本
+        """
+        text = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def format(self) -> str:
+        """按墙钟时间从高到低格式化为可读文本"""
+        lines = ['阶段                              次数      墙钟(s)     CPU(s)']
+        for name, stats in sorted(self.phases.items(), key=lambda item: -item[1].wall):
+            lines.append(f"{name:<30} {stats.calls:>8} {stats.wall:>12.4f} {stats.cpu:>10.4f}")
+        if self.counters:
+            lines.append('')
+            lines.append('计数')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<30} {value:>12,}")
+        return '\n'.join(lines)
+
+class _Phase:
+    """一个阶段的计时上下文 (可重复进入, 支持递归嵌套)"""
+
+    __slots__ = ('stats', '_starts')
+
+    def __init__(self, stats: PhaseStats):
+        self.stats = stats
+        self._starts: List[tuple] = []
+
+    def __enter__(self):
+        self._starts.append((time.perf_counter(), time.process_time()))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall, cpu = self._starts.pop()
+        self.stats.calls += 1
+        self.stats.wall += time.perf_counter() - wall
+        self.stats.cpu += time.process_time() - cpu
+        return False
+
+class Instrumentation:
+    """
+    性能统计: 按阶段累计墙钟/CPU时间、累计计数, 并可用 cProfile 剖析一个参数组合
+
+    通过构造参数传给 ParameterOptimizer / GridBacktester / GridOrderAnalyzer;
+    不传时这些类使用 NULL_INSTRUMENTATION, 逐价格点的循环中不做任何统计调用。
+    只统计当前进程内的工作, 并行回测的工作进程不计入。
+    """
+
+    enabled = True
+
+    def __init__(self, profile_params: Union[Dict, str, None] = None, profile_limit: int = 30):
+        """
+        初始化性能统计
+
+        Args:
+            profile_params: 优化结束后用 cProfile 单独重新运行并剖析的参数组合;
+                            'best' 表示剖析最优的有效组合
+            profile_limit: 剖析结果中保留的函数数量 (按累计时间排序)
+        """
+        self.profile_params = profile_params
+        self.profile_limit = profile_limit
+        self._phases: Dict[str, _Phase] = {}
+        self._counters: Dict[str, int] = {}
+        self._profile_text = None
+        self._profiled_params = None
+
+    def phase(self, name: str) -> _Phase:
+        """阶段计时上下文, 用法: with instrumentation.phase('optimizer.load_csv'): ..."""
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(PhaseStats())
+        return phase
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """把函数包装为每次调用都计入 name 阶段"""
+        phase = self.phase(name)
+
+        def wrapper(*args, **kwargs):
+            with phase:
+                return func(*args, **kwargs)
+        return wrapper
+
+    def count(self, name: str, value: int = 1):
+        """累加计数"""
+        self._counters[name] = self._counters.get(name, 0) + int(value)
+
+    def profile(self, params: Dict, func: Callable):
+        """
+        用 cProfile 运行 func 并保存结果
+
+        Args:
+            params: 被剖析的参数组合 (写入报告)
+            func: 无参数的回调
+
+        Returns:
+            func 的返回值
+        """
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(self.profile_limit)
+        self._profile_text = stream.getvalue()
+        self._profiled_params = dict(params)
+        return result
+
+    def report(self) -> InstrumentationReport:
+        """当前的统计报告 (快照)"""
+        return InstrumentationReport(
+            phases={name: PhaseStats(**asdict(phase.stats)) for name, phase in self._phases.items()
+                    if phase.stats.calls},
+            counters=dict(self._counters),
+            profile_params=self._profiled_params,
+            profile=self._profile_text
+        )
+
+class _NullPhase:
+    """不做任何事的阶段上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+class NullInstrumentation:
+    """关闭时使用的空实现, 所有方法都不做任何事"""
+
+    enabled = False
+    profile_params = None
+    _phase = _NullPhase()
+
+    def phase(self, name: str) -> _NullPhase:
+        return self._phase
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        return func
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def profile(self, params: Dict, func: Callable):
+        return func()
+
+    def report(self) -> None:
+        return None
+
+NULL_INSTRUMENTATION = NullInstrumentation()
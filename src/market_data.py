@@ -0,0 +1,198 @@
+# src/market_data.py
+# moomoo-grid-optimizer/src/market_data.py
+
+import hashlib
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List
+import numpy as np
+import pandas as pd
+from .crossing_index import CrossingIndex
+
+@dataclass(frozen=True)
+class PriceSeries:
+    """
+    预处理后的成交价格序列 (不可变)
+
+    prices/times 为按成交时间排序的连续数组, 创建后设为只读,
+    可在多个回测之间共享而无需复制。
+    """
+
+    prices: np.ndarray   # 成交价格 (float64)
+    times: np.ndarray    # 成交时间 (int64, 纳秒时间戳)
+    mean_price: float    # 网格中心价格 (订单数据的平均成交价)
+
+    def __post_init__(self):
+        prices = np.ascontiguousarray(self.prices, dtype=np.float64)
+        times = np.ascontiguousarray(self.times, dtype=np.int64)
+        if len(prices) != len(times):
+            raise ValueError("价格与时间数组长度不一致")
+        prices.flags.writeable = False
+        times.flags.writeable = False
+        object.__setattr__(self, 'prices', prices)
+        object.__setattr__(self, 'times', times)
+        object.__setattr__(self, 'mean_price', float(self.mean_price))
+
+    @classmethod
+    def from_orders(cls, orders_df: pd.DataFrame) -> 'PriceSeries':
+        """
+        从订单数据构建价格序列
+
+        过滤无成交时间或成交价格不为正的订单并按成交时间稳定排序
+        (同一时间的成交保持导出文件中的顺序),
+        平均价格按全部订单计算, 与原先的网格初始化方式一致。
+
+        Args:
+            orders_df: 历史订单数据, 需包含 成交时间、成交价格 列
+        """
+        valid_orders = orders_df[
+            (orders_df['成交时间'].notna()) &
+            (orders_df['成交价格'] > 0)
+        ].sort_values('成交时间', kind='stable')
+        return cls(
+            prices=valid_orders['成交价格'].to_numpy(dtype=np.float64),
+            times=valid_orders['成交时间'].to_numpy(dtype='datetime64[ns]').view(np.int64),
+            mean_price=orders_df['成交价格'].mean()
+        )
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def slice(self, start: int, stop: int) -> 'PriceSeries':
+        """
+        按位置截取子序列 (零拷贝视图)
+
+        网格中心价格保持不变, 使同一组参数在子序列上的网格与完整序列一致。
+        """
+        return PriceSeries(self.prices[start:stop], self.times[start:stop], self.mean_price)
+
+    def prefix(self, fraction: float) -> 'PriceSeries':
+        """前 fraction 比例的数据 (至少一个价格点)"""
+        if fraction >= 1.0:
+            return self
+        return self.slice(0, max(1, int(len(self) * fraction)))
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """价格、时间与网格中心价格的内容哈希, 用于识别相同的回测数据"""
+        digest = hashlib.sha256()
+        digest.update(self.prices.tobytes())
+        digest.update(self.times.tobytes())
+        digest.update(repr(self.mean_price).encode('ascii'))
+        return digest.hexdigest()
+
+    @cached_property
+    def crossing_index(self) -> CrossingIndex:
+        """价格穿越索引 (首次使用时构建, 供事件驱动回测共享)"""
+        return CrossingIndex(self.prices)
+
+class PriceSeriesBuilder:
+    """
+    分块构建价格序列
+
+    每个订单数据块只保留构建 PriceSeries 所需的价格与时间数组,
+    全部数据块追加完毕后一次性排序, 结果与 PriceSeries.from_orders 对整表构建相同。
+    """
+
+    def __init__(self):
+        self._order_prices: List[np.ndarray] = []
+        self._prices: List[np.ndarray] = []
+        self._times: List[np.ndarray] = []
+
+    def add_orders(self, orders_df: pd.DataFrame):
+        """
+        追加一个订单数据块
+
+        Args:
+            orders_df: 需包含 成交时间、成交价格 列
+        """
+        order_prices = orders_df['成交价格'].to_numpy(dtype=np.float64)
+        times = orders_df['成交时间'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        valid = (~np.isnat(times.view('datetime64[ns]'))) & (order_prices > 0)
+
+        self._order_prices.append(order_prices)
+        self._prices.append(order_prices[valid])
+        self._times.append(times[valid])
+
+    def build(self) -> PriceSeries:
+        """合并所有数据块并按成交时间排序"""
+        order_prices = np.concatenate(self._order_prices) if self._order_prices else np.empty(0)
+        prices = np.concatenate(self._prices) if self._prices else np.empty(0)
+        times = np.concatenate(self._times) if self._times else np.empty(0, dtype=np.int64)
+
+        # 稳定排序, 与 PriceSeries.from_orders 一致
+        order = np.argsort(times, kind='stable')
+        return PriceSeries(
+            prices=prices[order],
+            times=times[order],
+            mean_price=pd.Series(order_prices).mean()
+        )
+
+class AppendablePriceSeries:
+    """
+    可追加的价格序列 (持续追加的订单导出)
+
+    价格与时间保存在按倍数扩容的缓冲区中: 成交时间不早于已有数据的订单直接追加到末尾,
+    开销与新增订单数量成正比 (均摊); series 返回缓冲区前段的只读视图,
+    之后的追加不影响已返回的序列。新增订单早于已有数据时重新排序全部数据,
+    价格与时间和 PriceSeries.from_orders 对全部订单构建的结果相同
+    (平均价格按累计和计算, 与 pandas 的结果可能相差舍入误差)。
+    """
+
+    def __init__(self):
+        self._prices = np.empty(0)
+        self._times = np.empty(0, dtype=np.int64)
+        self._length = 0
+        self._price_sum = 0.0
+        self._price_count = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def add_orders(self, orders_df: pd.DataFrame) -> bool:
+        """
+        追加新增的订单
+
+        Args:
+            orders_df: 需包含 成交时间、成交价格 列
+
+        Returns:
+            bool: 是否只追加到末尾 (False 表示已有价格点的位置发生了变化)
+        """
+        order_prices = orders_df['成交价格'].to_numpy(dtype=np.float64)
+        times = orders_df['成交时间'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        valid = (~np.isnat(times.view('datetime64[ns]'))) & (order_prices > 0)
+        known = ~np.isnan(order_prices)
+        self._price_sum += float(order_prices[known].sum())
+        self._price_count += int(known.sum())
+
+        # 稳定排序, 与 PriceSeries.from_orders 一致
+        order = np.argsort(times[valid], kind='stable')
+        prices, times = order_prices[valid][order], times[valid][order]
+        if not len(prices):
+            return True
+        if self._length and times[0] < self._times[self._length - 1]:
+            # 已返回的序列仍引用旧缓冲区, 重新排序时使用新数组
+            all_times = np.concatenate([self._times[:self._length], times])
+            all_prices = np.concatenate([self._prices[:self._length], prices])
+            order = np.argsort(all_times, kind='stable')
+            self._times, self._prices = all_times[order], all_prices[order]
+            self._length = len(all_times)
+            return False
+
+        stop = self._length + len(prices)
+        if stop > len(self._prices):
+            capacity = max(stop, 2 * len(self._prices), 1024)
+            self._prices = np.concatenate([self._prices[:self._length], np.empty(capacity - self._length)])
+            self._times = np.concatenate([self._times[:self._length],
+                                          np.empty(capacity - self._length, dtype=np.int64)])
+        self._prices[self._length:stop] = prices
+        self._times[self._length:stop] = times
+        self._length = stop
+        return True
+
+    @property
+    def series(self) -> PriceSeries:
+        """当前的价格序列 (缓冲区前段的只读视图, 不复制数据)"""
+        mean_price = self._price_sum / self._price_count if self._price_count else float('nan')
+        return PriceSeries(self._prices[:self._length], self._times[:self._length], mean_price)
@@ -0,0 +1,130 @@
+# src/metrics.py
+# moomoo-grid-optimizer/src/metrics.py
+
+from typing import Dict
+import numpy as np
+from .config import Config
+
+class EquityTracker:
+    """
+    按市值计算的逐价格点资金曲线
+
+    每个价格点的权益 = 现金 + 持仓数量 * 当前价格 (该价格点成交之后)。
+    资金/持仓只在成交时变化, 因此回测引擎只需在成交时调用 update,
+    两次成交之间的权益与回撤用向量化运算一次算出。
+    keep_curve=False 时只保留峰值、最大回撤等累计量, 不保存完整曲线。
+    """
+
+    # 流式计算时每次处理的最大价格点数, 限制临时数组的内存
+    CHUNK_SIZE = 65536
+
+    def __init__(self, prices: np.ndarray, initial_capital: float = Config.INITIAL_CAPITAL,
+                 keep_curve: bool = True):
+        """
+        初始化资金曲线
+
+        Args:
+            prices: 按时间排序的价格数组
+            initial_capital: 初始资金
+            keep_curve: 是否保存完整的逐价格点权益数组
+        """
+        self.prices = prices
+        self.initial_capital = initial_capital
+        self.curve = np.empty(len(prices)) if keep_curve else None
+        self.cash = float(initial_capital)
+        self.held_quantity = 0
+        self.peak = float(initial_capital)
+        self.max_drawdown = 0.0
+        self.last_equity = float(initial_capital)
+        self._position = 0
+
+    def update(self, position: int, cash: float, held_quantity: int):
+        """
+        记录从 position 开始 (含) 生效的新资金/持仓状态
+
+        Args:
+            position: 发生成交的价格点下标
+            cash: 成交后的现金
+            held_quantity: 成交后的总持仓数量
+        """
+        self._advance(position)
+        self.cash = cash
+        self.held_quantity = held_quantity
+
+    def restore(self, cash: float, held_quantity: int, peak: float, max_drawdown: float,
+                last_equity: float):
+        """从检查点恢复之前数据上的累计状态, 之后的价格点接着计算"""
+        self.cash = cash
+        self.held_quantity = held_quantity
+        self.peak = peak
+        self.max_drawdown = max_drawdown
+        self.last_equity = last_equity
+
+    def advance(self, position: int):
+        """按当前资金/持仓状态把资金曲线推进到 position 之前 (不含), 用于中途检查回撤"""
+        self._advance(position)
+
+    def finalize(self) -> 'EquityTracker':
+        """把最后一次成交之后的价格点计入资金曲线"""
+        self._advance(len(self.prices))
+        return self
+
+    def _advance(self, end: int):
+        """用当前资金/持仓状态计算 [_position, end) 区间的权益与回撤"""
+        while self._position < end:
+            stop = min(end, self._position + self.CHUNK_SIZE)
+            equity = self.cash + self.held_quantity * self.prices[self._position:stop]
+            if self.curve is not None:
+                self.curve[self._position:stop] = equity
+
+            peaks = np.maximum.accumulate(equity)
+            np.maximum(peaks, self.peak, out=peaks)
+            self.max_drawdown = max(self.max_drawdown, float(((peaks - equity) / peaks).max()))
+            self.peak = float(peaks[-1])
+            self.last_equity = float(equity[-1])
+            self._position = stop
+
+def max_drawdown(equity_curve: np.ndarray, initial_capital: float = Config.INITIAL_CAPITAL) -> float:
+    """
+    计算资金曲线的最大回撤 (峰值从初始资金开始)
+
+    Args:
+        equity_curve: 逐价格点权益数组
+        initial_capital: 初始资金
+    """
+    if len(equity_curve) == 0:
+        return 0.0
+    peaks = np.maximum.accumulate(np.maximum(equity_curve, initial_capital))
+    return float(((peaks - equity_curve) / peaks).max())
+
+def summarize_backtest(final_equity: float, max_drawdown: float, trade_count: int,
+                       win_count: int, initial_capital: float = Config.INITIAL_CAPITAL) -> Dict:
+    """
+    生成回测指标字典
+
+    Args:
+        final_equity: 最后一个价格点的市值权益
+        max_drawdown: 最大回撤
+        trade_count: 成交次数
+        win_count: 成交价格高于网格价格的成交次数
+        initial_capital: 初始资金
+
+    Returns:
+        Dict: 回测指标, 没有成交时为空字典
+    """
+    if trade_count == 0:
+        return {}
+
+    profit = final_equity - initial_capital
+    return {
+        'total_profit': profit,
+        'profit_ratio': profit / initial_capital,
+        'trade_count': trade_count,
+        'win_rate': win_count / trade_count,
+        'max_drawdown': max_drawdown,
+        'final_value': final_equity
+    }
+
+def count_wins(trade_prices: np.ndarray, grid_prices: np.ndarray) -> int:
+    """成交价格高于对应网格价格的成交次数"""
+    return int(np.count_nonzero(np.asarray(trade_prices) > np.asarray(grid_prices)))
@@ -0,0 +1,281 @@
+# src/monte_carlo.py
+# moomoo-grid-optimizer/src/monte_carlo.py
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .batch_engine import BatchGridBacktester
+from .parameter_optimizer import ParameterOptimizer
+
+# 每个任务的 (组合数 * 路径数 * 价格点数) 上限, 限制批量回测的内存占用
+MAX_TASK_CELLS = 1 << 22
+
+# 分布统计中报告的百分位数
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# 工作进程内挂载的价格路径 (由 _init_worker 设置)
+_worker_paths = None
+
+def block_bootstrap_paths(prices: np.ndarray, n_paths: int, block_size: Optional[int] = None,
+                          seed: Optional[int] = None) -> np.ndarray:
+    """
+    对数收益率的循环块自助法 (circular block bootstrap) 重采样价格路径
+
+    每条路径从第一个价格出发, 由随机起点的连续收益率块拼接而成,
+    保留块内的波动聚集与自相关; 价格保留两位小数且不低于 0.01。
+
+    Args:
+        prices: 原始价格序列 (至少两个价格点)
+        n_paths: 路径数量
+        block_size: 块长度, 默认为 收益率数量 的立方根
+        seed: 随机数种子
+
+    Returns:
+        np.ndarray: 形状为 (n_paths, len(prices)) 的价格路径
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(prices) < 2:
+        raise ValueError("块自助法至少需要两个价格点")
+    returns = np.diff(np.log(prices))
+    count = len(returns)
+    block_size = block_size or max(1, int(round(count ** (1 / 3))))
+    block_size = min(block_size, count)
+
+    rng = np.random.default_rng(seed)
+    n_blocks = -(-count // block_size)
+    starts = rng.integers(0, count, size=(n_paths, n_blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :count] % count
+
+    log_paths = np.empty((n_paths, len(prices)))
+    log_paths[:, 0] = np.log(prices[0])
+    np.cumsum(returns[indices], axis=1, out=log_paths[:, 1:])
+    log_paths[:, 1:] += log_paths[:, :1]
+    return _round_prices(np.exp(log_paths))
+
+def jittered_paths(prices: np.ndarray, n_paths: int, jitter: float = 0.002, max_shift: float = 0.05,
+                   seed: Optional[int] = None) -> np.ndarray:
+    """
+    在原始价格上叠加整体平移与逐价格点扰动
+
+    第 i 条路径 = prices * (1 + shift_i) * (1 + noise_ij), shift_i 在 [-max_shift, max_shift]
+    内均匀分布, noise_ij 服从标准差为 jitter 的正态分布; 价格保留两位小数。
+
+    Args:
+        prices: 原始价格序列
+        n_paths: 路径数量
+        jitter: 逐价格点相对扰动的标准差
+        max_shift: 整体相对平移的最大幅度
+        seed: 随机数种子
+
+    Returns:
+        np.ndarray: 形状为 (n_paths, len(prices)) 的价格路径
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    shifts = rng.uniform(-max_shift, max_shift, size=(n_paths, 1))
+    noise = rng.normal(0.0, jitter, size=(n_paths, len(prices)))
+    return _round_prices(prices * (1 + shifts) * (1 + noise))
+
+def generate_paths(prices: np.ndarray, n_paths: int, method: str = 'bootstrap',
+                   seed: Optional[int] = None, **options) -> np.ndarray:
+    """
+    生成重采样价格路径
+
+    Args:
+        prices: 原始价格序列
+        n_paths: 路径数量
+        method: 'bootstrap' (块自助法) 或 'jitter' (平移与扰动)
+        seed: 随机数种子
+        **options: 传给 block_bootstrap_paths (block_size) 或 jittered_paths (jitter, max_shift)
+
+    Returns:
+        np.ndarray: 形状为 (n_paths, len(prices)) 的价格路径
+    """
+    if method == 'bootstrap':
+        return block_bootstrap_paths(prices, n_paths, seed=seed, **options)
+    if method == 'jitter':
+        return jittered_paths(prices, n_paths, seed=seed, **options)
+    raise ValueError(f"不支持的路径生成方法: {method}")
+
+def _round_prices(paths: np.ndarray) -> np.ndarray:
+    """价格保留两位小数, 且不低于 0.01"""
+    return np.maximum(np.round(paths, 2), 0.01)
+
+def evaluate_paths(paths: np.ndarray, param_list: List[Dict],
+                   center_price: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    在每条价格路径上回测每组参数
+
+    组合与路径的全部配对展开为批量回测的行, 每行使用自己的价格路径;
+    超过 MAX_TASK_CELLS 时按路径分批。
+
+    Args:
+        paths: 形状为 (路径数, 价格点数) 的价格路径
+        param_list: 参数组合
+        center_price: 网格中心价格, None 表示使用每条路径自身的平均价格
+
+    Returns:
+        Dict[str, np.ndarray]: profit_ratio、max_drawdown、trade_count,
+                               形状均为 (组合数, 路径数); 没有成交的路径收益与回撤为 0
+    """
+    path_count, length = paths.shape
+    outcome = _empty_outcome(len(param_list), path_count)
+    if not param_list or path_count == 0:
+        return outcome
+
+    step = max(1, MAX_TASK_CELLS // (len(param_list) * max(length, 1)))
+    for start in range(0, path_count, step):
+        chunk = np.asarray(paths[start:start + step], dtype=np.float64)
+        count = len(chunk)
+        rows = [params for params in param_list for _ in range(count)]
+        centers = chunk.mean(axis=1) if center_price is None else np.full(count, center_price)
+        metrics_list = BatchGridBacktester(None, rows).run_on_paths(
+            np.tile(chunk, (len(param_list), 1)), np.tile(centers, len(param_list))
+        )
+        for index, metrics in enumerate(metrics_list):
+            if metrics:
+                combo, path = divmod(index, count)
+                outcome['profit_ratio'][combo, start + path] = metrics['profit_ratio']
+                outcome['max_drawdown'][combo, start + path] = metrics['max_drawdown']
+                outcome['trade_count'][combo, start + path] = metrics['trade_count']
+    return outcome
+
+def _empty_outcome(combo_count: int, path_count: int) -> Dict[str, np.ndarray]:
+    """全部为 0 (没有成交) 的评估结果"""
+    shape = (combo_count, path_count)
+    return {
+        'profit_ratio': np.zeros(shape),
+        'max_drawdown': np.zeros(shape),
+        'trade_count': np.zeros(shape, dtype=np.int64)
+    }
+
+def summarize_distribution(values: np.ndarray) -> Dict:
+    """
+    一组样本的分布统计
+
+    Returns:
+        Dict: mean、std、min、max 与 PERCENTILES 中的各百分位数 (p5、p25、...)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    summary = {
+        'mean': float(values.mean()),
+        'std': float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+        'min': float(values.min()),
+        'max': float(values.max())
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f'p{percentile}'] = float(value)
+    return summary
+
+def _init_worker(path_file: str):
+    """工作进程初始化: 以只读内存映射方式挂载价格路径"""
+    global _worker_paths
+    _worker_paths = np.load(path_file, mmap_mode='r')
+
+def _evaluate_worker(start: int, stop: int, param_list: List[Dict],
+                     center_price: Optional[float]) -> Tuple[int, Dict[str, np.ndarray]]:
+    """在工作进程中评估 [start, stop) 范围的路径"""
+    return start, evaluate_paths(_worker_paths[start:stop], param_list, center_price)
+
+def run_monte_carlo(optimizer: ParameterOptimizer, results: List[Dict], top_k: int = 20,
+                    n_paths: int = 1000, method: str = 'bootstrap', center: str = 'series',
+                    workers: Optional[int] = 1, seed: Optional[int] = None,
+                    keep_samples: bool = False,
+                    on_progress: Optional[Callable[[int], None]] = None, **options) -> List[Dict]:
+    """
+    在重采样价格路径上重新评估优化结果中排名靠前的参数, 检验结果是否稳健
+
+    全部路径一次生成为二维数组; 并行时写入临时 .npy 文件, 工作进程以内存映射方式
+    读取各自负责的路径范围, 每个任务用一次批量回测评估所有参数与路径的组合。
+
+    Args:
+        optimizer: 已加载订单数据的参数优化器 (使用其价格序列)
+        results: optimize() 返回的结果 ({'params', 'metrics'}, 按排名排列)
+        top_k: 评估排名前 top_k 的参数组
+        n_paths: 路径数量
+        method: 路径生成方法, 见 generate_paths
+        center: 网格中心价格, 'series' 为原始数据的平均价格 (与优化时相同),
+                'path' 为每条路径自身的平均价格
+        workers: 进程数, 1 为在当前进程中计算, None 表示使用全部CPU
+        seed: 随机数种子
+        keep_samples: 是否在结果中保留每条路径的 profit_ratio / max_drawdown 样本
+        on_progress: 每完成一批路径时回调, 参数为已完成的路径数
+        **options: 传给路径生成函数的参数 (block_size、jitter、max_shift)
+
+    Returns:
+        List[Dict]: 每组参数的 params、原始指标 metrics、paths 路径数、traded_ratio 有成交的路径比例、
+                    loss_probability 亏损概率、profit_ratio 与 max_drawdown 的分布统计
+                    (见 summarize_distribution)
+    """
+    if center not in ('series', 'path'):
+        raise ValueError(f"不支持的网格中心价格: {center}")
+    if n_paths < 1:
+        raise ValueError(f"路径数量至少为 1: {n_paths}")
+    series = optimizer.price_series
+    selected = results[:top_k]
+    param_list = [result['params'] for result in selected]
+    paths = generate_paths(series.prices, n_paths, method, seed=seed, **options)
+    center_price = series.mean_price if center == 'series' else None
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or n_paths <= 1:
+        outcome = evaluate_paths(paths, param_list, center_price)
+        if on_progress is not None:
+            on_progress(n_paths)
+    else:
+        outcome = _evaluate_parallel(paths, param_list, center_price, workers, on_progress)
+
+    reports = []
+    for index, result in enumerate(selected):
+        profits = outcome['profit_ratio'][index]
+        report = {
+            'params': result['params'],
+            'metrics': result['metrics'],
+            'paths': n_paths,
+            'traded_ratio': float(np.mean(outcome['trade_count'][index] > 0)),
+            'loss_probability': float(np.mean(profits < 0)),
+            'profit_ratio': summarize_distribution(profits),
+            'max_drawdown': summarize_distribution(outcome['max_drawdown'][index])
+        }
+        if keep_samples:
+            report['samples'] = {
+                'profit_ratio': profits,
+                'max_drawdown': outcome['max_drawdown'][index]
+            }
+        reports.append(report)
+    return reports
+
+def _evaluate_parallel(paths: np.ndarray, param_list: List[Dict], center_price: Optional[float],
+                       workers: int, on_progress: Optional[Callable[[int], None]]) -> Dict[str, np.ndarray]:
+    """把路径按范围分给多个进程评估, 再按路径顺序拼回"""
+    path_count = len(paths)
+    # 每个进程至少分到两个任务, 以平衡各任务耗时的差异
+    step = max(1, -(-path_count // (workers * 2)))
+    outcome = _empty_outcome(len(param_list), path_count)
+
+    directory = tempfile.mkdtemp(prefix='grid-paths-')
+    try:
+        path_file = os.path.join(directory, 'paths.npy')
+        np.save(path_file, paths)
+        with ProcessPoolExecutor(max_workers=min(workers, -(-path_count // step)),
+                                 initializer=_init_worker, initargs=(path_file,)) as executor:
+            futures = [
+                executor.submit(_evaluate_worker, start, min(start + step, path_count),
+                                param_list, center_price)
+                for start in range(0, path_count, step)
+            ]
+            done = 0
+            for future in as_completed(futures):
+                start, chunk = future.result()
+                stop = start + chunk['profit_ratio'].shape[1]
+                for name, values in chunk.items():
+                    outcome[name][:, start:stop] = values
+                done += stop - start
+                if on_progress is not None:
+                    on_progress(done)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return outcome
@@ -3,82 +3,161 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
+from .bar_pyramid import BarSeries
 from .config import Config
+from .data_cache import OrderDataCache
+from .data_loader import concat_order_chunks, detect_timeframe, iter_order_chunks, read_order_csv
+from .instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from .order_statistics import OrderStatistics
 
 class GridOrderAnalyzer:
     """分析网格交易订单数据，为策略参数优化提供建议"""
     
-    def __init__(self, initial_capital: float = Config.INITIAL_CAPITAL):
+    def __init__(self, initial_capital: float = Config.INITIAL_CAPITAL,
+                 instrumentation: Optional[Instrumentation] = None):
         """
         初始化分析器
         
         Args:
             initial_capital: 初始资金量
+            instrumentation: 性能统计, 提供时记录各阶段耗时
         """
         self.initial_capital = initial_capital
-        self.orders_df = None
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.suggest_parameters = self.instrumentation.timed('analyzer.suggest_parameters',
+                                                             self.suggest_parameters)
+        self._order_chunks = []  # 订单数据块, 读取 orders_df 时才合并
         self.symbol = None
         self.avg_price = None
         self.time_frame = None  # 'daily' or '30min'
+        self.statistics = None  # 订单价格的流式统计 (OrderStatistics)
+        self._analysis = None  # analyze_price_movement 的缓存结果
         
-    def load_orders(self, file_path: str) -> None:
+    def load_orders(self, file_path: str, use_cache: bool = False,
+                    chunksize: Optional[int] = None) -> None:
         """
         加载订单数据并进行初步处理
         
+        价格统计在加载时一次遍历完成; 分块读取时逐块累计, 不需要再次扫描完整数据。
+        
         Args:
             file_path: CSV文件路径
+            use_cache: 是否使用解析后订单数据的二进制缓存 (Config.CACHE_DIR)
+            chunksize: 指定时按该行数分块流式读取CSV, 只保留需要的列
         """
-        df = pd.read_csv(file_path)
-        df['成交时间'] = pd.to_datetime(df['成交时间'])
-        df = df[df['交易状态'] == '全部成交'].copy()
-        
-        # 判断时间周期
-        time_diffs = df['成交时间'].diff().dropna()
-        median_diff = time_diffs.median()
-        if median_diff.total_seconds() >= 24*3600:
-            self.time_frame = 'daily'
-        else:
-            self.time_frame = '30min'
+        with self.instrumentation.phase('analyzer.load_orders'):
+            statistics = OrderStatistics()
+            if use_cache:
+                df = OrderDataCache().load(file_path)
+                statistics.update(df)
+            elif chunksize:
+                chunks = []
+                for chunk in iter_order_chunks(file_path, chunksize):
+                    statistics.update(chunk)
+                    chunks.append(chunk)
+                df = concat_order_chunks(chunks)
+            else:
+                df = read_order_csv(file_path)
+                statistics.update(df)
             
-        self.orders_df = df
-        self.symbol = df['代码'].iloc[0]
-        self.avg_price = df['成交价格'].mean()
+            # 判断时间周期
+            self.time_frame = detect_timeframe(df['成交时间'])
+                
+            self.orders_df = df
+            self.symbol = df['代码'].iloc[0]
+            self._set_statistics(statistics)
+        self.instrumentation.count('analyzer.orders', len(df))
+    
+    def load_bars(self, bars: BarSeries) -> None:
+        """
+        使用K线金字塔中的一个周期代替订单CSV (每根K线的收盘价作为一笔成交)
+        
+        时间周期由K线周期决定, 不再按成交时间间隔推断。
+        
+        Args:
+            bars: BarPyramid.get 返回的K线
+        """
+        with self.instrumentation.phase('analyzer.load_orders'):
+            df = bars.to_orders()
+            self.time_frame = bars.timeframe
+            self.orders_df = df
+            self.symbol = bars.symbol
+            self._set_statistics(OrderStatistics().update(df))
+        self.instrumentation.count('analyzer.orders', len(df))
+    
+    def add_orders(self, orders_df: pd.DataFrame) -> None:
+        """
+        追加新的订单 (例如持续更新的导出文件中新增的行)
+        
+        只对新增订单做一次统计并与已有统计合并, 时间周期沿用首次加载时的判断。
+        新增订单作为数据块保存, 读取 orders_df 时才合并。
+        
+        Args:
+            orders_df: 新增的订单数据, 列与 load_orders 读取的数据一致
+        """
+        if not self._order_chunks:
+            self.symbol = orders_df['代码'].iloc[0]
+            self.time_frame = detect_timeframe(orders_df['成交时间'])
+            self._set_statistics(OrderStatistics().update(orders_df))
+        else:
+            self._set_statistics(self.statistics.update(orders_df))
+        # 只保存数据块, 不在每次追加时复制全部已有订单
+        self._order_chunks.append(orders_df)
+        self.instrumentation.count('analyzer.orders', len(orders_df))
+    
+    @property
+    def orders_df(self) -> Optional[pd.DataFrame]:
+        """全部订单 (追加的数据块在读取时合并一次)"""
+        if len(self._order_chunks) > 1:
+            self._order_chunks = [pd.concat(self._order_chunks, ignore_index=True)]
+        return self._order_chunks[0] if self._order_chunks else None
+
+    @orders_df.setter
+    def orders_df(self, orders_df: Optional[pd.DataFrame]):
+        self._order_chunks = [] if orders_df is None else [orders_df]
+
+    @property
+    def order_count(self) -> int:
+        """订单数量 (不合并数据块)"""
+        return sum(len(chunk) for chunk in self._order_chunks)
+
+    def _set_statistics(self, statistics: OrderStatistics):
+        """更新统计量并清除缓存的分析结果"""
+        self.statistics = statistics
+        self.avg_price = statistics.prices.mean
+        self._analysis = None
         
     def analyze_price_movement(self) -> Dict:
         """
-        分析价格波动特征
+        分析价格波动特征 (结果缓存到订单数据变化为止)
         
         Returns:
             Dict: 包含价格分析结果的字典
         """
-        if self.orders_df is None:
+        if not self._order_chunks:
             return {}
-            
-        prices = self.orders_df['成交价格']
         
-        # 计算日内波动率
-        volatility_daily = self._calculate_intraday_volatility()
-        
-        return {
-            'mean_price': prices.mean(),
-            'price_std': prices.std(),
-            'price_range': prices.max() - prices.min(),
-            'volatility': prices.std() / prices.mean(),
-            'daily_volatility': volatility_daily
-        }
+        if self._analysis is None:
+            with self.instrumentation.phase('analyzer.price_movement'):
+                prices = self.statistics.prices
+                self._analysis = {
+                    'mean_price': prices.mean,
+                    'price_std': prices.std,
+                    'price_range': prices.range,
+                    'volatility': self.statistics.volatility,
+                    'daily_volatility': self._calculate_intraday_volatility(),
+                    'rolling_volatility': self.statistics.rolling_volatility
+                }
+        return dict(self._analysis)
     
     def _calculate_intraday_volatility(self) -> float:
         """计算日内波动率"""
         if self.time_frame == 'daily':
-            return self.orders_df['成交价格'].std() / self.orders_df['成交价格'].mean()
+            return self.statistics.volatility
             
-        # 对于30分钟数据，按天分组计算
-        df = self.orders_df.copy()
-        df['date'] = df['成交时间'].dt.date
-        daily_volatility = df.groupby('date')['成交价格'].agg(['std', 'mean'])
-        daily_volatility['volatility'] = daily_volatility['std'] / daily_volatility['mean']
-        return daily_volatility['volatility'].mean()
+        # 对于30分钟数据，按自然日分别统计
+        return self.statistics.daily_volatility
         
     def suggest_parameters(self) -> Dict:
         """
@@ -87,7 +166,7 @@ class GridOrderAnalyzer:
         Returns:
             Dict: 包含建议参数的字典
         """
-        if self.orders_df is None:
+        if not self._order_chunks:
             return {}
             
         price_analysis = self.analyze_price_movement()
@@ -0,0 +1,148 @@
+# src/order_statistics.py
+# moomoo-grid-optimizer/src/order_statistics.py
+
+import math
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from .config import Config
+
+_DAY = 24 * 3600 * 10**9
+
+class RunningStats:
+    """
+    可合并的单遍统计量 (数量、均值、离差平方和、最小值、最大值)
+
+    每批数据先求出该批的统计量, 再按 Welford / Chan 的合并公式并入累计值,
+    不需要保留已处理的数据, 结果与对全部数据一次计算相同 (忽略 NaN)。
+    """
+
+    __slots__ = ('count', 'mean', 'm2', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def update(self, values: np.ndarray) -> 'RunningStats':
+        """并入一批数据"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            mean = float(values.mean())
+            self.combine(len(values), mean, float(np.square(values - mean).sum()),
+                         float(values.min()), float(values.max()))
+        return self
+
+    def combine(self, count: int, mean: float, m2: float, minimum: float, maximum: float):
+        """并入另一组数据的统计量"""
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    @property
+    def std(self) -> float:
+        """样本标准差 (ddof=1, 与 pandas 一致), 少于两个数据时为 NaN"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    @property
+    def range(self) -> float:
+        """最大值 - 最小值, 没有数据时为 NaN"""
+        return self.maximum - self.minimum if self.count else math.nan
+
+class OrderStatistics:
+    """
+    订单价格的流式统计
+
+    一次遍历同时累计: 全部成交价格的均值/标准差/极差、每个自然日的价格统计
+    (用于日内波动率) 以及按成交时间排序后最近 rolling_window 个价格 (用于滚动波动率)。
+    可以对完整的订单数据调用一次 update, 也可以对分块读取或文件追加的数据逐块调用。
+    """
+
+    def __init__(self, rolling_window: Optional[int] = None):
+        """
+        初始化统计量
+
+        Args:
+            rolling_window: 滚动波动率使用的价格数量, 默认为 Config.ROLLING_VOLATILITY_WINDOW
+        """
+        self.rolling_window = rolling_window or Config.ROLLING_VOLATILITY_WINDOW
+        self.prices = RunningStats()
+        self.daily: Dict[int, RunningStats] = {}
+        self._tail_prices = np.empty(0)
+        self._tail_times = np.empty(0, dtype=np.int64)
+
+    def update(self, orders_df: pd.DataFrame) -> 'OrderStatistics':
+        """
+        并入一批订单
+
+        Args:
+            orders_df: 订单数据, 需包含 成交价格、成交时间 列
+        """
+        prices = orders_df['成交价格'].to_numpy(dtype=np.float64)
+        self.prices.update(prices)
+
+        times = orders_df['成交时间']
+        valid = (~np.isnan(prices)) & times.notna().to_numpy()
+        prices = prices[valid]
+        times = times.to_numpy(dtype='datetime64[ns]').view(np.int64)[valid]
+        if len(prices):
+            self._update_daily(prices, times)
+            self._update_tail(prices, times)
+        return self
+
+    def _update_daily(self, prices: np.ndarray, times: np.ndarray):
+        """按自然日分组并入 (同一天可以分布在多个数据块中)"""
+        days, inverse = np.unique(times // _DAY, return_inverse=True)
+        counts = np.bincount(inverse)
+        means = np.bincount(inverse, weights=prices) / counts
+        m2 = np.bincount(inverse, weights=np.square(prices - means[inverse]))
+        minimums = np.full(len(days), np.inf)
+        maximums = np.full(len(days), -np.inf)
+        np.minimum.at(minimums, inverse, prices)
+        np.maximum.at(maximums, inverse, prices)
+        for index, day in enumerate(days.tolist()):
+            stats = self.daily.get(day)
+            if stats is None:
+                stats = self.daily[day] = RunningStats()
+            stats.combine(int(counts[index]), float(means[index]), float(m2[index]),
+                          float(minimums[index]), float(maximums[index]))
+
+    def _update_tail(self, prices: np.ndarray, times: np.ndarray):
+        """保留按成交时间排序后最后 rolling_window 个价格 (同一时间按数据先后顺序)"""
+        prices = np.concatenate([self._tail_prices, prices])
+        times = np.concatenate([self._tail_times, times])
+        order = np.argsort(times, kind='stable')[-self.rolling_window:]
+        self._tail_prices = prices[order]
+        self._tail_times = times[order]
+
+    @property
+    def count(self) -> int:
+        """有成交价格的订单数量"""
+        return self.prices.count
+
+    @property
+    def volatility(self) -> float:
+        """价格标准差 / 平均价格"""
+        return self.prices.std / self.prices.mean if self.count else math.nan
+
+    @property
+    def daily_volatility(self) -> float:
+        """各自然日 (标准差 / 平均价格) 的平均值, 跳过只有一笔成交的日期"""
+        values = [stats.std / stats.mean for stats in self.daily.values() if stats.count > 1]
+        return float(np.mean(values)) if values else math.nan
+
+    @property
+    def rolling_volatility(self) -> float:
+        """最近 rolling_window 个价格的 标准差 / 平均价格"""
+        if len(self._tail_prices) < 2:
+            return math.nan
+        return float(self._tail_prices.std(ddof=1) / self._tail_prices.mean())
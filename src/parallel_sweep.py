@@ -0,0 +1,152 @@
+# src/parallel_sweep.py
+# moomoo-grid-optimizer/src/parallel_sweep.py
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from .backtest_engine import GridBacktester
+from .batch_engine import BatchGridBacktester
+from .market_data import PriceSeries
+from .pruning import PruningBounds
+
+# 工作进程内挂载的共享价格序列 (由 _init_worker 设置)
+_worker_series = None
+# 工作进程内的提前终止判定边界 (首次需要时构建)
+_worker_bounds = None
+
+class SharedPriceData:
+    """
+    共享价格数据
+
+    把价格序列的价格列和时间列写入临时目录下的 .npy 文件,
+    工作进程以内存映射方式只读打开, 整个优化过程中只发布一次,
+    不需要为每个任务序列化价格数据。
+    """
+
+    def __init__(self, series: PriceSeries):
+        """
+        初始化共享价格数据
+
+        Args:
+            series: 预处理后的价格序列
+        """
+        self.series = series
+        self.directory = None
+
+    def __enter__(self) -> 'SharedPriceData':
+        self.directory = tempfile.mkdtemp(prefix='grid-prices-')
+        np.save(os.path.join(self.directory, 'prices.npy'), self.series.prices)
+        np.save(os.path.join(self.directory, 'times.npy'), self.series.times)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    @property
+    def handle(self) -> Dict:
+        """传递给工作进程的轻量描述信息"""
+        return {'directory': self.directory, 'mean_price': self.series.mean_price}
+
+def attach_shared_prices(handle: Dict) -> PriceSeries:
+    """
+    在工作进程中以只读内存映射方式挂载共享价格数据
+
+    Args:
+        handle: SharedPriceData.handle
+
+    Returns:
+        PriceSeries: 以内存映射数组为底层存储的价格序列
+    """
+    directory = handle['directory']
+    return PriceSeries(
+        prices=np.load(os.path.join(directory, 'prices.npy'), mmap_mode='r'),
+        times=np.load(os.path.join(directory, 'times.npy'), mmap_mode='r'),
+        mean_price=handle['mean_price']
+    )
+
+def _init_worker(handle: Dict):
+    """工作进程初始化: 挂载共享价格数据"""
+    global _worker_series
+    _worker_series = attach_shared_prices(handle)
+
+def _get_worker_bounds() -> PruningBounds:
+    """工作进程内共享的提前终止判定边界"""
+    global _worker_bounds
+    if _worker_bounds is None:
+        _worker_bounds = PruningBounds(_worker_series.prices)
+    return _worker_bounds
+
+def backtest_combinations(series: PriceSeries, param_list: List[Dict], engine: str,
+                          bounds: Optional[PruningBounds] = None) -> List[Dict]:
+    """
+    在当前进程中依次回测一组参数组合
+
+    Args:
+        series: 价格序列
+        param_list: 参数组合 (批量引擎一次处理全部组合)
+        engine: 回测引擎 ('batch'、'loop' 或 'event')
+        bounds: 提前终止的判定边界 (基于 series 构建), None 表示不提前终止
+
+    Returns:
+        List[Dict]: 与 param_list 一一对应的回测指标
+    """
+    if engine == 'batch':
+        return BatchGridBacktester(series, param_list, bounds=bounds).run_backtest()
+    mode = 'event' if engine == 'event' else 'tick'
+    return [
+        GridBacktester(series, params, keep_equity_curve=False,
+                       record_trades=False, bounds=bounds).run_backtest(mode=mode)
+        for params in param_list
+    ]
+
+def _run_chunk(param_list: List[Dict], engine: str, prune: bool = False) -> List[Dict]:
+    """在工作进程中回测一组参数组合"""
+    bounds = _get_worker_bounds() if prune else None
+    return backtest_combinations(_worker_series, param_list, engine, bounds)
+
+def run_parallel_backtests(series: PriceSeries, param_combinations: List[Dict],
+                           engine: str = 'batch', workers: Optional[int] = None,
+                           chunk_size: int = 64,
+                           on_progress: Optional[Callable[[int], None]] = None,
+                           prune: bool = False) -> List[Dict]:
+    """
+    在进程池中并行回测所有参数组合
+
+    Args:
+        series: 预处理后的价格序列
+        param_combinations: 参数组合列表
+        engine: 回测引擎 ('batch'、'loop' 或 'event')
+        workers: 工作进程数, None 表示使用全部CPU
+        chunk_size: 每个任务包含的参数组合数量
+        on_progress: 每完成一个任务时回调, 参数为该任务的组合数量
+        prune: 是否提前终止结果必然无效的回测 (见 pruning.PruningBounds)
+
+    Returns:
+        List[Dict]: 与 param_combinations 一一对应的回测指标
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = [
+        param_combinations[start:start + chunk_size]
+        for start in range(0, len(param_combinations), chunk_size)
+    ]
+    chunk_results = [None] * len(chunks)
+
+    with SharedPriceData(series) as shared:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.handle,)) as executor:
+            futures = {
+                executor.submit(_run_chunk, chunk, engine, prune): index
+                for index, chunk in enumerate(chunks)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                chunk_results[index] = future.result()
+                if on_progress is not None:
+                    on_progress(len(chunks[index]))
+
+    return [metrics for chunk in chunk_results for metrics in chunk]
@@ -2,47 +2,98 @@
 # moomoo-grid-optimizer/src/parameter_optimizer.py
 
 import itertools
-from typing import Dict, List
+import math
+import os
+from functools import cached_property
+from typing import Callable, Dict, Iterator, List, Optional, Union
 import pandas as pd
 from .config import Config
+from .bar_pyramid import BarSeries
 from .backtest_engine import GridBacktester
+from .batch_engine import BatchGridBacktester
+from .data_cache import OrderDataCache
+from .incremental_sweep import IncrementalSweep
+from .instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from .data_loader import concat_order_chunks, iter_order_chunks, read_order_csv
+from .market_data import PriceSeries, PriceSeriesBuilder
+from .parallel_sweep import run_parallel_backtests
+from .pruning import PruningBounds, PruningTally, is_pruned
+from .result_cache import ResultCache
+from .result_collector import RankBy, ResultSink, TopKResults, open_result_sink, ranking_key
+from .search_strategies import SearchSpace, SearchStrategy
 from tqdm import tqdm
-import csv
 
 class ParameterOptimizer:
     """网格策略参数优化器"""
     
-    def __init__(self, csv_path: str, timeframe: str):
+    def __init__(self, csv_path: Optional[str], timeframe: str, use_cache: bool = False,
+                 chunksize: Optional[int] = None, use_result_cache: bool = False,
+                 orders_df: Optional[pd.DataFrame] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 price_series: Optional[PriceSeries] = None):
         """
         初始化优化器
         
         Args:
-            csv_path: CSV文件路径
+            csv_path: CSV文件路径 (提供 orders_df 时可为None)
             timeframe: 时间周期 ('daily' or '30min')
+            use_cache: 是否使用解析后订单数据的二进制缓存 (Config.CACHE_DIR)
+            chunksize: 指定时按该行数分块流式读取CSV, 只保留需要的列
+            use_result_cache: 是否把回测结果保存到持久化缓存, 再次优化时跳过已评估的组合
+            orders_df: 已加载的订单数据 (例如多标的导出中的一个标的), 提供时不再读取CSV
+            instrumentation: 性能统计 (见 instrumentation), 不提供时不做任何统计
+            price_series: 已构建的价格序列 (例如由新增订单逐次扩展的序列), 提供时不再读取
+                          订单数据 (orders_df 为 None, 参数范围按价格序列的标准差计算)
         """
         self.timeframe = timeframe
-        self.orders_df = self._load_csv(csv_path)
-        self.param_ranges = self._get_param_ranges()
+        self.use_cache = use_cache
+        self.chunksize = chunksize
+        self.price_series = price_series
+        self.prune_report = None
+        self.incremental_report = None  # 增量回放时 IncrementalSweep.report
+        self.result_cache = ResultCache() if use_result_cache else None
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        with self.instrumentation.phase('optimizer.load_csv'):
+            if price_series is not None:
+                self.orders_df = None
+            elif orders_df is not None:
+                self.orders_df = orders_df[
+                    (orders_df['成交价格'].notna()) & 
+                    (orders_df['成交数量'].notna())
+                ]
+            else:
+                self.orders_df = self._load_csv(csv_path)
+        # 只在加载时构建一次价格序列, 所有回测共享, 不再逐组合复制订单数据
+        if self.price_series is None:
+            with self.instrumentation.phase('optimizer.price_series'):
+                self.price_series = PriceSeries.from_orders(self.orders_df)
+
+    @classmethod
+    def from_bars(cls, bars: BarSeries, timeframe: Optional[str] = None, **kwargs) -> 'ParameterOptimizer':
+        """
+        在K线金字塔的一个周期上优化 (每根K线的收盘价作为一笔成交)
+
+        Args:
+            bars: BarPyramid.get 返回的K线
+            timeframe: 参数范围 ('daily' or '30min'), 默认由K线周期决定
+            **kwargs: 其他构造参数 (例如 use_result_cache、instrumentation)
+        """
+        return cls(None, timeframe or bars.timeframe, orders_df=bars.to_orders(), **kwargs)
 
     def _load_csv(self, csv_path: str) -> pd.DataFrame:
         """加载并处理CSV数据"""
         try:
-            # 尝试以不同格式读取CSV
-            try:
-                df = pd.read_csv(csv_path, quoting=csv.QUOTE_MINIMAL)
-            except:
-                df = pd.read_csv(csv_path, quoting=csv.QUOTE_ALL)
-            
-            # 统一处理时间列
-            df['成交时间'] = pd.to_datetime(df['成交时间'].str.strip(), format='%Y/%m/%d %H:%M:%S' if self.timeframe == 'daily' else '%Y/%m/%d %H:%M')
-            
-            # 确保数值列的类型
-            df['成交价格'] = pd.to_numeric(df['成交价格'], errors='coerce')
-            df['成交数量'] = pd.to_numeric(df['成交数量'], errors='coerce')
+            # 统一处理时间列, 按时间周期使用对应的格式
+            time_format = '%Y/%m/%d %H:%M:%S' if self.timeframe == 'daily' else '%Y/%m/%d %H:%M'
+            if self.use_cache:
+                df = OrderDataCache().load(csv_path)
+            elif self.chunksize:
+                return self._load_csv_chunked(csv_path, time_format)
+            else:
+                df = read_order_csv(csv_path, time_format=time_format)
             
             # 过滤有效交易
             df = df[
-                (df['交易状态'] == '全部成交') & 
                 (df['成交价格'].notna()) & 
                 (df['成交数量'].notna())
             ]
@@ -51,37 +102,213 @@ class ParameterOptimizer:
             
         except Exception as e:
             raise Exception(f"CSV加载失败: {str(e)}")
+    
+    def _load_csv_chunked(self, csv_path: str, time_format: str) -> pd.DataFrame:
+        """分块读取CSV, 每块过滤后直接追加到价格序列"""
+        builder = PriceSeriesBuilder()
+        chunks = []
+        for chunk in iter_order_chunks(csv_path, self.chunksize, time_format):
+            chunk = chunk[
+                (chunk['成交价格'].notna()) & 
+                (chunk['成交数量'].notna())
+            ]
+            builder.add_orders(chunk)
+            chunks.append(chunk)
         
-    def optimize(self) -> List[Dict]:
-        """执行参数优化"""
-        results = []
-        param_combinations = self._generate_param_combinations()
+        self.price_series = builder.build()
+        return concat_order_chunks(chunks)
         
-        print(f"\n开始{self.timeframe}参数优化...")
-        with tqdm(total=len(param_combinations), desc="参数组合测试") as pbar:
-            for params in param_combinations:
-                backtester = GridBacktester(self.orders_df.copy(), params)
-                metrics = backtester.run_backtest()
-                
-                if self._is_valid_result(metrics, verbose=False):
-                    results.append({
-                        'params': params,
-                        'metrics': metrics
-                    })
-                pbar.update(1)
-        
-        # 按收益率排序
-        results.sort(key=lambda x: x['metrics']['profit_ratio'], reverse=True)
+    def optimize(self, engine: str = 'batch', workers: Optional[int] = 1,
+                 strategy: Optional[SearchStrategy] = None, prune: bool = True,
+                 checkpoint_dir: Optional[str] = None, verbose: bool = True,
+                 top_k: Optional[int] = None, rank_by: RankBy = 'profit_ratio',
+                 result_sink: Union[str, ResultSink, None] = None) -> List[Dict]:
+        """
+        执行参数优化
+        
+        Args:
+            engine: 回测引擎 ('batch' 批量向量化回测, 'loop' 逐组合回放,
+                    'event' 逐组合事件驱动回放)
+            workers: 并行进程数, 1 为单进程, None 表示使用全部CPU
+            strategy: 参数搜索策略 (见 search_strategies), 默认为完整网格搜索
+            prune: 是否提前终止结果必然无效的回测 (不影响返回的有效结果)
+            checkpoint_dir: 指定时为每个参数组合保存检查点, 订单数据追加后只回放新增部分;
+                            参数组合与网格中心价格沿用第一次优化时的取值
+                            (增量回放固定使用批量引擎, 不提前终止)
+            verbose: 是否打印进度与统计信息
+            top_k: 只保留排序最靠前的 K 组有效结果, None 表示全部保留
+            rank_by: 有效结果的排序依据 (指标名称或 指标字典 -> 排序值 的函数, 越大越好)
+            result_sink: 流式输出每个完整数据上的回测结果 (.jsonl / .csv 路径或 ResultSink),
+                         每批结果写入后立即刷新到文件
+        
+        Returns:
+            List[Dict]: 按排序值从高到低排列的有效结果 ({'params', 'metrics'})
+        """
+        top = TopKResults(top_k, rank_by)
+        tally = PruningTally()
+        sink = open_result_sink(result_sink) if isinstance(result_sink, str) else result_sink
+        
+        def write(param_list: List[Dict], metrics_list: List[Dict]) -> List[bool]:
+            valid = [self._is_valid_result(metrics) for metrics in metrics_list]
+            if sink is not None:
+                sink.write(param_list, metrics_list, valid)
+            return valid
+        
+        def collect(param_list: List[Dict], metrics_list: List[Dict]):
+            with self.instrumentation.phase('optimizer.rank'):
+                for params, metrics, valid in zip(param_list, metrics_list,
+                                                  write(param_list, metrics_list)):
+                    if valid:
+                        top.add(params, metrics)
+        
+        log = print if verbose else (lambda *args, **kwargs: None)
+        log(f"\n开始{self.timeframe}参数优化...")
+        try:
+            if checkpoint_dir is not None:
+                if strategy is not None:
+                    raise ValueError("增量回放只支持完整网格搜索")
+                sweep = IncrementalSweep(checkpoint_dir)
+                param_combinations = sweep.param_combinations or self._generate_param_combinations()
+                metrics_list = sweep.update(self.price_series, param_combinations)
+                tally.add(metrics_list)
+                collect(param_combinations, metrics_list)
+                self.incremental_report = sweep.report
+                log(f"\n增量回放: {sweep.report['new_prices']}/{sweep.report['total_prices']} 个价格点, "
+                      f"{sweep.report['resumed']} 组从检查点继续")
+            elif strategy is None:
+                # 分批生成、回测与汇总, 内存占用与参数组合总数无关
+                combinations = self._iter_param_combinations()
+                with tqdm(total=self._count_param_combinations(), desc="参数组合测试",
+                          disable=not verbose) as pbar:
+                    while True:
+                        param_list = list(itertools.islice(combinations, Config.RESULT_CHUNK_SIZE))
+                        if not param_list:
+                            break
+                        metrics_list = self._run_backtests(param_list, engine, workers, pbar.update,
+                                                           prune=prune)
+                        tally.add(metrics_list)
+                        collect(param_list, metrics_list)
+            else:
+                with tqdm(desc="参数组合测试", disable=not verbose) as pbar:
+                    def evaluate(param_list: List[Dict], fraction: float) -> List[Dict]:
+                        metrics_list = self._run_backtests(param_list, engine, workers, pbar.update,
+                                                           series=self.price_series.prefix(fraction),
+                                                           prune=prune)
+                        tally.add(metrics_list)
+                        if fraction >= 1.0:
+                            write(param_list, metrics_list)
+                        return metrics_list
+                    
+                    space = SearchSpace(self.param_ranges, self._build_params)
+                    evaluated = strategy.search(space, evaluate, self._rank_key(rank_by))
+                with self.instrumentation.phase('optimizer.rank'):
+                    for params, metrics in evaluated:
+                        if self._is_valid_result(metrics):
+                            top.add(params, metrics)
+        finally:
+            if sink is not None and sink is not result_sink:
+                sink.close()
+        
+        self.prune_report = tally.summary()
+        if self.prune_report['pruned']:
+            log(f"\n提前终止 {self.prune_report['pruned']}/{self.prune_report['total']} 组回测, "
+                  f"平均在 {self.prune_report['mean_fraction']:.0%} 数据处终止 "
+                  f"{self.prune_report['by_reason']}")
+        if self.result_cache is not None:
+            cache_report = self.result_cache.report()
+            log(f"结果缓存: 命中 {cache_report['hits']}, 未命中 {cache_report['misses']}, "
+                  f"共 {cache_report['entries']} 条")
+        
+        results = top.results()
         
         # 只打印最终结果数量
         if results:
-            print(f"\n找到 {len(results)} 组有效参数组合")
+            log(f"\n找到 {len(results)} 组有效参数组合")
+        
+        if self.instrumentation.enabled:
+            self.instrumentation.count('optimizer.combinations', tally.total)
+            self.instrumentation.count('optimizer.pruned', self.prune_report['pruned'])
+            self.instrumentation.count('optimizer.valid', len(results))
+            self._profile_combination(results, engine)
+            log("\n性能统计:\n" + self.instrumentation.report().format())
         
         return results
 
-    def _is_valid_result(self, metrics: Dict, verbose: bool = False) -> bool:
+    def _profile_combination(self, results: List[Dict], engine: str):
+        """用 cProfile 单独重新回测 instrumentation.profile_params 指定的参数组合"""
+        params = self.instrumentation.profile_params
+        if params == 'best':
+            params = results[0]['params'] if results else None
+        if params is None:
+            return
+        mode = 'event' if engine == 'event' else 'tick'
+        backtester = GridBacktester(self.price_series, params, keep_equity_curve=False)
+        self.instrumentation.profile(params, lambda: backtester.run_backtest(mode=mode))
+
+    def _run_backtests(self, param_combinations: List[Dict], engine: str,
+                       workers: Optional[int], on_progress: Callable[[int], None],
+                       series: Optional[PriceSeries] = None, prune: bool = False) -> List[Dict]:
+        """按指定引擎回测所有参数组合, 返回与参数组合一一对应的指标"""
+        if series is None:
+            series = self.price_series
+        if engine not in ('batch', 'loop', 'event'):
+            raise ValueError(f"未知的回测引擎: {engine}")
+        if self.result_cache is None:
+            with self.instrumentation.phase('optimizer.backtests'):
+                return self._execute_backtests(param_combinations, engine, workers, on_progress,
+                                               series, prune)
+        
+        # 只回测缓存中没有的组合
+        with self.instrumentation.phase('optimizer.result_cache'):
+            metrics_list = self.result_cache.get_many(series.fingerprint, param_combinations,
+                                                      allow_pruned=prune)
+        pending = [index for index, metrics in enumerate(metrics_list) if metrics is None]
+        self.instrumentation.count('optimizer.cached', len(param_combinations) - len(pending))
+        on_progress(len(param_combinations) - len(pending))
+        if pending:
+            pending_params = [param_combinations[index] for index in pending]
+            with self.instrumentation.phase('optimizer.backtests'):
+                computed = self._execute_backtests(pending_params, engine, workers, on_progress,
+                                                   series, prune)
+            with self.instrumentation.phase('optimizer.result_cache'):
+                self.result_cache.put_many(series.fingerprint, pending_params, computed)
+            for index, metrics in zip(pending, computed):
+                metrics_list[index] = metrics
+        return metrics_list
+
+    def _execute_backtests(self, param_combinations: List[Dict], engine: str,
+                           workers: Optional[int], on_progress: Callable[[int], None],
+                           series: PriceSeries, prune: bool) -> List[Dict]:
+        """实际执行回测 (不使用结果缓存)"""
+        if workers != 1:
+            worker_count = workers or os.cpu_count() or 1
+            chunk_size = max(1, min(Config.BATCH_SIZE, math.ceil(len(param_combinations) / (worker_count * 4))))
+            return run_parallel_backtests(series, param_combinations, engine,
+                                          worker_count, chunk_size, on_progress, prune)
+        
+        with self.instrumentation.phase('optimizer.pruning_bounds'):
+            bounds = PruningBounds(series.prices) if prune else None
+        metrics_list = []
+        if engine == 'batch':
+            batch_size = Config.BATCH_SIZE
+            for start in range(0, len(param_combinations), batch_size):
+                batch = param_combinations[start:start + batch_size]
+                metrics_list.extend(BatchGridBacktester(series, batch, bounds=bounds).run_backtest())
+                on_progress(len(batch))
+        else:
+            mode = 'event' if engine == 'event' else 'tick'
+            for params in param_combinations:
+                backtester = GridBacktester(series, params, keep_equity_curve=False,
+                                            record_trades=False, bounds=bounds,
+                                            instrumentation=self.instrumentation)
+                metrics_list.append(backtester.run_backtest(mode=mode))
+                on_progress(1)
+        return metrics_list
+
+    @staticmethod
+    def _is_valid_result(metrics: Dict, verbose: bool = False) -> bool:
         """检查回测结果是否满足基本条件"""
-        if not metrics:
+        if not metrics or is_pruned(metrics):
             return False
         
         checks = {
@@ -92,10 +319,28 @@ class ParameterOptimizer:
         }
         
         return all(checks.values())
+    
+    def _rank_key(self, rank_by: RankBy = 'profit_ratio') -> Callable[[Dict], tuple]:
+        """
+        搜索策略使用的排序键: 先看是否满足 _is_valid_result, 再按 rank_by
+
+        Args:
+            rank_by: 排序依据, 与 optimize 的 rank_by 相同
+                     (缺少该指标的结果, 例如没有成交而被提前终止的回测, 排在最后)
+        """
+        key = ranking_key(rank_by)
+        
+        def rank(metrics: Dict) -> tuple:
+            try:
+                value = key(metrics)
+            except KeyError:
+                value = float('-inf')
+            return (self._is_valid_result(metrics), value)
+        return rank
         
     def _calculate_order_quantity(self, deviation: float) -> int:
         """计算订单数量"""
-        avg_price = self.orders_df['成交价格'].mean()
+        avg_price = self.price_series.mean_price
         grid_capital = Config.INITIAL_CAPITAL * Config.SINGLE_GRID_MAX_RATIO
         
         # 基于网格间距调整数量
@@ -105,15 +350,36 @@ class ParameterOptimizer:
         
         return max(100, min(quantity, 1000))
     
+    @cached_property
+    def param_ranges(self) -> Dict:
+        """参数范围设置 (首次使用时计算, 增量回放沿用检查点中的参数组合时不需要计算)"""
+        return self._get_param_ranges()
+
     def _get_param_ranges(self) -> Dict:
         """获取参数范围设置"""
-        # 基于时间周期返回不同的参数范围
-        avg_price = self.orders_df['成交价格'].mean()
-        price_std = self.orders_df['成交价格'].std()
+        if self.orders_df is not None:
+            price_std = self.orders_df['成交价格'].std()
+        else:
+            price_std = pd.Series(self.price_series.prices).std()
+        return self.param_ranges_for(self.timeframe, self.price_series.mean_price, price_std)
+
+    @staticmethod
+    def param_ranges_for(timeframe: str, avg_price: float, price_std: float) -> Dict:
+        """
+        按价格统计量生成参数范围
+
+        Args:
+            timeframe: 时间周期 ('daily' or '30min')
+            avg_price: 平均价格 (网格中心价格)
+            price_std: 价格标准差
+
+        Returns:
+            Dict: 参数范围 (包括每个网格数量对应的持仓上限)
+        """
         volatility = price_std / avg_price
         
         # 根据波动率自适应调整参数范围
-        if self.timeframe == 'daily':
+        if timeframe == 'daily':
             param_ranges = {
                 'grid_counts': [3, 5, 7],
                 'deviation_ratios': [
@@ -145,6 +411,7 @@ class ParameterOptimizer:
         max_position = (max_position // 100) * 100  # 调整为100的整数倍
         
         # 为每个网格数量计算相应的position_limit
+        param_ranges['max_position'] = max_position
         param_ranges['position_limits'] = {
             grid_count: max_position // grid_count
             for grid_count in param_ranges['grid_counts']
@@ -152,26 +419,47 @@ class ParameterOptimizer:
         
         return param_ranges
 
+    def _build_params(self, grid_count: int, deviation: float, profit: float, step: float) -> Dict:
+        """按网格数量推导持仓上限与单次数量, 生成完整参数字典"""
+        return self.build_params(self.param_ranges, grid_count, deviation, profit, step)
+
+    @staticmethod
+    def build_params(param_ranges: Dict, grid_count: int, deviation: float, profit: float,
+                     step: float) -> Dict:
+        """按 param_ranges 中的持仓上限生成完整参数字典 (见 _build_params)"""
+        position_limit = param_ranges['position_limits'].get(
+            grid_count, param_ranges['max_position'] // grid_count
+        )
+        min_order_quantity = max(100, position_limit // 3)
+        
+        return {
+            'grid_count': grid_count,
+            'price_deviation': deviation,
+            'profit_ratio': profit,
+            'position_step': step,
+            'position_limit': position_limit,
+            'min_order_quantity': min_order_quantity
+        }
+
     def _generate_param_combinations(self) -> List[Dict]:
         """生成参数组合"""
-        combinations = []
-        
-        for grid_count in self.param_ranges['grid_counts']:
-            position_limit = self.param_ranges['position_limits'][grid_count]
-            min_order_quantity = max(100, position_limit // 3)
-            
-            for deviation in self.param_ranges['deviation_ratios']:
-                for profit in self.param_ranges['profit_ratios']:
-                    for step in self.param_ranges['position_steps']:
-                        params = {
-                            'grid_count': grid_count,
-                            'price_deviation': deviation,
-                            'profit_ratio': profit,
-                            'position_step': step,
-                            'position_limit': position_limit,
-                            'min_order_quantity': min_order_quantity
-                        }
-                        combinations.append(params)
-        
-        return combinations
-        
\ No newline at end of file
+        return list(self._iter_param_combinations())
+
+    def _iter_param_combinations(self) -> Iterator[Dict]:
+        """按网格数量、间距、止盈比例、建仓比例的顺序逐个生成参数组合"""
+        return self.combinations_for(self.param_ranges)
+
+    @staticmethod
+    def combinations_for(param_ranges: Dict) -> Iterator[Dict]:
+        """逐个生成 param_ranges 中的全部参数组合"""
+        for grid_count in param_ranges['grid_counts']:
+            for deviation in param_ranges['deviation_ratios']:
+                for profit in param_ranges['profit_ratios']:
+                    for step in param_ranges['position_steps']:
+                        yield ParameterOptimizer.build_params(param_ranges, grid_count, deviation,
+                                                              profit, step)
+
+    def _count_param_combinations(self) -> int:
+        """参数组合总数"""
+        return (len(self.param_ranges['grid_counts']) * len(self.param_ranges['deviation_ratios'])
+                * len(self.param_ranges['profit_ratios']) * len(self.param_ranges['position_steps']))
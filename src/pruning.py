@@ -0,0 +1,224 @@
+# src/pruning.py
+# moomoo-grid-optimizer/src/pruning.py
+
+from typing import Dict, Optional, Tuple
+import numpy as np
+from .config import Config
+from .grid_ladder import TRIGGER_TOLERANCE
+
+# 终止原因 (violations 返回的编号对应的名称, 0 表示不终止)
+PRUNE_REASONS = ('', 'max_drawdown', 'profit_ratio', 'trade_count', 'win_rate')
+
+# 收益上界的相对放宽量, 抵消对数收益累加的浮点误差
+PROFIT_BOUND_SLACK = 1e-6
+
+class PruningBounds:
+    """
+    回测提前终止的判定边界
+
+    把价格序列等分为若干块, 在每块起点检查回测能否仍然满足
+    Config.BACKTEST_METRICS; 一旦可以证明最终结果必然无效就提前终止:
+
+    - 最大回撤只增不减, 已超过上限即无效;
+    - 不加杠杆、不做空时, 相邻价格点之间权益最多按价格涨幅增长,
+      因此剩余数据上的收益上界为 当前权益 * exp(剩余正对数收益之和);
+    - 把每个网格的价格点标记为 "可买入" (不高于网格价格) 与 "可止盈"
+      (不低于止盈价格), 忽略其余价格点后连续相同标记构成一段:
+      同一网格两次卖出之间必须先买入, 所以剩余卖出次数不超过可止盈段数;
+      每个可买入段内最多买到持仓上限, 由此得到剩余成交次数的上界。
+      买入价格不高于网格价格, 不会计为盈利成交, 胜率上界只取决于剩余卖出次数。
+
+    每个 (网格价格, 止盈价格) 的分段统计只计算一次并缓存,
+    一个价格序列上的所有参数组合可以共享同一个实例。
+    """
+
+    def __init__(self, prices: np.ndarray, checkpoints: Optional[int] = None,
+                 criteria: Optional[Dict] = None):
+        """
+        初始化判定边界
+
+        Args:
+            prices: 按时间排序的价格数组
+            checkpoints: 检查点数量, 默认为 Config.PRUNE_CHECKPOINTS
+            criteria: 有效结果的判定标准, 默认为 Config.BACKTEST_METRICS
+        """
+        self.prices = np.asarray(prices, dtype=np.float64)
+        checkpoints = checkpoints or Config.PRUNE_CHECKPOINTS
+        self.criteria = criteria or Config.BACKTEST_METRICS
+        self.length = len(self.prices)
+
+        # 各块起点; 第一个块起点为0, 不做检查
+        self.starts = np.unique(np.linspace(0, self.length, checkpoints + 1).astype(np.int64)[:-1])
+
+        # 每个块起点之后 (含) 的正对数收益之和
+        gains = np.zeros(self.length)
+        if self.length > 1:
+            gains[1:] = np.maximum(np.diff(np.log(self.prices)), 0.0)
+        suffix = np.concatenate([np.cumsum(gains[::-1])[::-1], [0.0]])
+        self.log_gain = suffix[self.starts]
+        self._runs = {}
+
+    @property
+    def positions(self) -> np.ndarray:
+        """需要检查的价格点下标 (在处理该价格点之前检查)"""
+        return self.starts[1:]
+
+    def trade_capacity(self, grid_prices: np.ndarray, take_profit_prices: np.ndarray,
+                       buys_per_run) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        每个块起点之后剩余买入/卖出次数的上界
+
+        Args:
+            grid_prices: 网格价格, 形状 (..., 档位数), NaN 表示不存在的档位
+            take_profit_prices: 与 grid_prices 对应的止盈价格
+            buys_per_run: 一个可买入段内单个网格最多的买入次数
+                          (持仓上限 / 单次数量, 向上取整), 形状为 grid_prices 去掉最后一维
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (买入上界, 卖出上界), 形状均为 (..., 块数)
+        """
+        grid_prices = np.asarray(grid_prices, dtype=np.float64)
+        take_profit_prices = np.asarray(take_profit_prices, dtype=np.float64)
+        buy_runs = np.zeros(grid_prices.shape + (len(self.starts),), dtype=np.int64)
+        sell_runs = np.zeros_like(buy_runs)
+        for index in np.ndindex(grid_prices.shape):
+            if np.isnan(grid_prices[index]):
+                continue
+            buy_runs[index], sell_runs[index] = self._count_runs(
+                grid_prices[index] * (1 + TRIGGER_TOLERANCE),
+                take_profit_prices[index] * (1 - TRIGGER_TOLERANCE)
+            )
+        buys = (buy_runs * np.asarray(buys_per_run, dtype=np.int64)[..., None, None]).sum(axis=-2)
+        return buys, sell_runs.sum(axis=-2)
+
+    def _count_runs(self, buy_threshold: float, sell_threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """每个块起点之后 可买入段数 与 可止盈段数 (带缓存)"""
+        key = (buy_threshold, sell_threshold)
+        if key not in self._runs:
+            low = self.prices <= buy_threshold
+            high = self.prices >= sell_threshold
+            if buy_threshold >= sell_threshold:
+                # 两类价格点可能重叠, 退化为按价格点计数
+                low_counts = np.concatenate([np.cumsum(low[::-1])[::-1], [0]])[self.starts]
+                high_counts = np.concatenate([np.cumsum(high[::-1])[::-1], [0]])[self.starts]
+                self._runs[key] = (low_counts, high_counts)
+                return self._runs[key]
+
+            marked = np.flatnonzero(low | high)
+            is_high = high[marked]
+            is_start = np.ones(len(marked), dtype=bool)
+            is_start[1:] = is_high[1:] != is_high[:-1]
+            high_after = np.concatenate([np.cumsum((is_start & is_high)[::-1])[::-1], [0]])
+            low_after = np.concatenate([np.cumsum((is_start & ~is_high)[::-1])[::-1], [0]])
+
+            # 块起点之后第一个标记的价格点总是开始新的一段
+            first = np.searchsorted(marked, self.starts)
+            high_counts = high_after[first]
+            low_counts = low_after[first]
+            inside = first < len(marked)
+            continued = np.zeros(len(first), dtype=bool)
+            continued[inside] = ~is_start[first[inside]]
+            high_counts = high_counts + (continued & np.append(is_high, False)[first])
+            low_counts = low_counts + (continued & ~np.append(is_high, True)[first])
+            self._runs[key] = (low_counts, high_counts)
+        return self._runs[key]
+
+    def violations(self, block: int, equity, max_drawdown, trade_count, win_count,
+                   remaining_buys, remaining_sells) -> np.ndarray:
+        """
+        在第 block 个块起点检查是否可以提前终止 (参数可为标量或数组)
+
+        Args:
+            block: 块编号 (>= 1)
+            equity: 上一个价格点的市值权益
+            max_drawdown: 目前为止的最大回撤
+            trade_count: 目前为止的成交次数
+            win_count: 目前为止的盈利成交次数
+            remaining_buys: trade_capacity 中该块对应的剩余买入次数上界
+            remaining_sells: trade_capacity 中该块对应的剩余卖出次数上界
+
+        Returns:
+            np.ndarray: PRUNE_REASONS 中的编号, 0 表示继续回测
+        """
+        criteria = self.criteria
+        initial_capital = Config.INITIAL_CAPITAL
+        equity = np.asarray(equity, dtype=np.float64)
+        trade_count = np.asarray(trade_count)
+        remaining_sells = np.asarray(remaining_sells)
+        trade_bound = trade_count + np.asarray(remaining_buys) + remaining_sells
+        # 胜率 (w + s) / (t + s) 随剩余卖出次数 s 递增, 剩余买入只会降低胜率
+        win_bound = np.asarray(win_count) + remaining_sells
+        win_trades = trade_count + remaining_sells
+        profit_bound = (equity * np.exp(self.log_gain[block]) * (1 + PROFIT_BOUND_SLACK)
+                        - initial_capital) / initial_capital
+
+        reasons = np.zeros(np.broadcast(equity, trade_bound).shape, dtype=np.int8)
+        # 按优先级从低到高写入, 同时满足多个条件时保留编号最小的原因
+        reasons[win_bound < criteria['min_win_rate'] * win_trades * (1 - PROFIT_BOUND_SLACK)] = 4
+        reasons[trade_bound < criteria['min_trade_count']] = 3
+        reasons[profit_bound <= criteria['min_profit_ratio']] = 2
+        reasons[np.asarray(max_drawdown) > criteria['max_drawdown']] = 1
+        return reasons
+
+    def fraction(self, block: int) -> float:
+        """第 block 个块起点之前已处理的数据比例"""
+        return float(self.starts[block]) / self.length if self.length else 1.0
+
+def mark_pruned(metrics: Dict, reason: int, fraction: float) -> Dict:
+    """
+    在提前终止的回测指标上记录终止原因与位置
+
+    被终止的结果一定不满足有效性检查, 指标字典只用于统计。
+
+    Args:
+        metrics: 终止时的回测指标 (没有成交时为空字典)
+        reason: PRUNE_REASONS 中的编号
+        fraction: 终止时已处理的数据比例
+    """
+    metrics = dict(metrics)
+    metrics['pruned'] = PRUNE_REASONS[reason]
+    metrics['pruned_at'] = fraction
+    return metrics
+
+def is_pruned(metrics: Dict) -> bool:
+    """回测是否被提前终止"""
+    return bool(metrics) and 'pruned' in metrics
+
+class PruningTally:
+    """逐批累计提前终止统计, 不需要保留全部指标"""
+
+    def __init__(self):
+        self.total = 0
+        self.pruned = 0
+        self.by_reason = {}
+        self._fraction_sum = 0.0
+
+    def add(self, metrics_list) -> 'PruningTally':
+        """累计一批回测指标"""
+        for metrics in metrics_list:
+            self.total += 1
+            if is_pruned(metrics):
+                self.pruned += 1
+                self.by_reason[metrics['pruned']] = self.by_reason.get(metrics['pruned'], 0) + 1
+                self._fraction_sum += metrics['pruned_at']
+        return self
+
+    def summary(self) -> Dict:
+        """
+        Returns:
+            Dict: total / pruned 数量、按原因分类的数量、终止时平均已处理的数据比例
+        """
+        return {
+            'total': self.total,
+            'pruned': self.pruned,
+            'by_reason': dict(self.by_reason),
+            'mean_fraction': self._fraction_sum / self.pruned if self.pruned else 0.0
+        }
+
+def summarize_pruning(metrics_list) -> Dict:
+    """统计一次参数扫描中提前终止的回测 (见 PruningTally.summary)"""
+    return PruningTally().add(metrics_list).summary()
+
+def buys_per_run(position_limit, order_quantity):
+    """一个可买入段内单个网格最多的买入次数 (支持标量或数组)"""
+    return -(-np.asarray(position_limit) // np.maximum(np.asarray(order_quantity), 1))
@@ -0,0 +1,201 @@
+# src/result_cache.py
+# moomoo-grid-optimizer/src/result_cache.py
+
+import hashlib
+import json
+import numbers
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+from .config import Config
+from .pruning import is_pruned
+
+# 回测规则或指标计算方式变化时递增, 使旧结果自动失效
+ENGINE_VERSION = 1
+
+# 单条 SQL 语句中的最大参数数量
+_QUERY_CHUNK = 500
+
+def normalize_params(params: Dict) -> str:
+    """
+    参数字典的规范化表示 (键排序, 数值统一为Python类型)
+
+    Args:
+        params: 策略参数
+    """
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, bool) or value is None:
+            normalized[name] = value
+        elif isinstance(value, numbers.Integral):
+            normalized[name] = int(value)
+        else:
+            normalized[name] = round(float(value), 12)
+    return json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+
+def result_key(fingerprint: str, params: Dict) -> str:
+    """
+    回测结果的缓存键
+
+    由价格数据指纹、规范化参数、引擎版本与初始资金共同决定。
+
+    Args:
+        fingerprint: PriceSeries.fingerprint
+        params: 策略参数
+    """
+    payload = f'{ENGINE_VERSION}|{Config.INITIAL_CAPITAL!r}|{fingerprint}|{normalize_params(params)}'
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """
+    回测结果持久化缓存 (SQLite)
+
+    每条记录保存一组参数在一份价格数据上的回测指标。提前终止的结果
+    同时记录当时的判定标准, 只有判定标准不变且调用方允许时才会复用。
+    数据库超过大小上限时按最近使用时间淘汰旧结果。
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        初始化结果缓存
+
+        Args:
+            path: 数据库文件路径, 默认为 Config.CACHE_DIR 下的 backtest_results.sqlite
+            max_bytes: 数据库大小上限, 默认为 Config.RESULT_CACHE_MAX_MB
+        """
+        if path is None:
+            os.makedirs(Config.CACHE_DIR, exist_ok=True)
+            path = os.path.join(Config.CACHE_DIR, 'backtest_results.sqlite')
+        self.path = path
+        self.max_bytes = max_bytes or Config.RESULT_CACHE_MAX_MB * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            ' key TEXT PRIMARY KEY,'
+            ' metrics TEXT NOT NULL,'
+            ' criteria TEXT,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used)')
+        self._conn.commit()
+
+    def get_many(self, fingerprint: str, param_list: List[Dict],
+                 allow_pruned: bool = False) -> List[Optional[Dict]]:
+        """
+        查找一组参数的缓存结果
+
+        Args:
+            fingerprint: PriceSeries.fingerprint
+            param_list: 策略参数列表
+            allow_pruned: 是否接受提前终止的结果 (判定标准必须与当前一致)
+
+        Returns:
+            List[Optional[Dict]]: 与 param_list 一一对应, 未命中为None
+        """
+        keys = [result_key(fingerprint, params) for params in param_list]
+        rows = {}
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[start:start + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows.update(
+                (key, (metrics, criteria)) for key, metrics, criteria in self._conn.execute(
+                    f'SELECT key, metrics, criteria FROM results WHERE key IN ({placeholders})', chunk
+                )
+            )
+
+        current_criteria = _criteria_json()
+        results, used = [], []
+        for key in keys:
+            row = rows.get(key)
+            if row is not None and (row[1] is None or (allow_pruned and row[1] == current_criteria)):
+                results.append(json.loads(row[0]))
+                used.append(key)
+            else:
+                results.append(None)
+        self.hits += len(used)
+        self.misses += len(keys) - len(used)
+
+        if used:
+            now = time.time()
+            self._conn.executemany('UPDATE results SET last_used = ? WHERE key = ?',
+                                   [(now, key) for key in used])
+            self._conn.commit()
+        return results
+
+    def put_many(self, fingerprint: str, param_list: List[Dict], metrics_list: List[Dict]):
+        """
+        保存一组回测结果
+
+        Args:
+            fingerprint: PriceSeries.fingerprint
+            param_list: 策略参数列表
+            metrics_list: 与 param_list 一一对应的回测指标
+        """
+        if not param_list:
+            return
+        now = time.time()
+        criteria = _criteria_json()
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO results (key, metrics, criteria, last_used) VALUES (?, ?, ?, ?)',
+            [
+                (result_key(fingerprint, params), json.dumps(metrics),
+                 criteria if is_pruned(metrics) else None, now)
+                for params, metrics in zip(param_list, metrics_list)
+            ]
+        )
+        self._conn.commit()
+        self.stores += len(param_list)
+        self._evict()
+
+    def size_bytes(self) -> int:
+        """数据库中已使用页面的大小"""
+        page_size = self._conn.execute('PRAGMA page_size').fetchone()[0]
+        page_count = self._conn.execute('PRAGMA page_count').fetchone()[0]
+        free_pages = self._conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def _evict(self):
+        """超过大小上限时, 每次淘汰约10%最久未使用的结果, 直到低于上限"""
+        while self.size_bytes() > self.max_bytes:
+            count = self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            if count == 0:
+                break
+            batch = max(1, count // 10)
+            self._conn.execute(
+                'DELETE FROM results WHERE key IN '
+                '(SELECT key FROM results ORDER BY last_used LIMIT ?)', (batch,)
+            )
+            self._conn.commit()
+            self.evictions += batch
+
+    def report(self) -> Dict:
+        """命中/未命中等统计"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'entries': self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0],
+            'size_bytes': self.size_bytes()
+        }
+
+    def clear(self):
+        """删除全部缓存结果"""
+        self._conn.execute('DELETE FROM results')
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+def _criteria_json() -> str:
+    """当前的有效结果判定标准"""
+    return json.dumps(Config.BACKTEST_METRICS, sort_keys=True)
@@ -0,0 +1,175 @@
+# src/result_collector.py
+# moomoo-grid-optimizer/src/result_collector.py
+
+import csv
+import heapq
+import itertools
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+# 流式输出中的指标列 (参数列在前, 按第一条结果的参数顺序)
+RESULT_FIELDS = ('total_profit', 'profit_ratio', 'trade_count', 'win_rate',
+                 'max_drawdown', 'final_value', 'pruned', 'pruned_at')
+
+# CSV 输出中指标列名的前缀 (参数 profit_ratio 与指标 profit_ratio 同名)
+METRIC_PREFIX = 'metric_'
+
+RankBy = Union[str, Callable[[Dict], float]]
+
+def to_jsonable(value):
+    """json.dumps 的 default: 把 numpy 标量转换为Python类型, 其他对象转换为字符串"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def ranking_key(rank_by: RankBy) -> Callable[[Dict], float]:
+    """
+    把排序依据转换为 指标字典 -> 排序值 的函数 (值越大越好)
+
+    Args:
+        rank_by: 指标名称 (例如 'profit_ratio'), 或接收指标字典返回排序值的函数
+    """
+    if callable(rank_by):
+        return rank_by
+    return lambda metrics: metrics[rank_by]
+
+class TopKResults:
+    """
+    按排序值保留最优的 K 组有效结果
+
+    用大小为 K 的最小堆保存, 内存与参与比较的结果数量无关。
+    排序值相同时先加入的结果排在前面 (与对完整列表做稳定排序的结果一致)。
+    """
+
+    def __init__(self, k: Optional[int] = None, rank_by: RankBy = 'profit_ratio'):
+        """
+        初始化结果集合
+
+        Args:
+            k: 保留的结果数量, None 表示全部保留
+            rank_by: 排序依据, 见 ranking_key
+        """
+        if k is not None and k < 1:
+            raise ValueError("k 必须为正整数")
+        self.k = k
+        self.key = ranking_key(rank_by)
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def add(self, params: Dict, metrics: Dict):
+        """加入一组有效结果"""
+        # 堆顶是最差的结果; 排序值相同时后加入的更差
+        entry = (self.key(metrics), -next(self._sequence), params, metrics)
+        if self.k is None or len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def results(self) -> List[Dict]:
+        """按排序值从高到低排列的结果 ({'params', 'metrics'})"""
+        entries = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        return [{'params': params, 'metrics': metrics} for _, _, params, metrics in entries]
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+class ResultSink(ABC):
+    """
+    流式结果输出基类
+
+    每批结果写入后立即 flush, 优化中途异常退出时已写入的结果仍然完整可用。
+    文件已存在时追加写入。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def write(self, param_list: Iterable[Dict], metrics_list: Iterable[Dict],
+              valid_list: Iterable[bool]):
+        """
+        写入一批回测结果 (包括无效与提前终止的结果)
+
+        Args:
+            param_list: 参数组合
+            metrics_list: 对应的指标
+            valid_list: 对应结果是否有效
+        """
+        if self._file is None:
+            self._open()
+        for params, metrics, valid in zip(param_list, metrics_list, valid_list):
+            self._write_row(params, metrics, valid)
+            self.count += 1
+        self._file.flush()
+
+    @abstractmethod
+    def _open(self):
+        """打开输出文件 (设置 self._file)"""
+
+    @abstractmethod
+    def _write_row(self, params: Dict, metrics: Dict, valid: bool):
+        """写入一条结果"""
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'ResultSink':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class JsonlResultSink(ResultSink):
+    """每行一个JSON对象: {"params": ..., "metrics": ..., "valid": ...}"""
+
+    def _open(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _write_row(self, params: Dict, metrics: Dict, valid: bool):
+        self._file.write(json.dumps({'params': params, 'metrics': metrics, 'valid': valid},
+                                    ensure_ascii=False) + '\n')
+
+class CsvResultSink(ResultSink):
+    """
+    每行一组结果: 参数列、RESULT_FIELDS 指标列与 valid 列 (没有的指标为空)
+
+    指标列名带 METRIC_PREFIX 前缀, 读回的参数列与写入的参数字典相同。
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._writer = None
+
+    def _open(self):
+        # 追加到已有文件时沿用其表头
+        header = None
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), None)
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        if header:
+            self._writer = csv.DictWriter(self._file, header, restval='', extrasaction='ignore')
+
+    def _write_row(self, params: Dict, metrics: Dict, valid: bool):
+        if self._writer is None:
+            fields = list(params) + [METRIC_PREFIX + name for name in RESULT_FIELDS] + ['valid']
+            self._writer = csv.DictWriter(self._file, fields, restval='', extrasaction='ignore')
+            self._writer.writeheader()
+        row = dict(params)
+        row.update((METRIC_PREFIX + name, value) for name, value in metrics.items())
+        row['valid'] = valid
+        self._writer.writerow(row)
+
+def open_result_sink(path: str) -> ResultSink:
+    """按扩展名创建流式结果输出 (.jsonl 或 .csv)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return JsonlResultSink(path)
+    if extension == '.csv':
+        return CsvResultSink(path)
+    raise ValueError(f"不支持的结果输出格式: {path}")
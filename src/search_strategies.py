@@ -0,0 +1,246 @@
+# src/search_strategies.py
+# moomoo-grid-optimizer/src/search_strategies.py
+
+import itertools
+import math
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# 评估函数: (参数组合列表, 使用的数据比例) -> 与参数组合一一对应的回测指标
+Evaluator = Callable[[List[Dict], float], List[Dict]]
+# 排序键: 回测指标 -> 可比较的元组, 越大越好
+RankKey = Callable[[Dict], Tuple]
+
+# 连续参数保留的小数位数, 相同取值的组合只评估一次
+PARAM_DECIMALS = 4
+
+class SearchSpace:
+    """
+    参数搜索空间
+
+    由 ParameterOptimizer._get_param_ranges 的结果构建:
+    网格数量与建仓比例为离散取值, 网格间距与止盈比例在给定范围内连续取值。
+    """
+
+    def __init__(self, param_ranges: Dict, make_params: Callable[[int, float, float, float], Dict]):
+        """
+        初始化搜索空间
+
+        Args:
+            param_ranges: 参数范围设置
+            make_params: (grid_count, deviation, profit, step) -> 完整参数字典
+        """
+        self.param_ranges = param_ranges
+        self.make_params = make_params
+        self.grid_counts = sorted(param_ranges['grid_counts'])
+        self.position_steps = sorted(param_ranges['position_steps'])
+        self.deviation_bounds = (min(param_ranges['deviation_ratios']), max(param_ranges['deviation_ratios']))
+        self.profit_bounds = (min(param_ranges['profit_ratios']), max(param_ranges['profit_ratios']))
+
+    def build(self, grid_count: int, deviation: float, profit: float, step: float) -> Dict:
+        """生成参数字典, 连续参数统一保留 PARAM_DECIMALS 位小数"""
+        return self.make_params(int(grid_count), round(float(deviation), PARAM_DECIMALS),
+                                round(float(profit), PARAM_DECIMALS), step)
+
+    def grid_count_range(self) -> List[int]:
+        """细化与抽样时可用的网格数量 (与原取值奇偶性一致, 步长为2)"""
+        low, high = self.grid_counts[0], self.grid_counts[-1]
+        return list(range(low, high + 1, 2))
+
+def param_key(params: Dict) -> Tuple:
+    """参数组合的唯一标识"""
+    return tuple(sorted(params.items()))
+
+class SearchStrategy(ABC):
+    """参数搜索策略基类"""
+
+    @abstractmethod
+    def search(self, space: SearchSpace, evaluate: Evaluator,
+               rank_key: RankKey) -> List[Tuple[Dict, Dict]]:
+        """
+        执行搜索
+
+        Args:
+            space: 参数搜索空间
+            evaluate: 评估函数
+            rank_key: 排序键
+
+        Returns:
+            List[Tuple[Dict, Dict]]: 在全部数据上评估过的 (参数, 指标)
+        """
+
+class _Memo:
+    """记录已在全部数据上评估过的参数, 避免重复回测"""
+
+    def __init__(self, evaluate: Evaluator):
+        self.evaluate = evaluate
+        self.results: Dict[Tuple, Tuple[Dict, Dict]] = {}
+
+    def run(self, param_list: Iterable[Dict]) -> List[Tuple[Dict, Dict]]:
+        """评估尚未评估过的参数, 返回输入参数对应的 (参数, 指标)"""
+        unique = {}
+        for params in param_list:
+            unique.setdefault(param_key(params), params)
+        pending = [params for key, params in unique.items() if key not in self.results]
+        if pending:
+            for params, metrics in zip(pending, self.evaluate(pending, 1.0)):
+                self.results[param_key(params)] = (params, metrics)
+        return [self.results[key] for key in unique]
+
+class GridSearch(SearchStrategy):
+    """完整笛卡尔积搜索 (原有的优化方式)"""
+
+    def propose(self, space: SearchSpace) -> List[Dict]:
+        """粗网格上的全部参数组合"""
+        return [
+            space.make_params(grid_count, deviation, profit, step)
+            for grid_count in space.param_ranges['grid_counts']
+            for deviation in space.param_ranges['deviation_ratios']
+            for profit in space.param_ranges['profit_ratios']
+            for step in space.param_ranges['position_steps']
+        ]
+
+    def search(self, space, evaluate, rank_key):
+        combinations = self.propose(space)
+        return list(zip(combinations, evaluate(combinations, 1.0)))
+
+class CoarseToFineSearch(SearchStrategy):
+    """
+    由粗到细搜索
+
+    先评估粗网格, 每轮围绕排名靠前的组合生成更细的局部网格:
+    网格间距与止盈比例的步长逐轮减半, 网格数量尝试相邻取值。
+    """
+
+    def __init__(self, rounds: int = 3, top_n: int = 3, points: int = 3):
+        """
+        Args:
+            rounds: 细化轮数
+            top_n: 每轮围绕排名前 top_n 的组合细化
+            points: 每个连续参数在局部网格中的取值个数 (奇数)
+        """
+        self.rounds = rounds
+        self.top_n = top_n
+        self.points = points
+
+    def search(self, space, evaluate, rank_key):
+        memo = _Memo(evaluate)
+        memo.run(GridSearch().propose(space))
+
+        deviation_step = _axis_step(space.param_ranges['deviation_ratios'], space.deviation_bounds)
+        profit_step = _axis_step(space.param_ranges['profit_ratios'], space.profit_bounds)
+        grid_counts = space.grid_count_range()
+        for _ in range(self.rounds):
+            deviation_step /= 2
+            profit_step /= 2
+            ranked = sorted(memo.results.values(), key=lambda item: rank_key(item[1]), reverse=True)
+            candidates = []
+            for params, _metrics in ranked[:self.top_n]:
+                index = grid_counts.index(params['grid_count']) if params['grid_count'] in grid_counts else 0
+                neighbor_counts = grid_counts[max(0, index - 1):index + 2]
+                for grid_count, deviation, profit in itertools.product(
+                        neighbor_counts,
+                        _local_axis(params['price_deviation'], deviation_step, self.points),
+                        _local_axis(params['profit_ratio'], profit_step, self.points)):
+                    candidates.append(space.build(grid_count, deviation, profit, params['position_step']))
+            memo.run(candidates)
+
+        return list(memo.results.values())
+
+class SuccessiveHalvingSearch(SearchStrategy):
+    """
+    逐次减半搜索
+
+    先在较短的数据前缀上评估全部候选组合, 只保留排名前 1/eta 的组合,
+    再把数据长度放大 eta 倍继续评估, 直到使用全部数据。
+    """
+
+    def __init__(self, eta: int = 3, min_fraction: float = 1 / 9,
+                 sampler: Optional[SearchStrategy] = None):
+        """
+        Args:
+            eta: 每轮淘汰比例与数据增长倍数
+            min_fraction: 第一轮使用的数据比例
+            sampler: 生成候选组合的策略 (GridSearch 或 RandomSearch), 默认为完整网格
+        """
+        self.eta = eta
+        self.min_fraction = min_fraction
+        self.sampler = sampler or GridSearch()
+
+    def search(self, space, evaluate, rank_key):
+        candidates = list({param_key(params): params for params in self.sampler.propose(space)}.values())
+        fraction = self.min_fraction
+        while fraction < 1.0 and len(candidates) > 1:
+            metrics_list = evaluate(candidates, fraction)
+            ranked = sorted(zip(candidates, metrics_list), key=lambda item: rank_key(item[1]), reverse=True)
+            keep = max(1, math.ceil(len(candidates) / self.eta))
+            candidates = [params for params, _ in ranked[:keep]]
+            fraction *= self.eta
+
+        return list(zip(candidates, evaluate(candidates, 1.0)))
+
+class RandomSearch(SearchStrategy):
+    """
+    固定评估次数的随机抽样 / 拉丁超立方抽样
+
+    网格间距与止盈比例在参数范围内连续抽样, 网格数量与建仓比例在离散取值中抽样。
+    """
+
+    def __init__(self, budget: int = 50, method: str = 'lhs', seed: Optional[int] = None):
+        """
+        Args:
+            budget: 评估次数上限
+            method: 'random' 独立均匀抽样, 'lhs' 拉丁超立方抽样
+            seed: 随机种子
+        """
+        if method not in ('random', 'lhs'):
+            raise ValueError(f"未知的抽样方法: {method}")
+        self.budget = budget
+        self.method = method
+        self.seed = seed
+
+    def propose(self, space: SearchSpace) -> List[Dict]:
+        """抽样生成 budget 个参数组合 (可能有重复)"""
+        rng = np.random.default_rng(self.seed)
+        if self.method == 'lhs':
+            # 每个维度分成 budget 个等宽区间, 每个区间恰好抽一个点, 各维度独立打乱
+            strata = (np.arange(self.budget)[:, None] + rng.random((self.budget, 4))) / self.budget
+            for dim in range(4):
+                strata[:, dim] = rng.permutation(strata[:, dim])
+            samples = strata
+        else:
+            samples = rng.random((self.budget, 4))
+
+        grid_counts = space.grid_count_range()
+        steps = space.position_steps
+        return [
+            space.build(
+                grid_counts[min(int(u0 * len(grid_counts)), len(grid_counts) - 1)],
+                _scale(u1, space.deviation_bounds),
+                _scale(u2, space.profit_bounds),
+                steps[min(int(u3 * len(steps)), len(steps) - 1)]
+            )
+            for u0, u1, u2, u3 in samples.tolist()
+        ]
+
+    def search(self, space, evaluate, rank_key):
+        return _Memo(evaluate).run(self.propose(space))
+
+def _scale(unit: float, bounds: Tuple[float, float]) -> float:
+    """把 [0, 1) 内的值映射到参数范围"""
+    low, high = bounds
+    return low + unit * (high - low)
+
+def _axis_step(values: List[float], bounds: Tuple[float, float]) -> float:
+    """粗网格在某个连续参数上的平均步长"""
+    low, high = bounds
+    if len(values) > 1 and high > low:
+        return (high - low) / (len(values) - 1)
+    return abs(low) * 0.25 or 0.001
+
+def _local_axis(center: float, step: float, points: int) -> List[float]:
+    """以 center 为中心、间隔为 step 的局部取值 (只保留正值)"""
+    half = points // 2
+    values = [center + i * step for i in range(-half, half + 1)]
+    return [value for value in values if value > 0]
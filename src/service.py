@@ -0,0 +1,559 @@
+# src/service.py
+# moomoo-grid-optimizer/src/service.py
+
+import asyncio
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+from .config import Config
+from .data_cache import OrderDataCache
+from .data_loader import detect_timeframe, read_order_csv
+from .order_analyzer import GridOrderAnalyzer
+from .parallel_sweep import backtest_combinations
+from .parameter_optimizer import ParameterOptimizer
+from .result_cache import normalize_params
+from .result_collector import to_jsonable
+
+# 请求头与请求体的大小上限 (字节)
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+# 回测请求中可以省略的参数 (按网格数量由参数范围推导)
+DERIVED_PARAMS = ('position_limit', 'min_order_quantity')
+REQUIRED_PARAMS = ('grid_count', 'price_deviation', 'profit_ratio', 'position_step')
+
+# optimize 请求中可以作为 rank_by 的指标
+RANK_FIELDS = ('total_profit', 'profit_ratio', 'trade_count', 'win_rate', 'max_drawdown', 'final_value')
+
+class RequestError(ValueError):
+    """请求内容无效 (返回 400)"""
+
+class PreparedData:
+    """
+    常驻内存的一个订单文件: 解析后的订单数据, 以及按 (标的, 参数范围) 准备好的优化器
+
+    文件大小或修改时间变化后由 DataStore 整体重新加载。
+    """
+
+    def __init__(self, path: str, stat: os.stat_result, orders: pd.DataFrame):
+        self.path = path
+        self.stat_key = (stat.st_size, stat.st_mtime_ns)
+        self.orders = orders
+        self.symbols = [str(symbol) for symbol in orders['代码'].unique()]
+        self.lock = threading.Lock()
+        self._optimizers: Dict[Tuple[str, str], ParameterOptimizer] = {}
+        self._analysis: Dict[str, Dict] = {}
+        self._backtests: 'OrderedDict[str, Dict]' = OrderedDict()
+
+    def resolve_symbol(self, symbol: Optional[str]) -> str:
+        if symbol is None:
+            if len(self.symbols) != 1:
+                raise RequestError(f"订单导出包含多个标的, 需要指定 symbol: {self.symbols}")
+            return self.symbols[0]
+        if symbol not in self.symbols:
+            raise RequestError(f"订单导出中没有标的: {symbol}")
+        return symbol
+
+    def symbol_orders(self, symbol: str) -> pd.DataFrame:
+        if len(self.symbols) == 1:
+            return self.orders
+        return self.orders[self.orders['代码'] == symbol]
+
+    def optimizer(self, symbol: str, timeframe: str) -> ParameterOptimizer:
+        """
+        价格序列与参数范围已准备好的优化器 (每个标的与参数范围只构建一次)
+
+        Args:
+            symbol: 标的代码
+            timeframe: 'daily'、'30min' 或 'auto' (按成交时间间隔判断)
+        """
+        orders = self.symbol_orders(symbol)
+        if timeframe == 'auto':
+            timeframe = detect_timeframe(orders['成交时间'])
+        key = (symbol, timeframe)
+        with self.lock:
+            optimizer = self._optimizers.get(key)
+            if optimizer is None:
+                optimizer = ParameterOptimizer(None, timeframe, orders_df=orders)
+                self._optimizers[key] = optimizer
+        return optimizer
+
+    def analysis(self, symbol: str, initial_capital: float) -> Dict:
+        """订单分析与参数建议 (每个标的与初始资金只计算一次)"""
+        key = f'{symbol}|{initial_capital!r}'
+        with self.lock:
+            if key in self._analysis:
+                return self._analysis[key]
+        analyzer = GridOrderAnalyzer(initial_capital)
+        analyzer.add_orders(self.symbol_orders(symbol))
+        analysis = {
+            'symbol': symbol,
+            'time_frame': analyzer.time_frame,
+            'orders': len(analyzer.orders_df),
+            'analysis': analyzer.analyze_price_movement(),
+            'suggestions': analyzer.suggest_parameters()
+        }
+        with self.lock:
+            self._analysis[key] = analysis
+        return analysis
+
+    def cached_backtest(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            metrics = self._backtests.get(key)
+            if metrics is not None:
+                self._backtests.move_to_end(key)
+            return metrics
+
+    def store_backtest(self, key: str, metrics: Dict):
+        with self.lock:
+            self._backtests[key] = metrics
+            while len(self._backtests) > Config.SERVICE_BACKTEST_MEMO:
+                self._backtests.popitem(last=False)
+
+class DataStore:
+    """
+    已加载订单文件的LRU缓存
+
+    以文件绝对路径为键, 每次访问时检查文件大小与修改时间, 变化时重新加载;
+    超过 max_datasets 时淘汰最久未使用的文件。同一文件并发请求时只加载一次
+    (每个路径的加载锁在淘汰后保留, 淘汰与重新加载同时发生时也不会重复加载)。
+    """
+
+    def __init__(self, max_datasets: int = Config.SERVICE_MAX_DATASETS, use_cache: bool = False):
+        """
+        初始化缓存
+
+        Args:
+            max_datasets: 常驻内存的订单文件数量上限
+            use_cache: 是否通过 OrderDataCache 读取 (冷启动时跳过CSV解析)
+        """
+        self.max_datasets = max_datasets
+        self.use_cache = use_cache
+        self.loads = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, PreparedData]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, csv_path: str) -> PreparedData:
+        """
+        读取订单文件 (已加载且未变化时直接返回)
+
+        Args:
+            csv_path: 订单导出CSV
+        """
+        path = os.path.abspath(csv_path)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(path, threading.Lock())
+        with load_lock:
+            stat = os.stat(path)
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry.stat_key == (stat.st_size, stat.st_mtime_ns):
+                    self._entries.move_to_end(path)
+                    return entry
+
+            try:
+                orders = OrderDataCache().load(path) if self.use_cache else read_order_csv(path)
+            except (KeyError, ValueError, IsADirectoryError) as e:
+                raise RequestError(f"无法读取订单文件 {csv_path}: {e}") from e
+            orders = orders[(orders['成交价格'].notna()) & (orders['成交数量'].notna())]
+            if orders.empty:
+                raise RequestError(f"订单文件中没有有效成交: {csv_path}")
+            entry = PreparedData(path, stat, orders)
+            with self._lock:
+                self.loads += 1
+                self._entries[path] = entry
+                self._entries.move_to_end(path)
+                while len(self._entries) > self.max_datasets:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return entry
+
+    def paths(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+class OptimizationService:
+    """
+    常驻的优化服务
+
+    订单数据与准备好的优化器保留在内存中 (DataStore), 请求在线程池中执行;
+    内容相同的请求在第一个请求完成前到达时共享同一结果, 不重复计算。
+
+    请求为JSON对象, command 为 analyze / optimize / backtest / status:
+        analyze:  {"csv": 路径, "symbol": 可选, "capital": 可选}
+        optimize: {"csv": 路径, "symbol", "timeframe": auto/daily/30min, "engine",
+                   "top", "rank_by", "prune", "workers"}
+        backtest: {"csv": 路径, "symbol", "timeframe", "engine",
+                   "params": 参数字典或参数字典列表}
+    optimize 的 workers 为回测进程数 (默认 1, 0 表示允许的最大值),
+    不超过 Config.SERVICE_OPTIMIZE_WORKERS。
+    backtest 的参数可以省略 position_limit 与 min_order_quantity, 由参数范围推导
+    (与 optimize 生成的参数组合相同)。
+    """
+
+    def __init__(self, workers: int = Config.SERVICE_WORKERS,
+                 max_datasets: int = Config.SERVICE_MAX_DATASETS, use_cache: bool = False):
+        """
+        初始化服务
+
+        Args:
+            workers: 执行请求的线程数
+            max_datasets: 常驻内存的订单文件数量上限
+            use_cache: 是否通过 OrderDataCache 读取订单文件
+        """
+        self.store = DataStore(max_datasets, use_cache)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='grid-service')
+        self.workers = workers
+        self.started = time.time()
+        self.requests = 0
+        self.coalesced = 0
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    async def handle(self, request: Dict) -> Dict:
+        """
+        处理一个请求; 相同请求正在执行时等待其结果
+
+        Args:
+            request: JSON请求
+
+        Returns:
+            Dict: 命令结果
+        """
+        if not isinstance(request, dict):
+            raise RequestError("请求必须是JSON对象")
+        self.requests += 1
+        if request.get('command') == 'status':
+            return self.status()
+        key = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, self.execute, request)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # 一个客户端断开时不取消其他客户端共享的计算
+        return await asyncio.shield(future)
+
+    def execute(self, request: Dict) -> Dict:
+        """在工作线程中执行请求 (不做请求合并)"""
+        command = request.get('command')
+        handler = {
+            'analyze': self._analyze,
+            'optimize': self._optimize,
+            'backtest': self._backtest,
+        }.get(command)
+        if handler is None:
+            raise RequestError(f"未知的命令: {command}")
+        if not isinstance(request.get('csv'), str):
+            raise RequestError("缺少 csv (订单文件路径)")
+        entry = self.store.get(request['csv'])
+        return handler(entry, entry.resolve_symbol(request.get('symbol')), request)
+
+    def status(self) -> Dict:
+        return {
+            'uptime': time.time() - self.started,
+            'workers': self.workers,
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._in_flight),
+            'datasets': self.store.paths(),
+            'loads': self.store.loads,
+            'evictions': self.store.evictions
+        }
+
+    def _analyze(self, entry: PreparedData, symbol: str, request: Dict) -> Dict:
+        capital = request.get('capital', Config.INITIAL_CAPITAL)
+        if not _is_number(capital) or capital <= 0:
+            raise RequestError("capital 必须为正数")
+        return entry.analysis(symbol, float(capital))
+
+    def _optimize(self, entry: PreparedData, symbol: str, request: Dict) -> Dict:
+        optimizer = entry.optimizer(symbol, _timeframe(request))
+        # 浅拷贝共享价格序列与参数范围, 并发请求各自记录 prune_report
+        optimizer = copy.copy(optimizer)
+        results = optimizer.optimize(engine=_engine(request), workers=_workers(request),
+                                     prune=_prune(request), verbose=False,
+                                     top_k=_top(request), rank_by=_rank_by(request))
+        return {
+            'symbol': symbol,
+            'timeframe': optimizer.timeframe,
+            'combinations': optimizer._count_param_combinations(),
+            'prune_report': optimizer.prune_report,
+            'results': results
+        }
+
+    def _backtest(self, entry: PreparedData, symbol: str, request: Dict) -> Dict:
+        optimizer = entry.optimizer(symbol, _timeframe(request))
+        engine = _engine(request)
+        requested = request.get('params')
+        single = isinstance(requested, dict)
+        param_list = [requested] if single else requested
+        if not param_list or not isinstance(param_list, list):
+            raise RequestError("params 必须是参数字典或非空的参数字典列表")
+        param_list = [_complete_params(optimizer, params) for params in param_list]
+
+        # 只回测近期没有计算过的参数组合
+        prefix = f'{symbol}|{optimizer.timeframe}|{engine}|'
+        keys = [prefix + normalize_params(params) for params in param_list]
+        metrics_list = [entry.cached_backtest(key) for key in keys]
+        pending = [index for index, metrics in enumerate(metrics_list) if metrics is None]
+        if pending:
+            computed = backtest_combinations(optimizer.price_series,
+                                             [param_list[index] for index in pending], engine)
+            for index, metrics in zip(pending, computed):
+                metrics_list[index] = metrics
+                entry.store_backtest(keys[index], metrics)
+
+        results = [
+            {'params': params, 'metrics': metrics,
+             'valid': ParameterOptimizer._is_valid_result(metrics)}
+            for params, metrics in zip(param_list, metrics_list)
+        ]
+        return {
+            'symbol': symbol,
+            'timeframe': optimizer.timeframe,
+            'results': results[0] if single else results
+        }
+
+def _timeframe(request: Dict) -> str:
+    timeframe = request.get('timeframe', 'auto')
+    if timeframe not in ('auto', 'daily', '30min'):
+        raise RequestError(f"未知的时间周期: {timeframe}")
+    return timeframe
+
+def _engine(request: Dict) -> str:
+    engine = request.get('engine', 'batch')
+    if engine not in ('batch', 'loop', 'event'):
+        raise RequestError(f"未知的回测引擎: {engine}")
+    return engine
+
+def _prune(request: Dict) -> bool:
+    prune = request.get('prune', True)
+    if not isinstance(prune, bool):
+        raise RequestError("prune 必须为 true 或 false")
+    return prune
+
+def _top(request: Dict) -> Optional[int]:
+    """optimize 请求返回的结果数量 (null 表示全部)"""
+    top = request.get('top', 10)
+    if top is not None and (isinstance(top, bool) or not isinstance(top, int) or top < 1):
+        raise RequestError("top 必须为正整数或 null")
+    return top
+
+def _rank_by(request: Dict) -> str:
+    rank_by = request.get('rank_by', 'profit_ratio')
+    if rank_by not in RANK_FIELDS:
+        raise RequestError(f"rank_by 必须为以下指标之一: {', '.join(RANK_FIELDS)}")
+    return rank_by
+
+def _is_number(value) -> bool:
+    """JSON 数值 (不包括 true/false)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _workers(request: Dict) -> int:
+    """optimize 请求的回测进程数 (不超过 Config.SERVICE_OPTIMIZE_WORKERS)"""
+    workers = request.get('workers', 1)
+    if isinstance(workers, bool) or not isinstance(workers, int) or workers < 0:
+        raise RequestError("workers 必须为非负整数")
+    return min(workers or Config.SERVICE_OPTIMIZE_WORKERS, Config.SERVICE_OPTIMIZE_WORKERS)
+
+def _complete_params(optimizer: ParameterOptimizer, params: Dict) -> Dict:
+    """补全回测参数中省略的持仓上限与单次数量"""
+    if not isinstance(params, dict):
+        raise RequestError("参数必须是JSON对象")
+    missing = [name for name in REQUIRED_PARAMS if name not in params]
+    if missing:
+        raise RequestError(f"参数缺少: {', '.join(missing)}")
+    invalid = [name for name in REQUIRED_PARAMS + DERIVED_PARAMS
+               if name in params and (not _is_number(params[name]) or params[name] <= 0)]
+    if invalid:
+        raise RequestError(f"参数必须为正数: {', '.join(invalid)}")
+    if int(params['grid_count']) != params['grid_count']:
+        raise RequestError("grid_count 必须为整数")
+    if all(name in params for name in DERIVED_PARAMS):
+        return dict(params)
+    derived = optimizer._build_params(int(params['grid_count']), params['price_deviation'],
+                                      params['profit_ratio'], params['position_step'])
+    derived.update(params)
+    return derived
+
+def _encode(status: HTTPStatus, payload: Dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False, default=to_jsonable).encode('utf-8')
+    headers = (
+        f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+        'Content-Type: application/json; charset=utf-8\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+    )
+    return headers.encode('latin-1') + body
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, bytes]]:
+    """读取一个HTTP请求, 连接关闭时返回 None"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise RequestError("请求头过大") from None
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise RequestError("无效的请求行") from None
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise RequestError("无效的 Content-Length") from None
+    if length < 0:
+        raise RequestError("无效的 Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise RequestError("请求体过大")
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+class ServiceServer:
+    """
+    OptimizationService 的HTTP前端 (localhost TCP 或 Unix socket, HTTP/1.1 keep-alive)
+
+    POST /<command> 或 POST / (command 写在请求体中), 请求体为JSON;
+    GET /status 返回服务状态。响应为 {"ok": true, "result": ...}
+    或 {"ok": false, "error": ...}。
+    """
+
+    def __init__(self, service: OptimizationService):
+        self.service = service
+        self.server = None
+        self._clients = set()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765,
+                    unix_path: Optional[str] = None) -> str:
+        """
+        开始监听
+
+        Args:
+            host: TCP 监听地址 (默认只监听本机)
+            port: TCP 端口, 0 表示自动分配
+            unix_path: 指定时改为监听该 Unix socket
+
+        Returns:
+            str: 实际监听的地址
+        """
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self.server = await asyncio.start_unix_server(self._serve_client, unix_path,
+                                                          limit=MAX_HEADER_BYTES)
+            return unix_path
+        self.server = await asyncio.start_server(self._serve_client, host, port,
+                                                 limit=MAX_HEADER_BYTES)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f'http://{host}:{port}'
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            # 关闭空闲的 keep-alive 连接, 使对应的处理协程正常结束
+            handlers = list(self._clients)
+            for task, writer in handlers:
+                writer.close()
+            await asyncio.gather(*(task for task, _ in handlers), return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = (asyncio.current_task(), writer)
+        self._clients.add(client)
+        try:
+            while True:
+                try:
+                    parsed = await _read_request(reader)
+                except RequestError as e:
+                    writer.write(_encode(HTTPStatus.BAD_REQUEST, {'ok': False, 'error': str(e)}, False))
+                    break
+                if parsed is None:
+                    break
+                method, target, headers, body = parsed
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                status, payload = await self._dispatch(method, target, body)
+                writer.write(_encode(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.discard(client)
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[HTTPStatus, Dict]:
+        command = target.split('?', 1)[0].strip('/')
+        try:
+            if method == 'GET' and command == 'status':
+                request = {'command': 'status'}
+            elif method == 'POST':
+                request = json.loads(body.decode('utf-8')) if body else {}
+                if not isinstance(request, dict):
+                    raise RequestError("请求必须是JSON对象")
+                if command:
+                    request['command'] = command
+            else:
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'ok': False, 'error': f"不支持的请求: {method} {target}"}
+            return HTTPStatus.OK, {'ok': True, 'result': await self.service.handle(request)}
+        except (RequestError, json.JSONDecodeError, UnicodeDecodeError, FileNotFoundError) as e:
+            # 只有请求本身的问题返回 400, 服务内部的异常返回 500
+            return HTTPStatus.BAD_REQUEST, {'ok': False, 'error': str(e)}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, unix_path: Optional[str] = None,
+                workers: int = Config.SERVICE_WORKERS,
+                max_datasets: int = Config.SERVICE_MAX_DATASETS, use_cache: bool = False,
+                preload: Optional[List[str]] = None):
+    """
+    启动服务并一直运行到被中断
+
+    Args:
+        host: TCP 监听地址
+        port: TCP 端口
+        unix_path: 指定时改为监听该 Unix socket
+        workers: 执行请求的线程数
+        max_datasets: 常驻内存的订单文件数量上限
+        use_cache: 是否通过 OrderDataCache 读取订单文件
+        preload: 启动时预先加载的订单文件
+    """
+    service = OptimizationService(workers, max_datasets, use_cache)
+    server = ServiceServer(service)
+    try:
+        loop = asyncio.get_running_loop()
+        for csv_path in preload or []:
+            await loop.run_in_executor(service.executor, service.store.get, csv_path)
+        address = await server.start(host, port, unix_path)
+        print(f"优化服务已启动: {address}", flush=True)
+        await server.server.serve_forever()
+    finally:
+        await server.stop()
+        service.close()
+        if unix_path and os.path.exists(unix_path):
+            os.unlink(unix_path)
@@ -0,0 +1,443 @@
+# src/sharded_sweep.py
+# moomoo-grid-optimizer/src/sharded_sweep.py
+
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+import numpy as np
+from .config import Config
+from .market_data import PriceSeries
+from .parallel_sweep import backtest_combinations
+from .parameter_optimizer import ParameterOptimizer
+from .pruning import PruningBounds, PruningTally
+from .result_collector import JsonlResultSink, RankBy, TopKResults
+
+# 工作目录格式版本, 修改目录布局时递增
+SHARD_FORMAT_VERSION = 1
+
+class ShardedSweep:
+    """
+    基于工作目录的分片参数扫描
+
+    工作目录中保存价格序列、按编号拆分的参数组合分片与清单 (manifest.json)。
+    任意数量的工作进程 (同一台机器, 或共享文件系统的多台机器) 以原子创建
+    锁文件的方式领取分片, 完成后把该分片的全部结果原子地写入 results 目录;
+    结果文件存在即表示分片已完成。进程中途退出时锁文件会过期 (同一台机器上
+    进程不存在时立即过期), 重新运行只处理未完成的分片。合并时按分片编号顺序
+    汇总, 排名与一次性运行 optimize() 相同。
+    """
+
+    def __init__(self, work_dir: str, lock_timeout: Optional[float] = None):
+        """
+        打开已创建的工作目录
+
+        Args:
+            work_dir: 工作目录
+            lock_timeout: 锁文件多久 (秒) 没有更新视为持有者已退出,
+                          默认为 Config.SHARD_LOCK_TIMEOUT
+        """
+        self.work_dir = work_dir
+        self.lock_timeout = lock_timeout or Config.SHARD_LOCK_TIMEOUT
+        self.manifest = self._read_manifest(work_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f"不是有效的分片扫描工作目录: {work_dir}")
+        self.prune_report = None
+        self._series = None
+
+    @classmethod
+    def create(cls, work_dir: str, optimizer: ParameterOptimizer, shard_size: Optional[int] = None,
+               engine: str = 'batch', prune: bool = True) -> 'ShardedSweep':
+        """
+        把优化器的全部参数组合写入工作目录
+
+        工作目录已经为同一份价格数据、同样的设置创建过时直接打开 (保留已完成的分片);
+        价格数据或设置 (分片大小、回测引擎、是否提前终止) 不同则报错,
+        避免把不同数据或设置的结果合并在一起。
+
+        Args:
+            work_dir: 工作目录
+            optimizer: 已加载订单数据的参数优化器
+            shard_size: 每个分片的参数组合数量, 默认为 Config.SHARD_SIZE
+            engine: 回测引擎 ('batch'、'loop' 或 'event')
+            prune: 是否提前终止结果必然无效的回测
+        """
+        series = optimizer.price_series
+        shard_size = shard_size or Config.SHARD_SIZE
+        manifest = cls._read_manifest(work_dir)
+        if manifest is not None:
+            if manifest['fingerprint'] != series.fingerprint:
+                raise ValueError(f"工作目录 {work_dir} 属于另一份价格数据")
+            settings = {'shard_size': shard_size, 'engine': engine, 'prune': prune}
+            for name, value in settings.items():
+                if manifest[name] != value:
+                    raise ValueError(f"工作目录 {work_dir} 的 {name} 为 {manifest[name]!r}, "
+                                     f"与请求的 {value!r} 不同")
+            return cls(work_dir)
+
+        for name in ('shards', 'locks', 'results'):
+            os.makedirs(os.path.join(work_dir, name), exist_ok=True)
+        np.save(os.path.join(work_dir, 'prices.npy'), series.prices)
+        np.save(os.path.join(work_dir, 'times.npy'), series.times)
+
+        # 逐个分片写入, 不需要一次生成全部参数组合
+        combinations = optimizer._iter_param_combinations()
+        shard_count = 0
+        total = 0
+        while True:
+            param_list = [params for _, params in zip(range(shard_size), combinations)]
+            if not param_list:
+                break
+            _write_json(os.path.join(work_dir, 'shards', _shard_name(shard_count) + '.json'), param_list)
+            shard_count += 1
+            total += len(param_list)
+
+        # 清单最后写入, 清单存在即表示工作目录完整
+        _write_json(os.path.join(work_dir, 'manifest.json'), {
+            'version': SHARD_FORMAT_VERSION,
+            'timeframe': optimizer.timeframe,
+            'fingerprint': series.fingerprint,
+            'mean_price': series.mean_price,
+            'engine': engine,
+            'prune': prune,
+            'shard_size': shard_size,
+            'shard_count': shard_count,
+            'combinations': total
+        })
+        return cls(work_dir)
+
+    @property
+    def shard_count(self) -> int:
+        return self.manifest['shard_count']
+
+    @property
+    def series(self) -> PriceSeries:
+        """工作目录中的价格序列 (只读内存映射)"""
+        if self._series is None:
+            self._series = PriceSeries(
+                prices=np.load(os.path.join(self.work_dir, 'prices.npy'), mmap_mode='r'),
+                times=np.load(os.path.join(self.work_dir, 'times.npy'), mmap_mode='r'),
+                mean_price=self.manifest['mean_price']
+            )
+        return self._series
+
+    def is_done(self, shard: int) -> bool:
+        """分片是否已完成"""
+        return os.path.exists(self._result_path(shard))
+
+    def status(self) -> Dict:
+        """
+        各状态的分片数量
+
+        Returns:
+            Dict: shards 分片总数、done 已完成、running 被未过期的锁持有、pending 等待处理
+        """
+        done = running = 0
+        for shard in range(self.shard_count):
+            if self.is_done(shard):
+                done += 1
+            elif os.path.exists(self._lock_path(shard)) and not self._is_stale(self._lock_path(shard)):
+                running += 1
+        return {'shards': self.shard_count, 'done': done, 'running': running,
+                'pending': self.shard_count - done - running}
+
+    def claim(self) -> Optional[int]:
+        """
+        领取一个未完成的分片
+
+        Returns:
+            Optional[int]: 分片编号, 没有可领取的分片时为None
+        """
+        for shard in range(self.shard_count):
+            if not self.is_done(shard) and self._acquire(shard):
+                # 领取期间其他进程可能刚好完成了该分片
+                if self.is_done(shard):
+                    self._release(shard)
+                    continue
+                return shard
+        return None
+
+    def run_shard(self, shard: int):
+        """回测一个已领取的分片并写入结果, 完成后释放锁"""
+        lock_path = self._lock_path(shard)
+        series = self.series
+        bounds = PruningBounds(series.prices) if self.manifest['prune'] else None
+        param_list = _read_json(os.path.join(self.work_dir, 'shards', _shard_name(shard) + '.json'))
+
+        result_path = self._result_path(shard)
+        tmp_path = f'{result_path}.{uuid.uuid4().hex}.tmp'
+        try:
+            # 心跳线程定期更新锁文件的修改时间, 单批回测耗时很长时也不会被判定为过期
+            with _Heartbeat(lock_path, self.lock_timeout / 4), JsonlResultSink(tmp_path) as sink:
+                for start in range(0, len(param_list), Config.BATCH_SIZE):
+                    batch = param_list[start:start + Config.BATCH_SIZE]
+                    metrics_list = backtest_combinations(series, batch, self.manifest['engine'], bounds)
+                    sink.write(batch, metrics_list,
+                               [ParameterOptimizer._is_valid_result(metrics) for metrics in metrics_list])
+            os.replace(tmp_path, result_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self._release(shard)
+
+    def work(self, max_shards: Optional[int] = None,
+             on_progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        循环领取并处理分片, 直到没有可领取的分片
+
+        Args:
+            max_shards: 最多处理的分片数量
+            on_progress: 每完成一个分片时回调, 参数为分片编号
+
+        Returns:
+            int: 本次处理的分片数量
+        """
+        processed = 0
+        while max_shards is None or processed < max_shards:
+            shard = self.claim()
+            if shard is None:
+                break
+            self.run_shard(shard)
+            processed += 1
+            if on_progress is not None:
+                on_progress(shard)
+        return processed
+
+    def iter_results(self) -> Iterator[Dict]:
+        """按分片编号与分片内顺序逐条读取已完成分片的结果 ({'params', 'metrics', 'valid'})"""
+        for shard in range(self.shard_count):
+            if not self.is_done(shard):
+                continue
+            with open(self._result_path(shard), encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def merge(self, top_k: Optional[int] = None, rank_by: RankBy = 'profit_ratio',
+              allow_partial: bool = False) -> List[Dict]:
+        """
+        汇总所有分片的结果并排名
+
+        Args:
+            top_k: 只保留排序最靠前的 K 组有效结果, None 表示全部保留
+            rank_by: 排序依据 (见 result_collector.ranking_key)
+            allow_partial: 是否允许在还有未完成分片时只汇总已完成的部分
+
+        Returns:
+            List[Dict]: 按排序值从高到低排列的有效结果 ({'params', 'metrics'})
+        """
+        unfinished = [shard for shard in range(self.shard_count) if not self.is_done(shard)]
+        if unfinished and not allow_partial:
+            raise RuntimeError(f"还有 {len(unfinished)} 个分片未完成")
+
+        top = TopKResults(top_k, rank_by)
+        tally = PruningTally()
+        for result in self.iter_results():
+            tally.add([result['metrics']])
+            if result['valid']:
+                top.add(result['params'], result['metrics'])
+        self.prune_report = tally.summary()
+        return top.results()
+
+    def _acquire(self, shard: int) -> bool:
+        """原子地创建锁文件; 锁已过期时先把它改名移走再重新创建"""
+        lock_path = self._lock_path(shard)
+        if os.path.exists(lock_path):
+            if not self._is_stale(lock_path):
+                return False
+            # 改名是原子操作, 多个进程同时发现过期锁时只有一个能移走它
+            stale_path = f'{lock_path}.{uuid.uuid4().hex}.stale'
+            try:
+                os.rename(lock_path, stale_path)
+            except OSError:
+                return False
+            # 判断过期与改名之间其他进程可能已经重新创建了锁: 移走的不是过期锁时放回原处
+            if not self._is_stale(stale_path):
+                self._restore_lock(stale_path, lock_path)
+                return False
+            self._remove_stale_locks(shard)
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'host': socket.gethostname(), 'pid': os.getpid(), 'claimed_at': time.time()}, f)
+        return True
+
+    @staticmethod
+    def _restore_lock(stale_path: str, lock_path: str):
+        """把误移走的有效锁放回原处 (硬链接不会覆盖已存在的锁文件)"""
+        try:
+            os.link(stale_path, lock_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            # 文件系统不支持硬链接
+            if not os.path.exists(lock_path):
+                os.rename(stale_path, lock_path)
+                return
+        try:
+            os.remove(stale_path)
+        except OSError:
+            pass
+
+    def _release(self, shard: int):
+        try:
+            os.remove(self._lock_path(shard))
+        except OSError:
+            pass
+
+    def _is_stale(self, lock_path: str) -> bool:
+        """锁文件超过 lock_timeout 没有更新, 或持有者是本机上已经退出的进程"""
+        try:
+            if time.time() - os.path.getmtime(lock_path) > self.lock_timeout:
+                return True
+            owner = _read_json(lock_path)
+        except (OSError, ValueError):
+            # 锁文件刚被删除或正在写入
+            return False
+        return owner.get('host') == socket.gethostname() and not _process_alive(owner.get('pid'))
+
+    def _remove_stale_locks(self, shard: int):
+        prefix = _shard_name(shard) + '.lock.'
+        directory = os.path.join(self.work_dir, 'locks')
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith('.stale'):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    def _lock_path(self, shard: int) -> str:
+        return os.path.join(self.work_dir, 'locks', _shard_name(shard) + '.lock')
+
+    def _result_path(self, shard: int) -> str:
+        return os.path.join(self.work_dir, 'results', _shard_name(shard) + '.jsonl')
+
+    @staticmethod
+    def _read_manifest(work_dir: str) -> Optional[Dict]:
+        try:
+            manifest = _read_json(os.path.join(work_dir, 'manifest.json'))
+        except (OSError, ValueError):
+            return None
+        if manifest.get('version') != SHARD_FORMAT_VERSION:
+            return None
+        return manifest
+
+def _shard_name(shard: int) -> str:
+    return f'shard-{shard:05d}'
+
+def _read_json(path: str):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json(path: str, value):
+    """先写临时文件再替换, 读取方不会看到写了一半的文件"""
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+class _Heartbeat:
+    """在后台线程中每隔 interval 秒更新一次锁文件的修改时间"""
+
+    def __init__(self, path: str, interval: float):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> '_Heartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            _touch(self.path)
+
+def _touch(path: str):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def _process_alive(pid: Optional[int]) -> bool:
+    """本机进程是否存在 (只在POSIX上检查, 其他平台视为存在, 只依赖超时判断)"""
+    if not pid or os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _work(work_dir: str, max_shards: Optional[int] = None) -> int:
+    """工作进程入口"""
+    return ShardedSweep(work_dir).work(max_shards)
+
+def run_sharded_sweep(optimizer: ParameterOptimizer, work_dir: str, workers: Optional[int] = 1,
+                      shard_size: Optional[int] = None, engine: str = 'batch', prune: bool = True,
+                      top_k: Optional[int] = None, rank_by: RankBy = 'profit_ratio') -> List[Dict]:
+    """
+    以分片方式执行完整网格搜索: 创建 (或继续) 工作目录, 在本机启动工作进程处理
+    未完成的分片, 最后合并排名
+
+    其他机器可以同时对共享文件系统上的同一工作目录运行
+    python -m src.sharded_sweep work <work_dir>, 领取剩余的分片。
+
+    Args:
+        optimizer: 已加载订单数据的参数优化器
+        work_dir: 工作目录
+        workers: 本机工作进程数, 1 为在当前进程中处理, None 表示使用全部CPU
+        shard_size: 每个分片的参数组合数量
+        engine: 回测引擎
+        prune: 是否提前终止结果必然无效的回测
+        top_k: 只保留排序最靠前的 K 组有效结果
+        rank_by: 排序依据
+
+    Returns:
+        List[Dict]: 与 optimize() 相同格式的有效结果
+    """
+    sweep = ShardedSweep.create(work_dir, optimizer, shard_size, engine, prune)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        sweep.work()
+    else:
+        workers = max(1, min(workers, sweep.shard_count))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(_work, work_dir) for _ in range(workers)]:
+                future.result()
+    return sweep.merge(top_k, rank_by, allow_partial=False)
+
+def main(argv: Optional[List[str]] = None):
+    """命令行入口: 查看状态、处理分片或合并结果"""
+    parser = argparse.ArgumentParser(description='分片参数扫描')
+    parser.add_argument('command', choices=['status', 'work', 'merge'])
+    parser.add_argument('work_dir')
+    parser.add_argument('--max-shards', type=int, default=None, help='work: 最多处理的分片数量')
+    parser.add_argument('--top', type=int, default=10, help='merge: 输出的结果数量')
+    parser.add_argument('--partial', action='store_true', help='merge: 允许只合并已完成的分片')
+    args = parser.parse_args(argv)
+
+    sweep = ShardedSweep(args.work_dir)
+    if args.command == 'status':
+        print(json.dumps(sweep.status(), ensure_ascii=False))
+    elif args.command == 'work':
+        count = sweep.work(args.max_shards, on_progress=lambda shard: print(f"完成分片 {shard}"))
+        print(f"共处理 {count} 个分片")
+    else:
+        for result in sweep.merge(args.top, allow_partial=args.partial):
+            print(json.dumps(result, ensure_ascii=False))
+
+if __name__ == '__main__':
+    main()
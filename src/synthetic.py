@@ -0,0 +1,200 @@
+# src/synthetic.py
+# moomoo-grid-optimizer/src/synthetic.py
+
+import math
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+# Moomoo 订单导出的表头 (与 data/ 中的导出文件一致, 末尾为一个空的说明列)
+EXPORT_HEADER = [
+    '代码', '名称', '交易状态', '方向', '订单价格', '订单数量', '已成交@均价', '操作', '下单时间',
+    '订单类型', '期限', '盘前竞价', '时段', '触发价', '卖空', '市场', '币种', '订单来源',
+    '成交数量', '成交价格', '成交金额', '成交时间', '市场', '币种', '对手经纪', '备注',
+    '交易活动费', '证监会规费', ' 合计费用', ' 当前费用为实盘收费估算值，可能与实盘存在差异'
+]
+
+# 各时间周期的成交时间格式 (与 ParameterOptimizer._load_csv 一致)
+TIME_FORMATS = {'daily': '%Y/%m/%d %H:%M:%S', '30min': '%Y/%m/%d %H:%M'}
+
+# 每个交易日的30分钟K线数量 (09:30 - 15:30)
+BARS_PER_DAY = 13
+
+# 均值回复路径按块递推, 块内用累积和向量化计算
+_OU_BLOCK = 1024
+
+# datetime64[ns] 可表示的最晚年份之前留出余量
+_LATEST_YEAR = 2200
+
+def generate_prices(count: int, model: str = 'gbm', start_price: float = 20.0,
+                    volatility: float = 0.6, drift: float = 0.0, reversion: float = 5.0,
+                    periods_per_year: int = 252 * BARS_PER_DAY,
+                    seed: Optional[int] = None) -> np.ndarray:
+    """
+    生成价格路径
+
+    Args:
+        count: 价格点数量
+        model: 'gbm' 几何布朗运动, 'ou' 对数价格围绕起始价格均值回复
+        start_price: 起始价格 (均值回复模型的长期均值)
+        volatility: 年化波动率
+        drift: 年化漂移 (仅 gbm)
+        reversion: 年化均值回复速度 (仅 ou)
+        periods_per_year: 每年的价格点数量
+        seed: 随机种子
+
+    Returns:
+        np.ndarray: 保留两位小数、不低于0.01的价格
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / periods_per_year
+    shocks = rng.standard_normal(count) * volatility * math.sqrt(dt)
+
+    if model == 'gbm':
+        log_prices = math.log(start_price) + np.cumsum((drift - 0.5 * volatility ** 2) * dt + shocks)
+    elif model == 'ou':
+        # 精确离散化: x[t+1] = mu + a * (x[t] - mu) + e[t], a = exp(-reversion * dt)
+        mean = math.log(start_price)
+        decay = math.exp(-reversion * dt)
+        log_prices = np.empty(count)
+        previous = mean
+        for start in range(0, count, _OU_BLOCK):
+            block = shocks[start:start + _OU_BLOCK]
+            weights = decay ** np.arange(1, len(block) + 1)
+            values = mean + weights * (previous - mean) + weights * np.cumsum(block / weights)
+            log_prices[start:start + len(block)] = values
+            previous = values[-1]
+    else:
+        raise ValueError(f"未知的价格模型: {model}")
+
+    return np.maximum(np.round(np.exp(log_prices), 2), 0.01)
+
+def generate_times(count: int, timeframe: str = '30min', fills_per_bar: int = 1,
+                   start: str = '2000-01-03') -> np.ndarray:
+    """
+    生成交易日内的成交时间 (跳过周末)
+
+    Args:
+        count: 成交数量
+        timeframe: 'daily' 每个交易日一根K线 (09:30:15), '30min' 每日13根30分钟K线
+        fills_per_bar: 每根K线内的成交数量 (同一根K线的成交时间相同)
+        start: 第一个交易日
+
+    Returns:
+        np.ndarray: datetime64[ns] 成交时间
+    """
+    if timeframe not in TIME_FORMATS:
+        raise ValueError(f"未知的时间周期: {timeframe}")
+    bars_per_day = 1 if timeframe == 'daily' else BARS_PER_DAY
+    bar_count = -(-count // fills_per_bar)
+    day_count = -(-bar_count // bars_per_day)
+
+    # 每年约 261 个工作日
+    if pd.Timestamp(start).year + day_count / 261 > _LATEST_YEAR:
+        raise ValueError("成交时间超出可表示范围, 请增大 fills_per_bar")
+    days = pd.bdate_range(start, periods=day_count).values
+    if timeframe == 'daily':
+        offsets = np.array([np.timedelta64(9 * 3600 + 30 * 60 + 15, 's')])
+    else:
+        offsets = np.timedelta64(9 * 60 + 30, 'm') + np.arange(BARS_PER_DAY) * np.timedelta64(30, 'm')
+    bars = (days[:, None] + offsets[None, :].astype('timedelta64[ns]')).ravel()[:bar_count]
+    return np.repeat(bars, fills_per_bar)[:count]
+
+def write_moomoo_export(path: str, prices: np.ndarray, times: np.ndarray, timeframe: str = '30min',
+                        symbol: str = 'SYNT', quantity: int = 200, cancelled_ratio: float = 0.0,
+                        seed: Optional[int] = None, chunk_size: int = 500000):
+    """
+    把价格路径写为 Moomoo 订单导出格式的CSV
+
+    价格下跌的成交记为买入, 其余记为卖出; 可按比例插入未成交 (已撤单) 的订单,
+    用于覆盖加载时的过滤逻辑。按块写入, 内存占用与总行数无关。
+
+    Args:
+        path: 输出文件路径
+        prices: 成交价格
+        times: 成交时间 (datetime64)
+        timeframe: 时间周期, 决定成交时间格式
+        symbol: 标的代码
+        quantity: 每笔成交数量
+        cancelled_ratio: 已撤单订单的比例
+        seed: 随机种子 (决定已撤单订单的位置)
+        chunk_size: 每次写入的行数
+    """
+    rng = np.random.default_rng(seed)
+    time_format = TIME_FORMATS[timeframe]
+    prices = np.asarray(prices, dtype=np.float64)
+    times = np.asarray(times, dtype='datetime64[ns]')
+    previous = np.concatenate([prices[:1], prices[:-1]])
+
+    # 各列都不含逗号和引号, 直接按行拼接比 DataFrame.to_csv 快得多
+    head = f'{symbol},{symbol} Synthetic,'
+    order_fields = ',限价单,当日有效,不允许,盘中,,,美国市场,美元,,'
+    tail = ',美国市场,美元,,,0,0,0.0,\n'
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write(','.join(EXPORT_HEADER) + '\n')
+        for start in range(0, len(prices), chunk_size):
+            stop = min(start + chunk_size, len(prices))
+            chunk_prices = prices[start:stop]
+            count = len(chunk_prices)
+            cancelled = rng.random(count) < cancelled_ratio
+
+            price_text = _format_cents(chunk_prices)
+            time_text = _format_times(times[start:stop], time_format)
+            amount_text = _format_cents(chunk_prices * quantity)
+            sides = pd.Series(np.where(chunk_prices < previous[start:stop], '买入', '卖出'), dtype=object)
+            status = pd.Series(np.where(cancelled, '已撤单', '全部成交'), dtype=object)
+            filled = pd.Series(np.where(cancelled, '0', str(quantity)), dtype=object)
+            fill_price = price_text.where(~cancelled, '')
+            fill_amount = amount_text.where(~cancelled, '0')
+            fill_time = time_text.where(~cancelled, '')
+
+            lines = (head + status + ',' + sides + ',' + price_text + f',{quantity},{quantity}@'
+                     + price_text + ',,' + time_text + order_fields + filled + ',' + fill_price
+                     + ',' + fill_amount + ',' + fill_time + tail)
+            f.write(''.join(lines.tolist()))
+
+def _format_cents(values: np.ndarray) -> pd.Series:
+    """按两位小数格式化 (先换算为整数分, 避免逐个调用 format)"""
+    cents = np.round(np.asarray(values) * 100).astype(np.int64)
+    sign = pd.Series(np.where(cents < 0, '-', ''), dtype=object)
+    cents = np.abs(cents)
+    return (sign + pd.Series(cents // 100).astype(str) + '.'
+            + pd.Series(cents % 100).astype(str).str.zfill(2))
+
+def _format_times(times: np.ndarray, time_format: str) -> pd.Series:
+    """格式化成交时间: 日期与时刻分别只格式化不重复的值"""
+    date_format, clock_format = time_format.split(' ')
+    days = times.astype('datetime64[D]')
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    unique_clocks, clock_index = np.unique(times - days, return_inverse=True)
+    day_text = pd.DatetimeIndex(unique_days).strftime(date_format).to_numpy(dtype=object)
+    clock_text = (pd.Timestamp(0) + pd.TimedeltaIndex(unique_clocks)).strftime(clock_format).to_numpy(dtype=object)
+    return pd.Series(day_text[day_index.ravel()]) + ' ' + pd.Series(clock_text[clock_index.ravel()])
+
+def generate_export(path: str, count: int, model: str = 'gbm', timeframe: str = '30min',
+                    fills_per_bar: Optional[int] = None, symbol: str = 'SYNT',
+                    seed: Optional[int] = 0, **price_options) -> str:
+    """
+    生成一个合成的 Moomoo 订单导出文件
+
+    Args:
+        path: 输出文件路径
+        count: 成交数量
+        model: 价格模型 ('gbm' 或 'ou')
+        timeframe: 时间周期 ('daily' 或 '30min')
+        fills_per_bar: 每根K线的成交数量, 默认按数量自动选择, 保证成交时间不超出可表示范围
+        symbol: 标的代码
+        seed: 随机种子, 相同参数与种子生成相同的文件
+        price_options: 传递给 generate_prices 的其他参数
+
+    Returns:
+        str: 输出文件路径
+    """
+    if fills_per_bar is None:
+        bars_per_day = 1 if timeframe == 'daily' else BARS_PER_DAY
+        fills_per_bar = max(1, -(-count // (bars_per_day * 252 * 150)))
+    periods_per_year = 252 * (1 if timeframe == 'daily' else BARS_PER_DAY) * fills_per_bar
+    prices = generate_prices(count, model, periods_per_year=periods_per_year, seed=seed, **price_options)
+    times = generate_times(count, timeframe, fills_per_bar)
+    write_moomoo_export(path, prices, times, timeframe, symbol, seed=seed)
+    return path
@@ -0,0 +1,122 @@
+# src/trade_log.py
+# moomoo-grid-optimizer/src/trade_log.py
+
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+class TradeLog:
+    """
+    列式成交记录
+
+    每一列是预分配的定长NumPy数组, 容量不足时按倍数扩容,
+    记录一笔成交只是写入几个数组元素, 不创建Python字典。
+    """
+
+    BUY = 1
+    SELL = -1
+
+    COLUMNS = {
+        'time': np.int64,       # 成交时间 (纳秒时间戳)
+        'side': np.int8,        # 方向 (BUY / SELL)
+        'price': np.float64,    # 成交价格
+        'quantity': np.int64,   # 成交数量
+        'level': np.int32,      # 网格档位
+    }
+
+    def __init__(self, capacity: int = 256):
+        """
+        初始化成交记录
+
+        Args:
+            capacity: 初始容量
+        """
+        self._size = 0
+        self._columns = {
+            name: np.empty(max(1, capacity), dtype=dtype)
+            for name, dtype in self.COLUMNS.items()
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> 'TradeLog':
+        """
+        由列数组恢复成交记录 (例如从检查点读取)
+
+        Args:
+            columns: 包含 COLUMNS 中全部列的等长数组
+        """
+        size = len(columns['time'])
+        log = cls(capacity=max(256, size))
+        for name, dtype in cls.COLUMNS.items():
+            log._columns[name][:size] = np.asarray(columns[name], dtype=dtype)
+        log._size = size
+        return log
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """已记录部分各列的副本"""
+        return {name: self.column(name).copy() for name in self.COLUMNS}
+
+    def append(self, time: int, side: int, price: float, quantity: int, level: int):
+        """追加一笔成交"""
+        if self._size == len(self._columns['time']):
+            self._grow()
+        index = self._size
+        columns = self._columns
+        columns['time'][index] = time
+        columns['side'][index] = side
+        columns['price'][index] = price
+        columns['quantity'][index] = quantity
+        columns['level'][index] = level
+        self._size = index + 1
+
+    def _grow(self):
+        """容量翻倍"""
+        for name, column in self._columns.items():
+            grown = np.empty(len(column) * 2, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def column(self, name: str) -> np.ndarray:
+        """已记录部分的列视图"""
+        return self._columns[name][:self._size]
+
+    @property
+    def time(self) -> np.ndarray:
+        return self.column('time')
+
+    @property
+    def side(self) -> np.ndarray:
+        return self.column('side')
+
+    @property
+    def price(self) -> np.ndarray:
+        return self.column('price')
+
+    @property
+    def quantity(self) -> np.ndarray:
+        return self.column('quantity')
+
+    @property
+    def level(self) -> np.ndarray:
+        return self.column('level')
+
+    def to_frame(self, grid_prices: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        转换为DataFrame (列与原先的成交字典一致)
+
+        Args:
+            grid_prices: 按档位索引的网格价格, 提供时增加 grid_price 列
+        """
+        frame = pd.DataFrame({
+            'time': pd.to_datetime(self.time),
+            'type': np.where(self.side == self.BUY, 'buy', 'sell'),
+            'price': self.price,
+            'quantity': self.quantity,
+            'grid_level': self.level
+        })
+        if grid_prices is not None:
+            frame['grid_price'] = np.asarray(grid_prices)[self.level]
+        return frame
@@ -0,0 +1,261 @@
+# src/walk_forward.py
+# moomoo-grid-optimizer/src/walk_forward.py
+
+import dataclasses
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .config import Config
+from .market_data import PriceSeries
+from .parallel_sweep import SharedPriceData, attach_shared_prices, backtest_combinations
+from .parameter_optimizer import ParameterOptimizer
+from .pruning import PruningBounds
+from .result_collector import TopKResults
+
+# 训练窗口少于该数量的价格点时无法计算波动率, 跳过该窗口
+MIN_TRAIN_PRICES = 2
+
+# 工作进程内挂载的共享价格序列 (由 _init_worker 设置)
+_worker_series = None
+
+_WEEK = np.int64(7 * 24 * 3600 * 10**9)
+
+@dataclass(frozen=True)
+class WalkForwardWindow:
+    """一个训练/验证窗口 (价格点下标为左闭右开区间)"""
+
+    index: int
+    train_start: int
+    train_stop: int
+    test_start: int
+    test_stop: int
+    train_from: int  # 训练窗口起始时间 (纳秒时间戳, 含)
+    test_from: int   # 验证窗口起始时间 (含)
+    test_to: int     # 验证窗口结束时间 (不含)
+
+class WindowStatistics:
+    """
+    价格序列的前缀和, O(1) 计算任意窗口的均值与标准差
+
+    相邻窗口大量重叠, 用前缀和代替逐窗口重新统计;
+    累加前先减去第一个价格, 减小平方和相减时的舍入误差。
+    """
+
+    def __init__(self, prices: np.ndarray):
+        prices = np.asarray(prices, dtype=np.float64)
+        self.shift = float(prices[0]) if len(prices) else 0.0
+        centered = prices - self.shift
+        self._sum = np.concatenate([[0.0], np.cumsum(centered)])
+        self._square_sum = np.concatenate([[0.0], np.cumsum(centered * centered)])
+
+    def mean_std(self, start: int, stop: int) -> Tuple[float, float]:
+        """
+        [start, stop) 区间价格的均值与样本标准差 (与 pandas 的 std 一致, ddof=1)
+        """
+        count = stop - start
+        total = self._sum[stop] - self._sum[start]
+        square_total = self._square_sum[stop] - self._square_sum[start]
+        mean = total / count
+        variance = max(square_total - total * mean, 0.0) / (count - 1) if count > 1 else float('nan')
+        return float(self.shift + mean), float(np.sqrt(variance))
+
+def plan_windows(times: np.ndarray, train_weeks: float = 4, test_weeks: float = 1,
+                 step_weeks: Optional[float] = None) -> List[WalkForwardWindow]:
+    """
+    按周划分滚动的训练/验证窗口
+
+    第一个窗口从第一笔成交所在周的周一开始, 之后每次向前滚动 step_weeks;
+    验证窗口紧接训练窗口, 最后一个验证窗口可以不足 test_weeks。
+
+    Args:
+        times: 按时间排序的成交时间 (纳秒时间戳)
+        train_weeks: 训练窗口长度 (周)
+        test_weeks: 验证窗口长度 (周)
+        step_weeks: 滚动步长 (周), 默认等于 test_weeks
+
+    Returns:
+        List[WalkForwardWindow]: 训练窗口至少有 MIN_TRAIN_PRICES 个价格点、
+                                 验证窗口非空的全部窗口
+    """
+    times = np.asarray(times, dtype=np.int64)
+    if len(times) == 0:
+        return []
+    step_weeks = step_weeks or test_weeks
+    train_length = np.int64(round(train_weeks * _WEEK))
+    test_length = np.int64(round(test_weeks * _WEEK))
+    step = np.int64(round(step_weeks * _WEEK))
+
+    first = pd.Timestamp(int(times[0])).normalize()
+    origin = np.int64((first - pd.Timedelta(days=first.weekday())).value)
+    last = times[-1]
+
+    windows = []
+    train_from = origin
+    while train_from + train_length <= last:
+        test_from = train_from + train_length
+        test_to = test_from + test_length
+        bounds = np.searchsorted(times, [train_from, test_from, test_to], side='left')
+        train_start, train_stop, test_stop = (int(bound) for bound in bounds)
+        if train_stop - train_start >= MIN_TRAIN_PRICES and test_stop > train_stop:
+            windows.append(WalkForwardWindow(
+                index=len(windows), train_start=train_start, train_stop=train_stop,
+                test_start=train_stop, test_stop=test_stop, train_from=int(train_from),
+                test_from=int(test_from), test_to=int(test_to)
+            ))
+        train_from += step
+    return windows
+
+def evaluate_window(series: PriceSeries, timeframe: str, window: WalkForwardWindow,
+                    center_price: float, price_std: float, engine: str = 'batch',
+                    prune: bool = True, top_n: int = 1) -> Dict:
+    """
+    在训练窗口上优化参数, 并在验证窗口上回测最优的 top_n 组参数
+
+    训练与验证窗口都是 series 的零拷贝切片; 两者的网格中心价格都取训练窗口的
+    平均价格, 验证时不使用训练窗口之后的信息。
+
+    Args:
+        series: 完整价格序列
+        timeframe: 时间周期 (决定参数范围)
+        window: plan_windows 生成的窗口
+        center_price: 训练窗口的平均价格
+        price_std: 训练窗口的价格标准差
+        engine: 回测引擎
+        prune: 训练时是否提前终止结果必然无效的回测
+        top_n: 进入验证的参数组数
+
+    Returns:
+        Dict: 窗口信息与 selected (每组参数的训练指标 train_metrics 与验证指标 test_metrics)
+    """
+    train = dataclasses.replace(series.slice(window.train_start, window.train_stop),
+                                mean_price=center_price)
+    test = dataclasses.replace(series.slice(window.test_start, window.test_stop),
+                               mean_price=center_price)
+
+    param_ranges = ParameterOptimizer.param_ranges_for(timeframe, center_price, price_std)
+    combinations = list(ParameterOptimizer.combinations_for(param_ranges))
+    bounds = PruningBounds(train.prices) if prune else None
+    top = TopKResults(top_n)
+    valid_count = 0
+    for start in range(0, len(combinations), Config.BATCH_SIZE):
+        batch = combinations[start:start + Config.BATCH_SIZE]
+        for params, metrics in zip(batch, backtest_combinations(train, batch, engine, bounds)):
+            if ParameterOptimizer._is_valid_result(metrics):
+                valid_count += 1
+                top.add(params, metrics)
+
+    selected = top.results()
+    test_metrics = []
+    if selected:
+        test_metrics = backtest_combinations(test, [result['params'] for result in selected], engine)
+    return {
+        'window': window.index,
+        'train_from': pd.Timestamp(window.train_from).isoformat(),
+        'test_from': pd.Timestamp(window.test_from).isoformat(),
+        'test_to': pd.Timestamp(window.test_to).isoformat(),
+        'train_prices': window.train_stop - window.train_start,
+        'test_prices': window.test_stop - window.test_start,
+        'center_price': center_price,
+        'volatility': price_std / center_price,
+        'combinations': len(combinations),
+        'valid_count': valid_count,
+        'selected': [
+            {'params': result['params'], 'train_metrics': result['metrics'], 'test_metrics': metrics}
+            for result, metrics in zip(selected, test_metrics)
+        ]
+    }
+
+def _init_worker(handle: Dict):
+    """工作进程初始化: 挂载共享价格数据"""
+    global _worker_series
+    _worker_series = attach_shared_prices(handle)
+
+def _evaluate_window_worker(timeframe: str, window: WalkForwardWindow, center_price: float,
+                            price_std: float, engine: str, prune: bool, top_n: int) -> Dict:
+    """在工作进程中评估一个窗口"""
+    return evaluate_window(_worker_series, timeframe, window, center_price, price_std,
+                           engine, prune, top_n)
+
+def run_walk_forward(optimizer: ParameterOptimizer, train_weeks: float = 4, test_weeks: float = 1,
+                     step_weeks: Optional[float] = None, engine: str = 'batch',
+                     workers: Optional[int] = 1, prune: bool = True, top_n: int = 1,
+                     on_progress: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    滚动窗口优化: 在每个训练窗口上优化参数, 在紧随其后的验证窗口上检验
+
+    所有窗口共享优化器已加载的价格数组 (零拷贝切片, 并行时以内存映射共享),
+    各窗口的均值/标准差由同一份前缀和得到。
+
+    Args:
+        optimizer: 已加载订单数据的参数优化器 (使用其价格序列与时间周期)
+        train_weeks: 训练窗口长度 (周)
+        test_weeks: 验证窗口长度 (周)
+        step_weeks: 滚动步长 (周), 默认等于 test_weeks
+        engine: 回测引擎 ('batch'、'loop' 或 'event')
+        workers: 并行评估窗口的进程数, 1 为在当前进程中依次评估, None 表示使用全部CPU
+        prune: 训练时是否提前终止结果必然无效的回测
+        top_n: 每个窗口进入验证的参数组数
+        on_progress: 每评估完一个窗口时回调, 参数为该窗口的结果
+
+    Returns:
+        List[Dict]: 按时间顺序排列的每个窗口的结果 (见 evaluate_window)
+    """
+    series = optimizer.price_series
+    windows = plan_windows(series.times, train_weeks, test_weeks, step_weeks)
+    statistics = WindowStatistics(series.prices)
+    tasks = [(window,) + statistics.mean_std(window.train_start, window.train_stop)
+             for window in windows]
+    outcomes = [None] * len(tasks)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        for index, (window, center_price, price_std) in enumerate(tasks):
+            outcomes[index] = evaluate_window(series, optimizer.timeframe, window, center_price,
+                                              price_std, engine, prune, top_n)
+            if on_progress is not None:
+                on_progress(outcomes[index])
+        return outcomes
+
+    with SharedPriceData(series) as shared:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                                 initargs=(shared.handle,)) as executor:
+            futures = {
+                executor.submit(_evaluate_window_worker, optimizer.timeframe, window,
+                                center_price, price_std, engine, prune, top_n): index
+                for index, (window, center_price, price_std) in enumerate(tasks)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                outcomes[index] = future.result()
+                if on_progress is not None:
+                    on_progress(outcomes[index])
+    return outcomes
+
+def summarize_walk_forward(outcomes: List[Dict]) -> Dict:
+    """
+    汇总各验证窗口中排名第一的参数的表现
+
+    Returns:
+        Dict: windows 窗口数、selected 有有效参数的窗口数、traded 验证期有成交的窗口数、
+              mean_test_profit 平均验证收益率、compounded_test_profit 依次复利的验证收益率、
+              positive_ratio 验证收益为正的窗口比例
+    """
+    profits = [
+        outcome['selected'][0]['test_metrics'].get('profit_ratio', 0.0)
+        for outcome in outcomes if outcome['selected']
+    ]
+    traded = sum(
+        1 for outcome in outcomes
+        if outcome['selected'] and outcome['selected'][0]['test_metrics']
+    )
+    return {
+        'windows': len(outcomes),
+        'selected': len(profits),
+        'traded': traded,
+        'mean_test_profit': float(np.mean(profits)) if profits else 0.0,
+        'compounded_test_profit': float(np.prod([1 + profit for profit in profits]) - 1),
+        'positive_ratio': float(np.mean([profit > 0 for profit in profits])) if profits else 0.0
+    }
@@ -0,0 +1,25 @@
+# tests/conftest.py
+# moomoo-grid-optimizer/tests/conftest.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from src.parameter_optimizer import ParameterOptimizer
+
+# 各时间周期的测试数据
+DATA_PATHS = {
+    '30min': os.path.join('data', 'mara-30min-20241001-1028.csv'),
+    'daily': os.path.join('data', 'mara-daily-20241001-1028.csv')
+}
+
+@pytest.fixture(scope='module', params=sorted(DATA_PATHS))
+def timeframe(request):
+    """测试使用的时间周期 (模块中定义同名夹具可以固定为某一周期)"""
+    return request.param
+
+@pytest.fixture(scope='module')
+def optimizer(timeframe):
+    """同一模块内共享的参数优化器"""
+    return ParameterOptimizer(DATA_PATHS[timeframe], timeframe)
@@ -0,0 +1,156 @@
+# tests/test_bar_pyramid.py
+# moomoo-grid-optimizer/tests/test_bar_pyramid.py
+
+import os
+import shutil
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from src import data_cache
+from src.bar_pyramid import BarPyramid, BarPyramidCache, build_pyramid, resample_bars
+from src.data_loader import read_order_csv
+from src.order_analyzer import GridOrderAnalyzer
+from src.parameter_optimizer import ParameterOptimizer
+from src.synthetic import generate_export
+
+CSV_PATH = os.path.join('data', 'mara-30min-20241001-1028.csv')
+
+def _random_fills(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-10-01 09:30').value
+    times = np.sort(start + rng.integers(0, 30 * 24 * 3600, count) * 10**9)
+    prices = np.round(20 + np.cumsum(rng.normal(0, 0.05, count)), 2)
+    quantities = rng.integers(1, 10, count) * 100.0
+    return times, prices, quantities
+
+@pytest.mark.parametrize('level, rule', [('5min', '5min'), ('30min', '30min'), ('daily', 'D'),
+                                         ('weekly', 'W-MON')])
+def test_resample_matches_pandas(level, rule):
+    times, prices, quantities = _random_fills(5000)
+    bars = resample_bars(times, prices, quantities, level, 'TEST')
+
+    frame = pd.DataFrame({'price': prices, 'quantity': quantities},
+                         index=pd.DatetimeIndex(times.view('datetime64[ns]')))
+    resampler = frame.resample(rule, label='left', closed='left')
+    expected = resampler['price'].ohlc().join(resampler['quantity'].sum()).join(
+        resampler['price'].count().rename('trades'))
+    expected = expected[expected['trades'] > 0]
+
+    np.testing.assert_array_equal(bars.times, expected.index.values.view(np.int64))
+    for name in ('open', 'high', 'low', 'close'):
+        np.testing.assert_array_equal(getattr(bars, name), expected[name].to_numpy())
+    np.testing.assert_array_equal(bars.volume, expected['quantity'].to_numpy())
+    np.testing.assert_array_equal(bars.trades, expected['trades'].to_numpy())
+
+def test_resample_rejects_unknown_level():
+    with pytest.raises(ValueError):
+        resample_bars(np.zeros(1, dtype=np.int64), np.ones(1), np.ones(1), '2min')
+
+def test_pyramid_per_symbol_and_level():
+    orders = read_order_csv(CSV_PATH)
+    other = orders.copy()
+    other['代码'] = 'RIOT'
+    pyramid = BarPyramid(build_pyramid(pd.concat([orders, other], ignore_index=True)))
+    assert pyramid.symbols == ['MARA', 'RIOT']
+    assert pyramid.levels == ['30min', 'daily']
+    with pytest.raises(ValueError):
+        pyramid.get('daily')
+
+    daily = pyramid.get('daily', 'MARA')
+    assert daily.timeframe == 'daily' and pyramid.get('30min', 'MARA').timeframe == '30min'
+    assert daily.trades.sum() == len(orders)
+    assert daily.close[-1] == orders.sort_values('成交时间', kind='stable')['成交价格'].iloc[-1]
+
+def test_cache_parses_once_for_both_profiles(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'orders.csv')
+    shutil.copy(CSV_PATH, csv_path)
+    parses = []
+    original = data_cache.read_order_csv_chunked
+    monkeypatch.setattr(data_cache, 'read_order_csv_chunked',
+                        lambda path: parses.append(path) or original(path))
+
+    cache = BarPyramidCache(str(tmp_path / 'cache'))
+    pyramid = cache.load(csv_path)
+    again = BarPyramidCache(str(tmp_path / 'cache')).load(csv_path)
+    assert len(parses) == 1
+    assert isinstance(again.get('daily').close, np.memmap)
+    for level in ('30min', 'daily'):
+        np.testing.assert_array_equal(again.get(level).close, pyramid.get(level).close)
+
+    for level in ('daily', '30min'):
+        optimizer = ParameterOptimizer.from_bars(again.get(level))
+        assert optimizer.timeframe == level
+        assert optimizer.price_series.fingerprint == again.get(level).to_price_series().fingerprint
+        optimizer.optimize(verbose=False)
+    assert len(parses) == 1
+
+    # 请求缓存中没有的周期时重新生成
+    weekly = BarPyramidCache(str(tmp_path / 'cache'), levels=('weekly',)).load(csv_path)
+    assert len(parses) == 2
+    assert weekly.levels == ['weekly']
+
+def test_cache_keeps_levels_across_requests(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'orders.csv')
+    shutil.copy(CSV_PATH, csv_path)
+    parses = []
+    original = data_cache.read_order_csv_chunked
+    monkeypatch.setattr(data_cache, 'read_order_csv_chunked',
+                        lambda path: parses.append(path) or original(path))
+    
+    # 交替请求不同的周期组合: 缺少的周期与已缓存的周期一起写入
+    cache_dir = str(tmp_path / 'cache')
+    default = BarPyramidCache(cache_dir).load(csv_path)
+    fine = BarPyramidCache(cache_dir, levels=('5min',)).load(csv_path)
+    again = BarPyramidCache(cache_dir).load(csv_path)
+    assert len(parses) == 2
+    assert fine.levels == ['5min'] and again.levels == default.levels
+    mixed = BarPyramidCache(cache_dir, levels=('daily', '5min')).load(csv_path)
+    assert len(parses) == 2
+    
+    expected = build_pyramid(read_order_csv(csv_path), ('5min', '30min', 'daily'))['MARA']
+    for pyramid in (again, mixed):
+        for level in pyramid.levels:
+            np.testing.assert_array_equal(pyramid.get(level).close, expected[level].close)
+
+def test_cache_uses_entry_of_concurrent_writer(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'orders.csv')
+    shutil.copy(CSV_PATH, csv_path)
+    cache_dir = str(tmp_path / 'cache')
+    original = data_cache.os.replace
+    raced = []
+
+    def racing_replace(src, dst):
+        # 替换缓存目录前, 另一个写入者先完成了同一缓存
+        if os.path.basename(src).startswith('.tmp-') and not raced:
+            raced.append(dst)
+            BarPyramidCache(cache_dir).load(csv_path)
+        return original(src, dst)
+    monkeypatch.setattr(data_cache.os, 'replace', racing_replace)
+
+    pyramid = BarPyramidCache(cache_dir).load(csv_path)
+    assert raced
+    assert not [name for name in os.listdir(os.path.dirname(raced[0])) if name.startswith('.tmp-')]
+    np.testing.assert_array_equal(pyramid.get('daily').close,
+                                  build_pyramid(read_order_csv(csv_path))['MARA']['daily'].close)
+
+def test_bars_of_single_fill_export_match_original_prices(tmp_path):
+    csv_path = generate_export(str(tmp_path / 'daily.csv'), 300, 'ou', timeframe='daily',
+                               fills_per_bar=1, seed=2)
+    bars = BarPyramid(build_pyramid(read_order_csv(csv_path))).get('daily')
+    original = ParameterOptimizer(csv_path, 'daily')
+    from_bars = ParameterOptimizer.from_bars(bars)
+    np.testing.assert_array_equal(from_bars.price_series.prices, original.price_series.prices)
+    assert from_bars.price_series.mean_price == original.price_series.mean_price
+    assert from_bars.optimize(verbose=False) == original.optimize(verbose=False)
+
+def test_analyzer_load_bars():
+    bars = BarPyramid(build_pyramid(read_order_csv(CSV_PATH))).get('daily')
+    analyzer = GridOrderAnalyzer()
+    analyzer.load_bars(bars)
+    assert analyzer.time_frame == 'daily'
+    assert analyzer.symbol == 'MARA'
+    assert analyzer.avg_price == pytest.approx(bars.close.mean())
+    assert analyzer.suggest_parameters()['time_frame'] == 'daily'
@@ -0,0 +1,30 @@
+# tests/test_batch_engine.py
+# moomoo-grid-optimizer/tests/test_batch_engine.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from src.parameter_optimizer import ParameterOptimizer
+from src.backtest_engine import GridBacktester
+from src.batch_engine import BatchGridBacktester
+
+@pytest.mark.parametrize('file_name, timeframe', [
+    ('mara-daily-20241001-1028.csv', 'daily'),
+    ('mara-30min-20241001-1028.csv', '30min'),
+])
+def test_batch_matches_loop(file_name, timeframe):
+    optimizer = ParameterOptimizer(os.path.join('data', file_name), timeframe)
+    param_combinations = optimizer._generate_param_combinations()
+    
+    batch_metrics = BatchGridBacktester(optimizer.orders_df, param_combinations).run_backtest()
+    
+    assert len(batch_metrics) == len(param_combinations)
+    for params, metrics in zip(param_combinations, batch_metrics):
+        expected = GridBacktester(optimizer.orders_df.copy(), params).run_backtest()
+        assert metrics == expected, params
+
+def test_optimize_engines_agree():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-30min-20241001-1028.csv'), '30min')
+    assert optimizer.optimize(engine='batch') == optimizer.optimize(engine='loop')
@@ -0,0 +1,64 @@
+# tests/test_batch_runner.py
+# moomoo-grid-optimizer/tests/test_batch_runner.py
+
+import os
+import shutil
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from src.batch_runner import build_ranking, load_symbol_jobs, optimize_symbols, run_symbol_jobs
+from src.parameter_optimizer import ParameterOptimizer
+
+DAILY = os.path.join('data', 'mara-daily-20241001-1028.csv')
+INTRADAY = os.path.join('data', 'mara-30min-20241001-1028.csv')
+
+def _write_mixed_export(path):
+    """把30分钟数据改为另一个标的, 与日线数据合并为一个导出文件"""
+    daily = pd.read_csv(DAILY, dtype=str)
+    intraday = pd.read_csv(INTRADAY, dtype=str)
+    intraday['代码'] = 'RIOT'
+    pd.concat([daily, intraday]).to_csv(path, index=False)
+
+def test_split_by_symbol_and_timeframe(tmp_path):
+    mixed = str(tmp_path / 'mixed.csv')
+    _write_mixed_export(mixed)
+    jobs = load_symbol_jobs(mixed)
+    
+    assert [(job.symbol, job.timeframe) for job in jobs] == [('RIOT', '30min'), ('MARA', 'daily')]
+    assert jobs[0].size > jobs[1].size
+    
+    # 目录中的两个文件: 同一标的的两个时间周期
+    directory = tmp_path / 'exports'
+    directory.mkdir()
+    shutil.copy(DAILY, str(directory))
+    shutil.copy(INTRADAY, str(directory))
+    jobs = load_symbol_jobs(str(directory))
+    assert sorted((job.symbol, job.timeframe) for job in jobs) == [('MARA', '30min'), ('MARA', 'daily')]
+
+def test_results_match_single_symbol_optimizer(tmp_path):
+    mixed = str(tmp_path / 'mixed.csv')
+    _write_mixed_export(mixed)
+    jobs = load_symbol_jobs(mixed)
+    
+    outcomes = run_symbol_jobs(jobs, workers=2)
+    expected = {
+        'MARA': ParameterOptimizer(DAILY, 'daily').optimize(),
+        'RIOT': ParameterOptimizer(INTRADAY, '30min').optimize()
+    }
+    for outcome in outcomes:
+        assert outcome['error'] is None
+        assert outcome['results'] == expected[outcome['symbol']]
+    
+    ranking = build_ranking(outcomes, top_n=2)
+    assert len(ranking) == 4
+    assert ranking['profit_ratio'].is_monotonic_decreasing
+    assert set(ranking['symbol_rank']) == {1, 2}
+
+def test_optimize_symbols_writes_ranking(tmp_path):
+    output = str(tmp_path / 'ranking.csv')
+    ranking = optimize_symbols(DAILY, output_path=output, workers=1, top_n=None, verbose=False)
+    
+    written = pd.read_csv(output)
+    assert len(written) == len(ranking) == len(ParameterOptimizer(DAILY, 'daily').optimize())
+    assert (written['symbol'] == 'MARA').all()
@@ -0,0 +1,115 @@
+# tests/test_checkpoint.py
+# moomoo-grid-optimizer/tests/test_checkpoint.py
+
+import dataclasses
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.backtest_engine import GridBacktester
+from src.batch_engine import BatchGridBacktester
+from src import incremental_sweep
+from src.checkpoint import BacktestCheckpoint
+from src.incremental_sweep import IncrementalSweep
+
+@pytest.mark.parametrize('mode', ['tick', 'event'])
+def test_resume_matches_full_replay(optimizer, tmp_path, mode):
+    series = optimizer.price_series
+    split = len(series) * 2 // 3
+    for params in optimizer._generate_param_combinations()[::7]:
+        full = GridBacktester(series, params)
+        expected = full.run_backtest(mode=mode)
+        
+        first = GridBacktester(series.slice(0, split), params)
+        first.run_backtest(mode=mode)
+        path = str(tmp_path / 'checkpoint.npz')
+        first.checkpoint().save(path)
+        
+        resumed = GridBacktester.resume(BacktestCheckpoint.load(path), series.slice(split, len(series)))
+        assert resumed.run_backtest(mode=mode) == expected
+        pd.testing.assert_frame_equal(resumed.trades.to_frame(), full.trades.to_frame())
+        
+        checkpoint = resumed.checkpoint()
+        assert checkpoint.processed == len(series)
+        assert checkpoint.positions.tolist() == full.positions.tolist()
+
+def test_resume_keeps_anchored_center(optimizer):
+    series = optimizer.price_series
+    params = optimizer._generate_param_combinations()[0]
+    first = GridBacktester(series.slice(0, 50), params)
+    first.run_backtest()
+    
+    # 新数据的平均价格不同, 网格仍使用检查点的中心价格
+    new_rows = dataclasses.replace(series.slice(50, len(series)), mean_price=series.mean_price * 2)
+    resumed = GridBacktester.resume(first.checkpoint(), new_rows, record_trades=False)
+    assert resumed.series.mean_price == series.mean_price
+    assert resumed.grid_prices == first.grid_prices
+    
+    with pytest.raises(ValueError):
+        GridBacktester.resume(resumed.checkpoint(), series.slice(0, 10))
+
+# 日线数据不足 100 个价格点
+@pytest.mark.parametrize('timeframe', ['30min'], scope='module')
+def test_incremental_sweep_matches_full_batch(optimizer, tmp_path):
+    series = optimizer.price_series
+    param_combinations = optimizer._generate_param_combinations()
+    sweep = IncrementalSweep(str(tmp_path))
+    
+    sweep.update(series.slice(0, 100), param_combinations)
+    assert sweep.center_price == series.mean_price
+    
+    # 追加数据, 并加入一组新的参数组合
+    extra = dict(param_combinations[0], grid_count=11, position_limit=100)
+    sweep = IncrementalSweep(str(tmp_path))
+    metrics = sweep.update(series, param_combinations + [extra])
+    assert sweep.report == {'resumed': len(param_combinations), 'replayed_full': 1,
+                            'new_prices': len(series) - 100, 'total_prices': len(series)}
+    
+    expected = BatchGridBacktester(series, param_combinations + [extra]).run_backtest()
+    assert metrics == expected
+    
+    # 没有新数据时直接返回保存的结果
+    again = IncrementalSweep(str(tmp_path))
+    assert again.update(series) == expected
+    assert again.report['new_prices'] == 0
+    assert len(os.listdir(str(tmp_path))) == 2
+
+@pytest.mark.parametrize('timeframe', ['30min'], scope='module')
+def test_incremental_sweep_checks_only_recent_window(optimizer, tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental_sweep, 'CHECK_WINDOW', 20)
+    hashed = []
+    original = incremental_sweep.window_hash
+    
+    def spy(series, stop, window=None):
+        digest = original(series, stop, window)
+        hashed.append(min(stop, incremental_sweep.CHECK_WINDOW))
+        return digest
+    monkeypatch.setattr(incremental_sweep, 'window_hash', spy)
+    
+    series = optimizer.price_series
+    param_combinations = optimizer._generate_param_combinations()[:5]
+    IncrementalSweep(str(tmp_path)).update(series.slice(0, 100), param_combinations)
+    
+    # 追加数据时只核对已回放部分的最后 CHECK_WINDOW 个价格点
+    hashed.clear()
+    sweep = IncrementalSweep(str(tmp_path))
+    sweep.update(series.slice(0, 150))
+    assert sweep.report['resumed'] == 5
+    assert hashed and max(hashed) == 20
+    
+    # 核对范围内的价格变化时改为完整回放
+    prices = series.prices[:200].copy()
+    prices[140] *= 1.01
+    changed = dataclasses.replace(series.slice(0, 200), prices=prices)
+    sweep = IncrementalSweep(str(tmp_path))
+    metrics = sweep.update(changed)
+    assert sweep.report['replayed_full'] == 5
+    assert metrics == BatchGridBacktester(changed, param_combinations).run_backtest()
+
+def test_optimizer_checkpoint_dir(optimizer, tmp_path):
+    expected = optimizer.optimize()
+    assert optimizer.optimize(checkpoint_dir=str(tmp_path)) == expected
+    assert optimizer.optimize(checkpoint_dir=str(tmp_path)) == expected
@@ -0,0 +1,91 @@
+# tests/test_cli.py
+# moomoo-grid-optimizer/tests/test_cli.py
+
+import json
+import os
+import subprocess
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from src.cli import main
+from src.config import Config
+from src.parameter_optimizer import ParameterOptimizer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join('data', 'mara-30min-20241001-1028.csv')
+
+def _run_isolated(code: str, cache_dir: str) -> subprocess.CompletedProcess:
+    """在新的解释器中运行, 检查是否导入了重量级模块"""
+    env = dict(os.environ, GRID_OPTIMIZER_CACHE=cache_dir)
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True,
+                          text=True, check=True)
+
+def test_package_import_is_lazy(tmp_path):
+    result = _run_isolated(
+        "import sys, src\n"
+        "print('pandas' in sys.modules, 'numpy' in sys.modules)\n"
+        "print(src.Config.INITIAL_CAPITAL, src.GridOrderAnalyzer.__name__)",
+        str(tmp_path)
+    )
+    assert result.stdout.splitlines() == ['False False', f'{Config.INITIAL_CAPITAL} GridOrderAnalyzer']
+
+def test_help_and_config_do_not_import_heavy_modules(tmp_path):
+    result = _run_isolated(
+        "import sys\n"
+        "from src.cli import main\n"
+        "try:\n"
+        "    main(['optimize', '--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "code = main(['config', '--profile-startup'])\n"
+        "print(code, 'pandas' in sys.modules, 'numpy' in sys.modules, 'tqdm' in sys.modules)",
+        str(tmp_path)
+    )
+    assert result.stdout.splitlines()[-1] == '0 False False False'
+    assert '命令总耗时' in result.stderr
+
+def test_config_validation_reports_problems(monkeypatch, capsys):
+    monkeypatch.setattr(Config, 'MAX_CAPITAL_USAGE', 1.5)
+    assert main(['config']) == 1
+    assert 'MAX_CAPITAL_USAGE' in capsys.readouterr().err
+
+def test_analyze_outputs_suggestions(capsys):
+    assert main(['analyze', os.path.join('data', 'mara-daily-20241001-1028.csv')]) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output['symbol'] == 'MARA'
+    assert output['time_frame'] == 'daily'
+    assert output['suggestions']['grid_count'] == Config.DEFAULT_GRID_COUNT['daily']
+
+def test_optimize_matches_optimizer(capsys):
+    assert main(['optimize', CSV_PATH, '--top', '3', '--profile-startup']) == 0
+    captured = capsys.readouterr()
+    output = json.loads(captured.out)
+    expected = ParameterOptimizer(CSV_PATH, '30min').optimize(verbose=False, top_k=3)
+    assert output['timeframe'] == '30min'
+    assert output['results'] == expected
+    assert '导入 parameter_optimizer' in captured.err
+
+def test_cached_output_skips_heavy_imports(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(tmp_path))
+    assert main(['optimize', os.path.join(ROOT, CSV_PATH), '--top', '2', '--cache-output']) == 0
+    first = capsys.readouterr().out
+
+    result = _run_isolated(
+        "import sys\n"
+        "from src.cli import main\n"
+        f"main(['optimize', {os.path.join(ROOT, CSV_PATH)!r}, '--top', '2', '--cache-output'])\n"
+        "print('pandas' in sys.modules, 'numpy' in sys.modules)",
+        str(tmp_path)
+    )
+    assert result.stdout == first + 'False False\n'
+
+def test_missing_file_returns_error(capsys):
+    assert main(['optimize', 'missing.csv']) == 1
+    assert main(['optimize', 'missing.csv', '--timeframe', 'daily']) == 1
+    assert '错误' in capsys.readouterr().err
+
+def test_benchmark_passes_arguments():
+    with pytest.raises(SystemExit) as excinfo:
+        main(['benchmark', '--', '--help'])
+    assert excinfo.value.code == 0
@@ -0,0 +1,99 @@
+# tests/test_data_cache.py
+# moomoo-grid-optimizer/tests/test_data_cache.py
+
+import os
+import shutil
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from src import data_cache
+from src.config import Config
+from src.data_cache import OrderDataCache
+from src.data_loader import ORDER_COLUMNS, read_order_csv
+from src.parameter_optimizer import ParameterOptimizer
+
+def test_cache_hit_and_invalidation(tmp_path):
+    csv_path = str(tmp_path / 'orders.csv')
+    shutil.copy(os.path.join('data', 'mara-30min-20241001-1028.csv'), csv_path)
+    cache = OrderDataCache(str(tmp_path / 'cache'))
+    
+    first = cache.load(csv_path)
+    second = cache.load(csv_path)
+    assert (cache.hits, cache.misses) == (1, 1)
+    expected = read_order_csv(csv_path)[ORDER_COLUMNS].reset_index(drop=True)
+    for name in ORDER_COLUMNS:
+        assert second[name].astype(object).tolist() == expected[name].astype(object).tolist()
+    assert first['成交价格'].equals(second['成交价格'])
+    
+    # 只改修改时间, 内容哈希不变时仍然命中
+    os.utime(csv_path, ns=(0, 0))
+    cache.load(csv_path)
+    assert (cache.hits, cache.misses) == (2, 1)
+    
+    # 内容变化后自动失效
+    with open(csv_path, encoding='utf-8-sig') as f:
+        lines = f.read().splitlines()
+    with open(csv_path, 'w', encoding='utf-8-sig') as f:
+        f.write('\n'.join(lines[:-10]) + '\n')
+    reloaded = cache.load(csv_path)
+    assert cache.misses == 2
+    assert len(reloaded) < len(second)
+
+def test_optimizer_with_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(tmp_path))
+    csv_path = os.path.join('data', 'mara-daily-20241001-1028.csv')
+    plain = ParameterOptimizer(csv_path, 'daily')
+    cached = ParameterOptimizer(csv_path, 'daily', use_cache=True)
+    cached_again = ParameterOptimizer(csv_path, 'daily', use_cache=True)
+    
+    for optimizer in (cached, cached_again):
+        assert np.array_equal(optimizer.price_series.prices, plain.price_series.prices)
+        assert np.array_equal(optimizer.price_series.times, plain.price_series.times)
+        assert optimizer.price_series.mean_price == plain.price_series.mean_price
+
+def test_concurrent_writer_entry_is_used(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'orders.csv')
+    shutil.copy(os.path.join('data', 'mara-daily-20241001-1028.csv'), csv_path)
+    cache_dir = str(tmp_path / 'cache')
+    original = data_cache.os.replace
+    replaced = []
+
+    def racing_replace(src, dst):
+        # 第一次替换缓存目录前, 另一个写入者先完成了同一缓存
+        if os.path.basename(src).startswith('.tmp-') and not replaced:
+            replaced.append(dst)
+            OrderDataCache(cache_dir).load(csv_path)
+        return original(src, dst)
+    monkeypatch.setattr(data_cache.os, 'replace', racing_replace)
+
+    cache = OrderDataCache(cache_dir)
+    df = cache.load(csv_path)
+    assert replaced
+    assert len(df) == len(read_order_csv(csv_path))
+    assert not [name for name in os.listdir(cache_dir) if name.startswith('.tmp-')]
+    monkeypatch.undo()
+    assert len(OrderDataCache(cache_dir).load(csv_path)) == len(df)
+
+def test_entry_removed_before_hit_is_reloaded(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'orders.csv')
+    shutil.copy(os.path.join('data', 'mara-daily-20241001-1028.csv'), csv_path)
+    cache = OrderDataCache(str(tmp_path / 'cache'))
+    expected = cache.load(csv_path)
+    
+    # 读取清单之后、读取各列之前, 另一个写入者删除了旧目录
+    original = cache._load_entry
+    removed = []
+
+    def racing_load(entry_dir, manifest):
+        if not removed:
+            removed.append(entry_dir)
+            shutil.rmtree(entry_dir)
+        return original(entry_dir, manifest)
+    monkeypatch.setattr(cache, '_load_entry', racing_load)
+    
+    df = cache.load(csv_path)
+    assert removed
+    assert (cache.hits, cache.misses) == (0, 2)
+    for name in ORDER_COLUMNS:
+        assert df[name].astype(object).tolist() == expected[name].astype(object).tolist()
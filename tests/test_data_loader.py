@@ -0,0 +1,41 @@
+# tests/test_data_loader.py
+# moomoo-grid-optimizer/tests/test_data_loader.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from src.data_loader import ORDER_COLUMNS, read_order_csv, read_order_csv_chunked
+from src.parameter_optimizer import ParameterOptimizer
+
+@pytest.mark.parametrize('file_name', ['mara-daily-20241001-1028.csv', 'mara-30min-20241001-1028.csv'])
+def test_chunked_matches_full_read(file_name):
+    csv_path = os.path.join('data', file_name)
+    full = read_order_csv(csv_path)[ORDER_COLUMNS].reset_index(drop=True)
+    chunked = read_order_csv_chunked(csv_path, chunksize=7)
+    
+    assert list(chunked.columns) == ORDER_COLUMNS
+    assert chunked['代码'].dtype == 'category'
+    for name in ORDER_COLUMNS:
+        assert chunked[name].astype(object).tolist() == full[name].astype(object).tolist()
+
+def test_chunked_float32_prices():
+    chunked = read_order_csv_chunked(os.path.join('data', 'mara-30min-20241001-1028.csv'),
+                                     chunksize=50, price_dtype=np.float32)
+    assert chunked['成交价格'].dtype == np.float32
+
+@pytest.mark.parametrize('file_name, timeframe', [
+    ('mara-daily-20241001-1028.csv', 'daily'),
+    ('mara-30min-20241001-1028.csv', '30min'),
+])
+def test_optimizer_streaming_series(file_name, timeframe):
+    csv_path = os.path.join('data', file_name)
+    plain = ParameterOptimizer(csv_path, timeframe)
+    streamed = ParameterOptimizer(csv_path, timeframe, chunksize=16)
+    
+    assert np.array_equal(streamed.price_series.prices, plain.price_series.prices)
+    assert np.array_equal(streamed.price_series.times, plain.price_series.times)
+    assert streamed.price_series.mean_price == plain.price_series.mean_price
+    assert streamed.optimize() == plain.optimize()
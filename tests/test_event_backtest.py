@@ -0,0 +1,68 @@
+# tests/test_event_backtest.py
+# moomoo-grid-optimizer/tests/test_event_backtest.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from src.parameter_optimizer import ParameterOptimizer
+from src.backtest_engine import GridBacktester
+from src.crossing_index import CrossingIndex
+from src.market_data import PriceSeries
+from src.pruning import PruningBounds
+from src.trade_log import TradeLog
+
+def test_crossing_index_matches_scan():
+    rng = np.random.default_rng(7)
+    prices = 16 + np.cumsum(rng.normal(0, 0.05, 20000))
+    index = CrossingIndex(prices)
+    for start in rng.integers(0, len(prices), 200).tolist() + [0, len(prices) - 1, len(prices)]:
+        for threshold in (prices.min() - 1, 14.0, 15.5, 16.0, 16.5, 18.0, prices.max() + 1):
+            below = np.flatnonzero(prices[start:] <= threshold)
+            above = np.flatnonzero(prices[start:] >= threshold)
+            assert index.next_at_or_below(start, threshold) == (start + below[0] if len(below) else len(prices))
+            assert index.next_at_or_above(start, threshold) == (start + above[0] if len(above) else len(prices))
+
+@pytest.mark.parametrize('file_name, timeframe', [
+    ('mara-daily-20241001-1028.csv', 'daily'),
+    ('mara-30min-20241001-1028.csv', '30min'),
+])
+def test_event_mode_matches_tick_mode(file_name, timeframe):
+    optimizer = ParameterOptimizer(os.path.join('data', file_name), timeframe)
+    for params in optimizer._generate_param_combinations():
+        tick = GridBacktester(optimizer.price_series, params)
+        event = GridBacktester(optimizer.price_series, params)
+        assert event.run_backtest(mode='event') == tick.run_backtest(mode='tick'), params
+        for name in TradeLog.COLUMNS:
+            assert (event.trades.column(name) == tick.trades.column(name)).all()
+
+    # 提前终止的原因与位置 (pruned/pruned_at) 也与逐点回放相同
+    bounds = PruningBounds(optimizer.price_series.prices)
+    for params in optimizer._generate_param_combinations():
+        tick = GridBacktester(optimizer.price_series, params, bounds=bounds)
+        event = GridBacktester(optimizer.price_series, params, bounds=bounds)
+        assert event.run_backtest(mode='event') == tick.run_backtest(mode='tick'), params
+
+def test_event_mode_matches_tick_mode_when_pruned():
+    # 最后一次成交之后仍有检查点的随机游走: 剩余检查点决定是否提前终止
+    rng = np.random.default_rng(1)
+    prices = np.round(20 * np.exp(np.cumsum(rng.normal(0, 0.002, 20000))), 2)
+    series = PriceSeries(prices, np.arange(len(prices), dtype=np.int64) * 10**9, float(prices.mean()))
+    bounds = PruningBounds(prices)
+    pruned = 0
+    for grid_count in (3, 5, 7):
+        for deviation in (0.005, 0.01, 0.03):
+            for profit in (0.003, 0.01, 0.02):
+                position_limit = 4000 // grid_count
+                params = {'grid_count': grid_count, 'price_deviation': deviation,
+                          'profit_ratio': profit, 'position_step': 0.2, 'position_limit': position_limit,
+                          'min_order_quantity': max(100, position_limit // 3)}
+                tick = GridBacktester(series, params, bounds=bounds).run_backtest(mode='tick')
+                event = GridBacktester(series, params, bounds=bounds).run_backtest(mode='event')
+                assert event.get('pruned') == tick.get('pruned'), params
+                assert event.get('pruned_at') == tick.get('pruned_at'), params
+                assert event == tick, params
+                pruned += 'pruned' in tick
+    assert pruned
@@ -0,0 +1,238 @@
+# tests/test_export_watcher.py
+# moomoo-grid-optimizer/tests/test_export_watcher.py
+
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+from src.data_loader import read_order_csv
+from src.export_watcher import ExportTail, ExportWatcher, WatchedExport
+from src.market_data import PriceSeries
+from src.order_analyzer import GridOrderAnalyzer
+from src.parameter_optimizer import ParameterOptimizer
+
+CSV_PATH = os.path.join('data', 'mara-30min-20241001-1028.csv')
+DAILY_CSV_PATH = os.path.join('data', 'mara-daily-20241001-1028.csv')
+
+def _lines(path: str):
+    with open(path, 'rb') as f:
+        return f.read().splitlines(keepends=True)
+
+def _write(path: str, lines, mode: str = 'wb'):
+    with open(path, mode) as f:
+        f.write(b''.join(lines))
+
+@pytest.mark.parametrize('source', [CSV_PATH, DAILY_CSV_PATH])
+def test_tail_parses_only_new_complete_lines(tmp_path, source):
+    lines = _lines(source)
+    path = str(tmp_path / 'orders.csv')
+    _write(path, lines[:10])
+    tail = ExportTail(path)
+    first, reset = tail.read_new_rows()
+    assert reset
+
+    # 写到一半的行留到下次读取
+    split = len(lines[10]) // 2
+    _write(path, [lines[10][:split]], 'ab')
+    assert tail.read_new_rows() == (None, False)
+    _write(path, [lines[10][split:]] + lines[11:], 'ab')
+    second, reset = tail.read_new_rows()
+    assert not reset
+    assert tail.read_new_rows() == (None, False)
+
+    combined = pd.concat([first, second], ignore_index=True)
+    pd.testing.assert_frame_equal(combined, read_order_csv(source).reset_index(drop=True))
+
+def test_tail_rereads_rewritten_file(tmp_path):
+    lines = _lines(CSV_PATH)
+    path = str(tmp_path / 'orders.csv')
+    _write(path, lines[:20])
+    tail = ExportTail(path)
+    tail.read_new_rows()
+
+    # 新导出覆盖旧文件 (内容更长, 但已读部分不同)
+    _write(path, [lines[0]] + lines[5:30])
+    rows, reset = tail.read_new_rows()
+    assert reset
+    assert len(rows) == len(read_order_csv(path))
+
+def test_watched_export_updates_incrementally(tmp_path):
+    lines = _lines(CSV_PATH)
+    path = str(tmp_path / 'orders.csv')
+    cut = len(lines) * 2 // 3
+    _write(path, lines[:cut])
+    export = WatchedExport(path, str(tmp_path / 'checkpoints'))
+    first = export.update()
+    assert first['orders'] == len(read_order_csv(path))
+    assert export.update() is None
+
+    _write(path, lines[cut:], 'ab')
+    update = export.update()
+    appended = len(read_order_csv(CSV_PATH)) - first['orders']
+    assert not update['reloaded']
+    assert update['new_orders'] == appended
+    incremental = update['optimization']['incremental']
+    assert incremental['new_prices'] == appended
+    assert incremental['replayed_full'] == 0
+
+    # 统计与参数建议与重新加载完整文件相同
+    analyzer = GridOrderAnalyzer()
+    analyzer.load_orders(CSV_PATH)
+    assert update['suggestions'] == analyzer.suggest_parameters()
+    assert update['analysis'] == pytest.approx(analyzer.analyze_price_movement())
+
+    # 回测结果与先优化前一部分、再在完整数据上增量回放相同
+    partial = str(tmp_path / 'partial.csv')
+    _write(partial, lines[:cut])
+    checkpoint_dir = str(tmp_path / 'expected')
+    ParameterOptimizer(partial, '30min').optimize(checkpoint_dir=checkpoint_dir, verbose=False)
+    expected = ParameterOptimizer(CSV_PATH, '30min').optimize(checkpoint_dir=checkpoint_dir,
+                                                            verbose=False, top_k=10)
+    assert update['optimization']['results'] == expected
+
+def test_appends_cost_only_new_rows(tmp_path, monkeypatch):
+    lines = _lines(CSV_PATH)
+    path = str(tmp_path / 'orders.csv')
+    cut = len(lines) // 2
+    _write(path, lines[:cut])
+    export = WatchedExport(path, str(tmp_path / 'checkpoints'))
+    export.update()
+
+    concat_rows = []
+    built = []
+    original_concat = pd.concat
+    original_from_orders = PriceSeries.from_orders.__func__
+
+    def concat(objs, *args, **kwargs):
+        objs = list(objs)
+        concat_rows.append(sum(len(obj) for obj in objs))
+        return original_concat(objs, *args, **kwargs)
+
+    def from_orders(cls, orders_df):
+        built.append(len(orders_df))
+        return original_from_orders(cls, orders_df)
+    monkeypatch.setattr(pd, 'concat', concat)
+    monkeypatch.setattr(PriceSeries, 'from_orders', classmethod(from_orders))
+
+    batch = 20
+    for start in range(cut, len(lines), batch):
+        _write(path, lines[start:start + batch], 'ab')
+        update = export.update()
+        appended = read_order_csv(io.BytesIO(lines[0] + b''.join(lines[start:start + batch])))
+        assert update['new_orders'] == len(appended)
+        assert update['optimization']['incremental']['new_prices'] == len(appended)
+    # 每次更新只处理新增的行: 不合并、不重新排序全部订单
+    assert max(concat_rows, default=0) <= batch
+    assert not built
+    monkeypatch.undo()
+
+    partial = str(tmp_path / 'partial.csv')
+    _write(partial, lines[:cut])
+    checkpoint_dir = str(tmp_path / 'expected')
+    ParameterOptimizer(partial, '30min').optimize(checkpoint_dir=checkpoint_dir, verbose=False)
+    expected = ParameterOptimizer(CSV_PATH, '30min').optimize(checkpoint_dir=checkpoint_dir,
+                                                            verbose=False, top_k=10)
+    assert update['optimization']['results'] == expected
+    assert export.analyzer.order_count == len(read_order_csv(CSV_PATH))
+
+def _write_scaled(source: str, path: str, factor: float):
+    """价格乘以 factor 后重新导出 (模拟整体改写的导出文件)"""
+    frame = pd.read_csv(source, dtype=str, keep_default_na=False)
+    prices = pd.to_numeric(frame['成交价格'], errors='coerce')
+    frame['成交价格'] = (prices * factor).round(2).astype(str).where(prices.notna(), '')
+    frame.to_csv(path, index=False, encoding='utf-8-sig')
+
+def test_rewritten_export_reanchors_checkpoint(tmp_path):
+    path = str(tmp_path / 'orders.csv')
+    _write_scaled(CSV_PATH, path, 1.0)
+    checkpoints = str(tmp_path / 'checkpoints')
+    export = WatchedExport(path, checkpoints)
+    export.update()
+
+    def fresh():
+        return ParameterOptimizer(None, '30min', orders_df=read_order_csv(path)).optimize(
+            verbose=False, top_k=10)
+
+    _write_scaled(CSV_PATH, path, 10.0)
+    update = export.update()
+    assert update['reloaded']
+    assert update['optimization']['results'] == fresh()
+    assert update['optimization']['results']
+
+    # 新进程首次读取改写后的文件: 旧检查点同样不再使用
+    _write_scaled(CSV_PATH, path, 3.0)
+    update = WatchedExport(path, checkpoints).update()
+    assert update['optimization']['incremental']['replayed_full'] > 0
+    assert update['optimization']['results'] == fresh()
+
+def test_debounce_waits_for_quiet_period(tmp_path):
+    watcher = ExportWatcher(str(tmp_path), lambda update: None, debounce=1.0)
+    watcher._queue = asyncio.Queue()
+    path = str(tmp_path / 'a.csv')
+    watcher.poll({path: (100, 1)}, 0.0)
+    watcher.poll({path: (100, 1)}, 0.5)
+    watcher.poll({path: (200, 2)}, 0.8)
+    watcher.poll({path: (200, 2)}, 1.5)
+    assert watcher._queue.empty()
+    watcher.poll({path: (200, 2)}, 1.9)
+    assert watcher._queue.qsize() == 1
+
+    # 排队后没有变化时不再重复处理
+    watcher._queued.clear()
+    watcher.poll({path: (200, 2)}, 5.0)
+    assert watcher._queue.qsize() == 1
+
+def test_burst_of_files_is_processed_with_bounded_concurrency(tmp_path):
+    lines = _lines(DAILY_CSV_PATH)
+    exports = tmp_path / 'exports'
+    exports.mkdir()
+    published = []
+    watcher = ExportWatcher(str(exports), published.append, poll_interval=0.02, debounce=0.05,
+                            max_concurrent=2, checkpoint_root=str(tmp_path / 'checkpoints'))
+    active = []
+    peak = []
+    lock = threading.Lock()
+    original = watcher.process
+
+    def tracked(path):
+        with lock:
+            active.append(path)
+            peak.append(len(active))
+        try:
+            return original(path)
+        finally:
+            with lock:
+                active.remove(path)
+    watcher.process = tracked
+
+    async def scenario():
+        stop = asyncio.Event()
+        task = asyncio.ensure_future(watcher.run(stop))
+        for index in range(8):
+            _write(str(exports / f'sym{index}.csv'), lines[:10])
+        _write(str(exports / 'notes.txt'), [b'ignored\n'])
+        deadline = time.monotonic() + 60
+        while len(published) < 8 and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+
+        # 追加数据后发布新的建议
+        _write(str(exports / 'sym0.csv'), lines[10:], 'ab')
+        while len(published) < 9 and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+        stop.set()
+        await task
+
+    asyncio.run(scenario())
+    assert len(published) == 9
+    assert max(peak) <= 2
+    assert sorted(os.path.basename(update['file']) for update in published[:8]) == \
+        [f'sym{index}.csv' for index in range(8)]
+    assert published[-1]['orders'] == len(read_order_csv(DAILY_CSV_PATH))
+    assert published[-1]['new_orders'] == published[-1]['orders'] - published[0]['orders']
+    assert not watcher.errors
@@ -0,0 +1,44 @@
+# tests/test_grid_ladder.py
+# moomoo-grid-optimizer/tests/test_grid_ladder.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.parameter_optimizer import ParameterOptimizer
+from src.backtest_engine import GridBacktester
+from src.batch_engine import BatchGridBacktester
+from src.grid_ladder import GridLadder
+
+def test_candidate_ranges_match_full_scan():
+    ladder = GridLadder(16.0, 101, 0.004, 0.012, 1000)
+    for price in [10.0, 12.87, 13.5, 16.0, 16.01, 18.3, 19.2, 25.0]:
+        buys = [level for level in range(len(ladder)) if price <= ladder.level_price(level)]
+        assert list(ladder.buy_candidates(price)) == buys
+        
+        sells = [level for level in range(len(ladder)) if ladder.is_take_profit(level, price)]
+        candidates = ladder.sell_candidates(price)
+        assert [level for level in candidates if ladder.is_take_profit(level, price)] == sells
+
+def test_rounded_levels_do_not_collide():
+    # 间距过小时多个网格四舍五入到同一价格, 仍按独立档位记录持仓
+    ladder = GridLadder(16.0, 5, 0.0001, 0.01, 500)
+    assert len(ladder) == 5
+    assert len(set(ladder.levels.tolist())) < len(ladder)
+    
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-30min-20241001-1028.csv'), '30min')
+    params = dict(optimizer._generate_param_combinations()[0], price_deviation=0.0001)
+    backtester = GridBacktester(optimizer.price_series, params)
+    metrics = backtester.run_backtest()
+    assert metrics == BatchGridBacktester(optimizer.price_series, [params]).run_backtest()[0]
+
+def test_wide_ladder_matches_batch():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-30min-20241001-1028.csv'), '30min')
+    base = optimizer._generate_param_combinations()[0]
+    param_list = [
+        dict(base, grid_count=grid_count, price_deviation=deviation, position_limit=600, min_order_quantity=100)
+        for grid_count in (51, 101, 201)
+        for deviation in (0.002, 0.004)
+    ]
+    expected = [GridBacktester(optimizer.price_series, params).run_backtest() for params in param_list]
+    assert BatchGridBacktester(optimizer.price_series, param_list).run_backtest() == expected
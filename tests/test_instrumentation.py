@@ -0,0 +1,87 @@
+# tests/test_instrumentation.py
+# moomoo-grid-optimizer/tests/test_instrumentation.py
+
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from src.backtest_engine import GridBacktester
+from src.instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from src.order_analyzer import GridOrderAnalyzer
+from src.parameter_optimizer import ParameterOptimizer
+
+CSV_PATH = os.path.join('data', 'mara-30min-20241001-1028.csv')
+
+def test_phases_and_counters():
+    instrumentation = Instrumentation()
+    with instrumentation.phase('outer'):
+        for _ in range(3):
+            with instrumentation.phase('inner'):
+                pass
+    instrumentation.count('items', 5)
+    instrumentation.count('items')
+    report = instrumentation.report()
+    assert report.phases['inner'].calls == 3
+    assert report.phases['outer'].wall >= report.phases['inner'].wall
+    assert report.counters == {'items': 6}
+    assert json.loads(report.to_json())['phases']['outer']['calls'] == 1
+    assert 'inner' in report.format()
+
+@pytest.mark.parametrize('mode', ['tick', 'event'])
+def test_backtest_counters(optimizer, mode):
+    params = optimizer._generate_param_combinations()[10]
+    instrumentation = Instrumentation()
+    backtester = GridBacktester(optimizer.price_series, params, instrumentation=instrumentation)
+    metrics = backtester.run_backtest(mode=mode)
+
+    # 统计不改变回测结果
+    assert metrics == GridBacktester(optimizer.price_series, params).run_backtest(mode=mode)
+    report = instrumentation.report()
+    counters = report.counters
+    assert counters['backtest.runs'] == 1
+    assert counters['backtest.ticks'] == len(optimizer.price_series)
+    assert counters['backtest.fills'] == metrics['trade_count'] == len(backtester.trades)
+    assert counters['backtest.signals'] >= counters['backtest.fills']
+    assert 0 < counters['backtest.signal_checks'] <= counters['backtest.ticks']
+    assert report.phases['backtest.record_trade'].calls == metrics['trade_count']
+    assert {'backtest.initialize_grids', 'backtest.replay', 'backtest.metrics'} <= set(report.phases)
+
+def test_optimizer_report_and_profile(tmp_path, optimizer):
+    instrumentation = Instrumentation(profile_params='best')
+    instrumented = ParameterOptimizer(None, optimizer.timeframe, orders_df=optimizer.orders_df,
+                                      instrumentation=instrumentation)
+    results = instrumented.optimize(engine='loop', verbose=False)
+    assert results == optimizer.optimize(engine='loop', verbose=False)
+
+    report = instrumentation.report()
+    assert report.counters['optimizer.combinations'] == 81
+    assert report.counters['optimizer.valid'] == len(results)
+    assert report.counters['optimizer.pruned'] == report.counters['backtest.pruned']
+    assert report.counters['backtest.runs'] == 81
+    assert {'optimizer.load_csv', 'optimizer.backtests', 'optimizer.rank'} <= set(report.phases)
+    assert report.profile_params == results[0]['params']
+    assert 'run_backtest' in report.profile
+
+    path = str(tmp_path / 'report.json')
+    report.to_json(path)
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['counters']['optimizer.combinations'] == 81
+
+def test_analyzer_phases():
+    instrumentation = Instrumentation()
+    analyzer = GridOrderAnalyzer(instrumentation=instrumentation)
+    analyzer.load_orders(CSV_PATH)
+    analyzer.analyze_price_movement()
+    report = instrumentation.report()
+    assert report.counters['analyzer.orders'] == len(analyzer.orders_df)
+    assert report.phases['analyzer.price_movement'].calls == 1
+
+def test_disabled_instrumentation_is_inert(optimizer):
+    assert not NULL_INSTRUMENTATION.enabled
+    assert NULL_INSTRUMENTATION.report() is None
+    backtester = GridBacktester(optimizer.price_series, optimizer._generate_param_combinations()[0])
+    assert backtester.instrumentation is NULL_INSTRUMENTATION
+    # 关闭时不替换成交记录方法
+    assert backtester._record_trade.__func__ is GridBacktester._record_trade
@@ -0,0 +1,55 @@
+# tests/test_market_data.py
+# moomoo-grid-optimizer/tests/test_market_data.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from src.parameter_optimizer import ParameterOptimizer
+from src.backtest_engine import GridBacktester
+from src.data_loader import read_order_csv
+from src.market_data import AppendablePriceSeries, PriceSeries
+
+def test_price_series_is_prepared_once():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-30min-20241001-1028.csv'), '30min')
+    series = optimizer.price_series
+    
+    assert series.prices.dtype == np.float64 and series.prices.flags.c_contiguous
+    assert series.times.dtype == np.int64
+    assert (np.diff(series.times) >= 0).all()
+    assert series.mean_price == optimizer.orders_df['成交价格'].mean()
+    with pytest.raises(ValueError):
+        series.prices[0] = 0.0
+
+def test_backtester_accepts_series_or_dataframe():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-daily-20241001-1028.csv'), 'daily')
+    params = optimizer._generate_param_combinations()[0]
+    
+    from_series = GridBacktester(optimizer.price_series, params).run_backtest()
+    from_frame = GridBacktester(optimizer.orders_df, params).run_backtest()
+    assert from_series == from_frame
+
+def test_appendable_series_matches_full_build():
+    orders = read_order_csv(os.path.join('data', 'mara-30min-20241001-1028.csv'))
+    appendable = AppendablePriceSeries()
+    first = None
+    for start in range(0, len(orders), 25):
+        assert appendable.add_orders(orders.iloc[start:start + 25])
+        if first is None:
+            first = appendable.series
+    
+    series = appendable.series
+    expected = PriceSeries.from_orders(orders)
+    np.testing.assert_array_equal(series.prices, expected.prices)
+    np.testing.assert_array_equal(series.times, expected.times)
+    assert series.mean_price == pytest.approx(expected.mean_price)
+    # 已返回的序列不随之后的追加变化
+    assert len(first) == 25
+    
+    # 插入到已有数据之前的订单: 重新排序
+    assert not appendable.add_orders(orders.iloc[:10])
+    expected = PriceSeries.from_orders(orders.iloc[np.r_[0:len(orders), 0:10]])
+    np.testing.assert_array_equal(appendable.series.times, expected.times)
+    np.testing.assert_array_equal(appendable.series.prices, expected.prices)
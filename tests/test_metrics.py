@@ -0,0 +1,49 @@
+# tests/test_metrics.py
+# moomoo-grid-optimizer/tests/test_metrics.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from src.config import Config
+from src.parameter_optimizer import ParameterOptimizer
+from src.backtest_engine import GridBacktester
+from src.metrics import EquityTracker, max_drawdown
+
+def test_equity_curve_is_marked_to_market():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-30min-20241001-1028.csv'), '30min')
+    params = optimizer._generate_param_combinations()[0]
+    backtester = GridBacktester(optimizer.price_series, params)
+    metrics = backtester.run_backtest()
+    
+    # 按成交记录逐价格点重建现金与持仓
+    prices = optimizer.price_series.prices
+    times = optimizer.price_series.times
+    cash, held, expected = Config.INITIAL_CAPITAL, 0, []
+    trades = backtester.trades.to_frame().to_dict('records')
+    for price, time in zip(prices, times):
+        while trades and trades[0]['time'].value == time:
+            trade = trades.pop(0)
+            sign = 1 if trade['type'] == 'buy' else -1
+            cash -= sign * trade['quantity'] * trade['price']
+            held += sign * trade['quantity']
+        expected.append(cash + held * price)
+    
+    np.testing.assert_allclose(backtester.equity_curve, expected)
+    assert metrics['final_value'] == backtester.equity_curve[-1]
+    assert metrics['max_drawdown'] == max_drawdown(backtester.equity_curve)
+
+def test_streaming_matches_full_curve():
+    rng = np.random.default_rng(3)
+    prices = 16 + np.cumsum(rng.normal(0, 0.05, 200000))
+    full = EquityTracker(prices, keep_curve=True)
+    streaming = EquityTracker(prices, keep_curve=False)
+    for tracker in (full, streaming):
+        tracker.update(1000, 90000.0, 500)
+        tracker.update(150000, 95000.0, 100)
+        tracker.finalize()
+    
+    assert streaming.curve is None
+    assert streaming.max_drawdown == full.max_drawdown == max_drawdown(full.curve)
+    assert streaming.last_equity == full.curve[-1]
@@ -0,0 +1,104 @@
+# tests/test_monte_carlo.py
+# moomoo-grid-optimizer/tests/test_monte_carlo.py
+
+import dataclasses
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from src.backtest_engine import GridBacktester
+from src.batch_engine import BatchGridBacktester
+from src.monte_carlo import (block_bootstrap_paths, evaluate_paths, generate_paths, jittered_paths,
+                             run_monte_carlo, summarize_distribution)
+
+@pytest.fixture(scope='module')
+def top_results(optimizer):
+    return optimizer.optimize(top_k=5)
+
+def test_block_bootstrap_paths_reuse_original_returns(optimizer):
+    prices = optimizer.price_series.prices
+    paths = block_bootstrap_paths(prices, 50, block_size=4, seed=0)
+    assert paths.shape == (50, len(prices))
+    assert np.all(paths[:, 0] == prices[0])
+    assert np.all(paths >= 0.01)
+    np.testing.assert_array_equal(paths, np.round(paths, 2))
+    # 块长度等于收益率数量时每条路径是原始收益率的循环移位, 累计收益不变
+    rotated = block_bootstrap_paths(prices, 20, block_size=len(prices) - 1, seed=0)
+    np.testing.assert_allclose(rotated[:, -1], prices[-1], atol=0.01)
+
+def test_jittered_paths_stay_close_to_original(optimizer):
+    prices = optimizer.price_series.prices
+    paths = jittered_paths(prices, 200, jitter=0.001, max_shift=0.05, seed=1)
+    ratios = paths / prices
+    assert np.all(np.abs(ratios - 1) < 0.06)
+    assert np.all(np.abs(ratios.mean(axis=1) - 1) <= 0.051)
+
+def test_generate_paths_is_reproducible(optimizer):
+    prices = optimizer.price_series.prices
+    np.testing.assert_array_equal(generate_paths(prices, 10, seed=3), generate_paths(prices, 10, seed=3))
+    with pytest.raises(ValueError):
+        generate_paths(prices, 10, method='unknown')
+
+def test_run_on_paths_matches_single_series_engines(optimizer):
+    series = optimizer.price_series
+    param_list = optimizer._generate_param_combinations()[:40]
+    paths = jittered_paths(series.prices, 3, seed=2)
+    centers = paths.mean(axis=1)
+
+    rows = [params for params in param_list for _ in range(len(paths))]
+    results = BatchGridBacktester(None, rows).run_on_paths(
+        np.tile(paths, (len(param_list), 1)), np.tile(centers, len(param_list))
+    )
+    for path_index, path in enumerate(paths):
+        path_series = dataclasses.replace(series, prices=path, mean_price=centers[path_index])
+        expected = BatchGridBacktester(path_series, param_list).run_backtest()
+        assert results[path_index::len(paths)] == expected
+        for params, metrics in zip(param_list[:5], expected):
+            assert GridBacktester(path_series, params).run_backtest() == pytest.approx(metrics)
+
+def test_evaluate_paths_splits_large_batches(optimizer, top_results, monkeypatch):
+    param_list = [result['params'] for result in top_results]
+    paths = block_bootstrap_paths(optimizer.price_series.prices, 7, seed=4)
+    expected = evaluate_paths(paths, param_list, optimizer.price_series.mean_price)
+    monkeypatch.setattr('src.monte_carlo.MAX_TASK_CELLS', 1)
+    chunked = evaluate_paths(paths, param_list, optimizer.price_series.mean_price)
+    for name in expected:
+        np.testing.assert_array_equal(chunked[name], expected[name])
+
+def test_summarize_distribution():
+    summary = summarize_distribution(np.arange(101, dtype=float))
+    assert summary['mean'] == 50
+    assert summary['min'] == 0 and summary['max'] == 100
+    assert summary['p5'] == 5 and summary['p50'] == 50 and summary['p95'] == 95
+
+def test_run_monte_carlo_reports_distributions(optimizer, top_results):
+    progress = []
+    reports = run_monte_carlo(optimizer, top_results, top_k=3, n_paths=40, seed=5,
+                              keep_samples=True, on_progress=progress.append)
+    assert len(reports) == 3
+    assert progress == [40]
+    for report, result in zip(reports, top_results):
+        assert report['params'] == result['params']
+        assert report['paths'] == 40
+        samples = report['samples']['profit_ratio']
+        assert len(samples) == 40
+        assert report['profit_ratio']['mean'] == pytest.approx(samples.mean())
+        assert report['loss_probability'] == pytest.approx(np.mean(samples < 0))
+        assert 0 <= report['max_drawdown']['min'] <= report['max_drawdown']['max'] < 1
+    
+    with pytest.raises(ValueError, match='路径数量'):
+        run_monte_carlo(optimizer, top_results, n_paths=0)
+
+def test_identity_jitter_reproduces_original_metrics(optimizer, top_results):
+    reports = run_monte_carlo(optimizer, top_results, n_paths=2, method='jitter',
+                              jitter=0.0, max_shift=0.0)
+    for report, result in zip(reports, top_results):
+        assert report['profit_ratio']['mean'] == pytest.approx(result['metrics']['profit_ratio'])
+        assert report['max_drawdown']['max'] == pytest.approx(result['metrics']['max_drawdown'])
+
+def test_parallel_matches_serial(optimizer, top_results):
+    serial = run_monte_carlo(optimizer, top_results, n_paths=30, method='jitter', seed=6)
+    parallel = run_monte_carlo(optimizer, top_results, n_paths=30, method='jitter', seed=6, workers=2)
+    assert parallel == serial
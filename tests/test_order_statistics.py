@@ -0,0 +1,115 @@
+# tests/test_order_statistics.py
+# moomoo-grid-optimizer/tests/test_order_statistics.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_loader import read_order_csv
+from src.order_analyzer import GridOrderAnalyzer
+from src.order_statistics import OrderStatistics, RunningStats
+from src.synthetic import generate_export
+
+DAILY = os.path.join('data', 'mara-daily-20241001-1028.csv')
+INTRADAY = os.path.join('data', 'mara-30min-20241001-1028.csv')
+
+def _reference(df: pd.DataFrame, window: int = 20) -> dict:
+    """逐项用 pandas 计算的参考结果"""
+    prices = df['成交价格']
+    daily = df.assign(date=df['成交时间'].dt.date).groupby('date')['成交价格'].agg(['std', 'mean'])
+    tail = df.sort_values('成交时间', kind='stable')['成交价格'].iloc[-window:]
+    return {
+        'mean': prices.mean(), 'std': prices.std(), 'range': prices.max() - prices.min(),
+        'daily_volatility': (daily['std'] / daily['mean']).mean(),
+        'rolling_volatility': tail.std() / tail.mean()
+    }
+
+def _check(statistics: OrderStatistics, expected: dict):
+    assert statistics.prices.mean == pytest.approx(expected['mean'], rel=1e-12)
+    assert statistics.prices.std == pytest.approx(expected['std'], rel=1e-9)
+    assert statistics.prices.range == pytest.approx(expected['range'])
+    assert statistics.daily_volatility == pytest.approx(expected['daily_volatility'], rel=1e-9)
+    assert statistics.rolling_volatility == pytest.approx(expected['rolling_volatility'], rel=1e-9)
+
+def test_running_stats_merge_chunks():
+    rng = np.random.default_rng(1)
+    values = 1e4 + rng.normal(0, 0.01, 10007)
+    values[[5, 500]] = np.nan
+    stats = RunningStats()
+    for start in range(0, len(values), 333):
+        stats.update(values[start:start + 333])
+    clean = values[~np.isnan(values)]
+    assert stats.count == len(clean)
+    assert stats.mean == pytest.approx(clean.mean(), rel=1e-14)
+    assert stats.std == pytest.approx(clean.std(ddof=1), rel=1e-9)
+    assert stats.range == clean.max() - clean.min()
+    assert np.isnan(RunningStats().update([1.0]).std)
+
+@pytest.mark.parametrize('chunk', [1, 7, 50, None])
+def test_chunked_statistics_match_pandas(tmp_path, chunk):
+    path = generate_export(str(tmp_path / 'orders.csv'), 3000, 'ou', '30min', fills_per_bar=3, seed=4)
+    df = read_order_csv(path)
+    # 导出文件通常按时间倒序, 统计结果与顺序无关
+    df = df.iloc[::-1].reset_index(drop=True)
+    statistics = OrderStatistics()
+    chunk = chunk or len(df)
+    for start in range(0, len(df), chunk):
+        statistics.update(df.iloc[start:start + chunk])
+    _check(statistics, _reference(df))
+
+@pytest.mark.parametrize('path', [DAILY, INTRADAY])
+def test_analyzer_statistics(path):
+    df = read_order_csv(path)
+    expected = _reference(df)
+
+    analyzer = GridOrderAnalyzer()
+    analyzer.load_orders(path)
+    analysis = analyzer.analyze_price_movement()
+    assert analysis['mean_price'] == pytest.approx(expected['mean'])
+    assert analysis['volatility'] == pytest.approx(expected['std'] / expected['mean'])
+    if analyzer.time_frame == '30min':
+        assert analysis['daily_volatility'] == pytest.approx(expected['daily_volatility'])
+    assert analysis['rolling_volatility'] == pytest.approx(expected['rolling_volatility'])
+    assert analyzer.analyze_price_movement() == analysis
+
+    chunked = GridOrderAnalyzer()
+    chunked.load_orders(path, chunksize=10)
+    assert chunked.analyze_price_movement() == pytest.approx(analysis)
+
+    suggestions = analyzer.suggest_parameters()
+    assert suggestions['time_frame'] == analyzer.time_frame
+    assert 100 <= suggestions['min_order_quantity'] <= 1000
+
+def test_add_orders_updates_cached_analysis():
+    df = read_order_csv(INTRADAY)
+    full = GridOrderAnalyzer()
+    full.load_orders(INTRADAY)
+
+    analyzer = GridOrderAnalyzer()
+    analyzer.add_orders(df.iloc[:100])
+    first = analyzer.analyze_price_movement()
+    analyzer.add_orders(df.iloc[100:])
+    assert analyzer.analyze_price_movement() != first
+    assert analyzer.analyze_price_movement() == pytest.approx(full.analyze_price_movement())
+    assert len(analyzer.orders_df) == len(df)
+    assert analyzer.time_frame == full.time_frame
+
+def test_add_orders_does_not_copy_accumulated_orders(monkeypatch):
+    df = read_order_csv(INTRADAY)
+    concats = []
+    original = pd.concat
+    monkeypatch.setattr(pd, 'concat', lambda *args, **kwargs: concats.append(1) or original(*args, **kwargs))
+
+    analyzer = GridOrderAnalyzer()
+    for start in range(0, len(df), 20):
+        analyzer.add_orders(df.iloc[start:start + 20])
+        analyzer.suggest_parameters()
+    assert not concats
+    assert analyzer.order_count == len(df)
+
+    pd.testing.assert_frame_equal(analyzer.orders_df, df.reset_index(drop=True))
+    assert analyzer.orders_df is analyzer.orders_df
+    assert len(concats) == 1
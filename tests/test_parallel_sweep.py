@@ -0,0 +1,27 @@
+# tests/test_parallel_sweep.py
+# moomoo-grid-optimizer/tests/test_parallel_sweep.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.parameter_optimizer import ParameterOptimizer
+from src.parallel_sweep import SharedPriceData, attach_shared_prices
+
+def test_shared_prices_roundtrip():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-daily-20241001-1028.csv'), 'daily')
+    with SharedPriceData(optimizer.price_series) as shared:
+        attached = attach_shared_prices(shared.handle)
+        assert (attached.prices == optimizer.price_series.prices).all()
+        assert (attached.times == optimizer.price_series.times).all()
+        assert attached.mean_price == optimizer.price_series.mean_price
+        directory = shared.directory
+    assert not os.path.exists(directory)
+
+def test_parallel_matches_serial():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-30min-20241001-1028.csv'), '30min')
+    assert optimizer.optimize(workers=2) == optimizer.optimize()
+
+def test_parallel_loop_engine():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-daily-20241001-1028.csv'), 'daily')
+    assert optimizer.optimize(engine='loop', workers=2) == optimizer.optimize(engine='loop')
@@ -0,0 +1,95 @@
+# tests/test_pruning.py
+# moomoo-grid-optimizer/tests/test_pruning.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from src.backtest_engine import GridBacktester
+from src.batch_engine import BatchGridBacktester
+from src.market_data import PriceSeries
+from src.parameter_optimizer import ParameterOptimizer
+from src.pruning import PruningBounds, is_pruned
+
+def _random_walk(length=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = np.round(20 * np.exp(np.cumsum(rng.normal(0, 0.002, length))), 2)
+    return PriceSeries(prices, np.arange(length, dtype=np.int64) * 10**9, float(prices.mean()))
+
+def _params(grid_count, deviation, profit):
+    position_limit = 4000 // grid_count
+    return {
+        'grid_count': grid_count,
+        'price_deviation': deviation,
+        'profit_ratio': profit,
+        'position_step': 0.2,
+        'position_limit': position_limit,
+        'min_order_quantity': max(100, position_limit // 3)
+    }
+
+PARAM_LIST = [
+    _params(grid_count, deviation, profit)
+    for grid_count in (3, 5, 7)
+    for deviation in (0.005, 0.01, 0.03)
+    for profit in (0.003, 0.01, 0.02)
+]
+
+def test_run_counts_match_brute_force():
+    prices = np.array([5, 1, 1, 5, 9, 5, 9, 1, 5, 1, 9, 9, 5, 1], dtype=np.float64)
+    bounds = PruningBounds(prices, checkpoints=7)
+    buys, sells = bounds._count_runs(2.0, 8.0)
+    
+    for block, start in enumerate(bounds.starts):
+        marks = ['H' if p >= 8 else 'L' for p in prices[start:] if p <= 2 or p >= 8]
+        runs = [mark for i, mark in enumerate(marks) if i == 0 or marks[i - 1] != mark]
+        assert buys[block] == runs.count('L')
+        assert sells[block] == runs.count('H')
+
+@pytest.mark.parametrize('mode', ['tick', 'event'])
+def test_pruning_keeps_valid_results(walk_backtests, mode):
+    series, bounds, expected = walk_backtests
+    for params, metrics in zip(PARAM_LIST, expected):
+        pruned = GridBacktester(series, params, keep_equity_curve=False, record_trades=False,
+                                bounds=bounds).run_backtest(mode=mode)
+        if is_pruned(pruned):
+            assert not _is_valid(metrics)
+        else:
+            assert pruned == metrics
+
+def test_batch_pruning_matches_loop(walk_backtests):
+    series, bounds, expected = walk_backtests
+    batch = BatchGridBacktester(series, PARAM_LIST, bounds=bounds).run_backtest()
+    
+    assert any(is_pruned(metrics) for metrics in batch)
+    for params, metrics, unpruned in zip(PARAM_LIST, batch, expected):
+        if is_pruned(metrics):
+            assert not _is_valid(unpruned)
+            loop = GridBacktester(series, params, keep_equity_curve=False, record_trades=False,
+                                  bounds=bounds).run_backtest()
+            assert metrics == loop
+        else:
+            assert metrics == unpruned
+
+def test_optimizer_reports_pruning():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-daily-20241001-1028.csv'), 'daily')
+    unpruned = optimizer.optimize(prune=False)
+    assert optimizer.prune_report['pruned'] == 0
+    
+    assert optimizer.optimize(prune=True) == unpruned
+    report = optimizer.prune_report
+    assert report['total'] == 81
+    assert report['pruned'] > 0
+    assert 0 < report['mean_fraction'] < 1
+    assert sum(report['by_reason'].values()) == report['pruned']
+
+@pytest.fixture(scope='module')
+def walk_backtests():
+    series = _random_walk()
+    expected = BatchGridBacktester(series, PARAM_LIST).run_backtest()
+    return series, PruningBounds(series.prices), expected
+
+def _is_valid(metrics):
+    optimizer = ParameterOptimizer.__new__(ParameterOptimizer)
+    return optimizer._is_valid_result(metrics)
@@ -0,0 +1,70 @@
+# tests/test_result_cache.py
+# moomoo-grid-optimizer/tests/test_result_cache.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from src.config import Config
+from src.parameter_optimizer import ParameterOptimizer
+from src.result_cache import ResultCache, normalize_params, result_key
+
+DATA_PATH = os.path.join('data', 'mara-daily-20241001-1028.csv')
+
+def test_optimizer_skips_cached_combinations(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(tmp_path))
+    expected = ParameterOptimizer(DATA_PATH, 'daily').optimize()
+    
+    optimizer = ParameterOptimizer(DATA_PATH, 'daily', use_result_cache=True)
+    assert optimizer.optimize() == expected
+    assert (optimizer.result_cache.hits, optimizer.result_cache.misses) == (0, 81)
+    pruned_count = optimizer.prune_report['pruned']
+    assert pruned_count > 0
+    
+    # 新的优化器实例复用同一数据库
+    optimizer = ParameterOptimizer(DATA_PATH, 'daily', use_result_cache=True)
+    calls = []
+    original = optimizer._execute_backtests
+    monkeypatch.setattr(optimizer, '_execute_backtests',
+                        lambda params, *args: calls.append(len(params)) or original(params, *args))
+    assert optimizer.optimize() == expected
+    assert calls == []
+    assert optimizer.result_cache.report()['hits'] == 81
+    
+    # 不允许提前终止时, 之前被终止的组合需要重新回测
+    assert optimizer.optimize(prune=False) == expected
+    assert calls == [pruned_count]
+
+def test_pruned_results_depend_on_criteria(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / 'results.sqlite'))
+    params = {'grid_count': 5, 'price_deviation': 0.01}
+    cache.put_many('abc', [params], [{'trade_count': 1, 'pruned': 'win_rate', 'pruned_at': 0.5}])
+    
+    assert cache.get_many('abc', [params]) == [None]
+    assert cache.get_many('abc', [params], allow_pruned=True)[0]['pruned'] == 'win_rate'
+    criteria = dict(Config.BACKTEST_METRICS, min_win_rate=0.1)
+    monkeypatch.setattr(Config, 'BACKTEST_METRICS', criteria)
+    assert cache.get_many('abc', [params], allow_pruned=True) == [None]
+
+def test_key_normalization():
+    params = {'grid_count': 5, 'price_deviation': 0.01, 'position_limit': 200}
+    numpy_params = {'position_limit': np.int64(200), 'price_deviation': np.float64(0.01),
+                    'grid_count': np.int32(5)}
+    assert normalize_params(params) == normalize_params(numpy_params)
+    assert result_key('abc', params) == result_key('abc', numpy_params)
+    assert result_key('abc', params) != result_key('abd', params)
+
+def test_size_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.sqlite'), max_bytes=64 * 1024)
+    metrics = {'profit_ratio': 0.1, 'padding': 'x' * 200}
+    for batch in range(20):
+        params = [{'grid_count': batch, 'price_deviation': index} for index in range(50)]
+        cache.put_many('abc', params, [metrics] * len(params))
+    
+    report = cache.report()
+    assert report['evictions'] > 0
+    assert report['size_bytes'] <= 64 * 1024
+    # 最近写入的结果保留, 最早的被淘汰
+    assert cache.get_many('abc', [{'grid_count': 19, 'price_deviation': 0}]) == [metrics]
+    assert cache.get_many('abc', [{'grid_count': 0, 'price_deviation': 0}]) == [None]
@@ -0,0 +1,117 @@
+# tests/test_result_collector.py
+# moomoo-grid-optimizer/tests/test_result_collector.py
+
+import csv
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+from src.config import Config
+from src.result_collector import (
+    CsvResultSink, JsonlResultSink, ResultSink, TopKResults, open_result_sink
+)
+
+def test_top_k_matches_stable_sort():
+    values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5]
+    entries = [({'index': index}, {'profit_ratio': value}) for index, value in enumerate(values)]
+    expected = sorted(entries, key=lambda entry: entry[1]['profit_ratio'], reverse=True)
+    for k in (None, 1, 4, len(values), 50):
+        top = TopKResults(k)
+        for params, metrics in entries:
+            top.add(params, metrics)
+        kept = [(result['params'], result['metrics']) for result in top.results()]
+        assert kept == expected[:k]
+    with pytest.raises(ValueError):
+        TopKResults(0)
+
+def test_optimize_top_k_and_rank_by(optimizer):
+    full = optimizer.optimize(verbose=False)
+    assert optimizer.optimize(verbose=False, top_k=3) == full[:3]
+
+    by_drawdown = optimizer.optimize(verbose=False, top_k=5,
+                                     rank_by=lambda metrics: -metrics['max_drawdown'])
+    expected = sorted(full, key=lambda result: result['metrics']['max_drawdown'])[:5]
+    assert [r['metrics']['max_drawdown'] for r in by_drawdown] == \
+        [r['metrics']['max_drawdown'] for r in expected]
+    by_trades = optimizer.optimize(verbose=False, top_k=2, rank_by='trade_count')
+    assert by_trades[0]['metrics']['trade_count'] == max(r['metrics']['trade_count'] for r in full)
+
+def test_chunked_sweep_matches(optimizer, monkeypatch):
+    expected = optimizer.optimize(verbose=False)
+    expected_pruning = optimizer.prune_report
+    monkeypatch.setattr(Config, 'RESULT_CHUNK_SIZE', 7)
+    assert optimizer.optimize(verbose=False) == expected
+    assert optimizer.prune_report == expected_pruning
+
+@pytest.mark.parametrize('extension', ['.jsonl', '.csv'])
+def test_sink_receives_every_result(optimizer, tmp_path, extension):
+    path = str(tmp_path / f'results{extension}')
+    results = optimizer.optimize(verbose=False, top_k=2, result_sink=path)
+    if extension == '.jsonl':
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        valid = [row for row in rows if row['valid']]
+        assert sum('pruned' in row['metrics'] for row in rows) == optimizer.prune_report['pruned']
+    else:
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        valid = [row for row in rows if row['valid'] == 'True']
+        assert sum(bool(row['metric_pruned']) for row in rows) == optimizer.prune_report['pruned']
+    assert len(rows) == 81
+    assert len(valid) == len(optimizer.optimize(verbose=False))
+    assert len(results) == 2
+
+    # 已有文件时追加, CSV 不重复写表头
+    optimizer.optimize(verbose=False, result_sink=path)
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 162 + (extension == '.csv')
+
+def test_csv_rows_read_back_as_params(optimizer, tmp_path):
+    path = str(tmp_path / 'results.csv')
+    results = optimizer.optimize(verbose=False, top_k=1, result_sink=path)
+    frame = pd.read_csv(path)
+    best = results[0]['params']
+    assert list(frame.columns[:len(best)]) == list(best)
+    assert not any(column.endswith('.1') for column in frame.columns)
+
+    rows = frame[list(best)].to_dict('records')
+    assert best in rows
+    row = frame.iloc[rows.index(best)]
+    assert row['metric_profit_ratio'] == pytest.approx(results[0]['metrics']['profit_ratio'])
+    assert row['profit_ratio'] == best['profit_ratio']
+
+def test_partial_output_after_crash(optimizer, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'RESULT_CHUNK_SIZE', 20)
+    run_backtests = optimizer._run_backtests
+    calls = []
+
+    def failing(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError('crash')
+        return run_backtests(*args, **kwargs)
+
+    monkeypatch.setattr(optimizer, '_run_backtests', failing)
+    path = str(tmp_path / 'results.jsonl')
+    with pytest.raises(RuntimeError):
+        optimizer.optimize(verbose=False, result_sink=path)
+    with open(path, encoding='utf-8') as f:
+        assert len([json.loads(line) for line in f]) == 40
+
+def test_open_result_sink(tmp_path):
+    assert isinstance(open_result_sink(str(tmp_path / 'a.jsonl')), JsonlResultSink)
+    assert isinstance(open_result_sink(str(tmp_path / 'a.CSV')), CsvResultSink)
+    with pytest.raises(ValueError):
+        open_result_sink(str(tmp_path / 'a.txt'))
+    
+    # 基类不能直接使用, 子类必须实现 _open 与 _write_row
+    class OpenOnly(ResultSink):
+        def _open(self):
+            self._file = open(self.path, 'a', encoding='utf-8')
+    for sink_class in (ResultSink, OpenOnly):
+        with pytest.raises(TypeError):
+            sink_class(str(tmp_path / 'a.out'))
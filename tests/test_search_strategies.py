@@ -0,0 +1,103 @@
+# tests/test_search_strategies.py
+# moomoo-grid-optimizer/tests/test_search_strategies.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from src.search_strategies import (
+    CoarseToFineSearch, GridSearch, RandomSearch, SearchSpace, SearchStrategy, SuccessiveHalvingSearch,
+    param_key
+)
+
+def test_grid_search_matches_default(optimizer):
+    assert optimizer.optimize(strategy=GridSearch()) == optimizer.optimize()
+
+def test_random_search_within_bounds(optimizer):
+    space = SearchSpace(optimizer.param_ranges, optimizer._build_params)
+    samples = RandomSearch(budget=20, method='lhs', seed=1).propose(space)
+    
+    assert len(samples) == 20
+    assert samples == RandomSearch(budget=20, method='lhs', seed=1).propose(space)
+    for params in samples:
+        assert space.deviation_bounds[0] <= params['price_deviation'] <= space.deviation_bounds[1]
+        assert space.profit_bounds[0] <= params['profit_ratio'] <= space.profit_bounds[1]
+        assert params['position_step'] in space.position_steps
+        assert params['position_limit'] == optimizer.param_ranges['max_position'] // params['grid_count']
+
+def test_coarse_to_fine_evaluates_each_combination_once(optimizer):
+    evaluated = []
+    
+    def evaluate(param_list, fraction):
+        evaluated.extend(param_key(params) for params in param_list)
+        return optimizer._run_backtests(param_list, 'batch', 1, lambda n: None)
+    
+    space = SearchSpace(optimizer.param_ranges, optimizer._build_params)
+    results = CoarseToFineSearch(rounds=2).search(space, evaluate, optimizer._rank_key())
+    
+    assert len(evaluated) == len(set(evaluated)) == len(results)
+    assert len(results) > len(GridSearch().propose(space))
+    
+    # 细化后的最优结果不差于粗网格
+    coarse = optimizer.optimize()
+    refined = optimizer.optimize(strategy=CoarseToFineSearch(rounds=2))
+    if coarse:
+        assert refined[0]['metrics']['profit_ratio'] >= coarse[0]['metrics']['profit_ratio']
+
+def test_successive_halving_uses_growing_prefixes(optimizer):
+    fractions = []
+    
+    def evaluate(param_list, fraction):
+        fractions.append((fraction, len(param_list)))
+        series = optimizer.price_series.prefix(fraction)
+        return optimizer._run_backtests(param_list, 'batch', 1, lambda n: None, series=series)
+    
+    space = SearchSpace(optimizer.param_ranges, optimizer._build_params)
+    results = SuccessiveHalvingSearch(eta=3, min_fraction=1 / 9).search(space, evaluate, optimizer._rank_key())
+    
+    assert [fraction for fraction, _ in fractions] == pytest.approx([1 / 9, 1 / 3, 1.0])
+    assert [count for _, count in fractions] == [81, 27, 9]
+    assert len(results) == 9
+
+# 日线数据太短, 数据前缀上没有可比较的回测结果
+@pytest.mark.parametrize('timeframe', ['30min'], scope='module')
+def test_strategy_ranks_by_rank_by(optimizer, monkeypatch):
+    rungs = []
+    original = optimizer._run_backtests
+    
+    def run_backtests(param_list, *args, **kwargs):
+        metrics_list = original(param_list, *args, **kwargs)
+        rungs.append((param_list, metrics_list))
+        return metrics_list
+    monkeypatch.setattr(optimizer, '_run_backtests', run_backtests)
+    
+    def by_drawdown(metrics):
+        return -metrics['max_drawdown']
+    results = optimizer.optimize(strategy=SuccessiveHalvingSearch(eta=3, min_fraction=1 / 9),
+                                 rank_by=by_drawdown, prune=False, verbose=False)
+    drawdowns = [result['metrics']['max_drawdown'] for result in results]
+    assert drawdowns and drawdowns == sorted(drawdowns)
+    
+    # 每轮淘汰同样先看是否有效, 再按 rank_by 保留候选
+    assert len(rungs) == 3
+    for (param_list, metrics_list), (survivors, _) in zip(rungs, rungs[1:]):
+        ranked = sorted(zip(param_list, metrics_list), reverse=True,
+                        key=lambda item: (optimizer._is_valid_result(item[1]),
+                                          -item[1].get('max_drawdown', float('inf'))))
+        assert survivors == [params for params, _ in ranked[:len(survivors)]]
+
+def test_prefix_is_zero_copy(optimizer):
+    series = optimizer.price_series
+    prefix = series.prefix(0.5)
+    
+    assert len(prefix) == len(series) // 2
+    assert prefix.mean_price == series.mean_price
+    assert prefix.prices.base is not None
+    assert series.prefix(1.0) is series
+
+def test_strategy_without_search_cannot_be_instantiated():
+    class Incomplete(SearchStrategy):
+        pass
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,216 @@
+# tests/test_service.py
+# moomoo-grid-optimizer/tests/test_service.py
+
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from src import service as service_module
+from src.parameter_optimizer import ParameterOptimizer
+from src.service import OptimizationService, ServiceServer
+
+CSV_PATH = os.path.join('data', 'mara-30min-20241001-1028.csv')
+DAILY_CSV_PATH = os.path.join('data', 'mara-daily-20241001-1028.csv')
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+@pytest.fixture
+def service():
+    service = OptimizationService(workers=2, max_datasets=2)
+    yield service
+    service.close()
+
+def test_optimize_matches_optimizer(service):
+    expected = ParameterOptimizer(CSV_PATH, '30min').optimize(verbose=False, top_k=5)
+    result = _run(service.handle({'command': 'optimize', 'csv': CSV_PATH, 'top': 5}))
+    assert result['timeframe'] == '30min'
+    assert result['results'] == expected
+
+def test_optimize_workers_are_capped(service, monkeypatch):
+    monkeypatch.setattr(service_module.Config, 'SERVICE_OPTIMIZE_WORKERS', 2)
+    expected = ParameterOptimizer(CSV_PATH, '30min').optimize(verbose=False, top_k=5)
+    requested = []
+    original = ParameterOptimizer.optimize
+
+    def optimize(self, **kwargs):
+        requested.append(kwargs['workers'])
+        return original(self, **kwargs)
+    monkeypatch.setattr(ParameterOptimizer, 'optimize', optimize)
+
+    for workers in (2, 8, 0):
+        result = _run(service.handle({'command': 'optimize', 'csv': CSV_PATH, 'top': 5,
+                                      'workers': workers}))
+        assert result['results'] == expected
+    assert requested == [2, 2, 2]
+    with pytest.raises(ValueError):
+        _run(service.handle({'command': 'optimize', 'csv': CSV_PATH, 'workers': -1}))
+
+def test_backtest_derives_params_and_memoizes(service, monkeypatch):
+    optimizer = ParameterOptimizer(CSV_PATH, '30min')
+    full = optimizer._build_params(7, 0.02, 0.015, 0.2)
+    expected = optimizer._run_backtests([full], 'batch', 1, lambda _: None)[0]
+
+    calls = []
+    original = service_module.backtest_combinations
+    monkeypatch.setattr(service_module, 'backtest_combinations',
+                        lambda series, params, engine: calls.append(len(params)) or original(series, params, engine))
+    partial = {'grid_count': 7, 'price_deviation': 0.02, 'profit_ratio': 0.015, 'position_step': 0.2}
+    result = _run(service.handle({'command': 'backtest', 'csv': CSV_PATH, 'params': partial}))
+    assert result['results']['params'] == full
+    assert result['results']['metrics'] == expected
+
+    # 只改变止盈比例: 已计算过的组合不再回测
+    what_if = [partial, dict(partial, profit_ratio=0.025)]
+    results = _run(service.handle({'command': 'backtest', 'csv': CSV_PATH, 'params': what_if}))['results']
+    assert [item['params']['profit_ratio'] for item in results] == [0.015, 0.025]
+    assert calls == [1, 1]
+    assert service.store.loads == 1
+
+def test_duplicate_in_flight_requests_are_coalesced(service, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    executed = []
+    original = service.execute
+
+    def slow_execute(request):
+        executed.append(request)
+        started.set()
+        release.wait(5)
+        return original(request)
+    monkeypatch.setattr(service, 'execute', slow_execute)
+
+    async def scenario():
+        request = {'command': 'analyze', 'csv': DAILY_CSV_PATH}
+        tasks = [asyncio.ensure_future(service.handle(dict(request))) for _ in range(5)]
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, started.wait, 5)
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = _run(scenario())
+    assert len(executed) == 1
+    assert service.coalesced == 4
+    assert all(result == results[0] for result in results)
+    assert results[0]['time_frame'] == 'daily'
+    assert not service._in_flight
+
+def test_lru_eviction_and_reload_on_change(service, tmp_path):
+    paths = []
+    for index in range(3):
+        path = str(tmp_path / f'orders{index}.csv')
+        shutil.copy(DAILY_CSV_PATH, path)
+        paths.append(path)
+    for path in paths:
+        service.store.get(path)
+    assert service.store.paths() == [os.path.abspath(path) for path in paths[1:]]
+    assert service.store.evictions == 1
+
+    entry = service.store.get(paths[2])
+    assert service.store.get(paths[2]) is entry
+    stat = os.stat(paths[2])
+    os.utime(paths[2], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert service.store.get(paths[2]) is not entry
+    assert service.store.loads == 4
+
+def test_load_lock_survives_eviction(service, tmp_path):
+    paths = []
+    for index in range(3):
+        path = str(tmp_path / f'orders{index}.csv')
+        shutil.copy(DAILY_CSV_PATH, path)
+        paths.append(path)
+    service.store.get(paths[0])
+    lock = service.store._load_locks[os.path.abspath(paths[0])]
+    for path in paths[1:]:
+        service.store.get(path)
+    assert os.path.abspath(paths[0]) not in service.store.paths()
+    # 淘汰后重新加载仍使用同一把锁, 正在加载的线程与新请求互斥
+    assert service.store._load_locks[os.path.abspath(paths[0])] is lock
+    service.store.get(paths[0])
+    assert service.store._load_locks[os.path.abspath(paths[0])] is lock
+
+@pytest.mark.parametrize('request_body', [
+    {'command': 'optimize', 'csv': DAILY_CSV_PATH, 'engine': 'fast'},
+    {'command': 'optimize', 'csv': DAILY_CSV_PATH, 'top': 0},
+    {'command': 'optimize', 'csv': DAILY_CSV_PATH, 'top': '5'},
+    {'command': 'optimize', 'csv': DAILY_CSV_PATH, 'rank_by': 'params'},
+    {'command': 'optimize', 'csv': DAILY_CSV_PATH, 'prune': 'no'},
+    {'command': 'analyze', 'csv': DAILY_CSV_PATH, 'capital': 'lots'},
+    {'command': 'analyze', 'csv': ['a.csv']},
+    {'command': 'backtest', 'csv': DAILY_CSV_PATH,
+     'params': {'grid_count': 'five', 'price_deviation': 0.1, 'profit_ratio': 0.01, 'position_step': 0.1}},
+    {'command': 'backtest', 'csv': DAILY_CSV_PATH,
+     'params': {'grid_count': 5.5, 'price_deviation': 0.1, 'profit_ratio': 0.01, 'position_step': 0.1}},
+    {'command': 'backtest', 'csv': DAILY_CSV_PATH,
+     'params': {'grid_count': 5, 'price_deviation': 0.1, 'profit_ratio': -0.01, 'position_step': 0.1}},
+])
+def test_invalid_request_is_client_error(service, request_body):
+    status, payload = _run(ServiceServer(service)._dispatch('POST', '/', json.dumps(request_body).encode()))
+    assert status == 400 and not payload['ok']
+
+def test_internal_error_is_server_error(service, monkeypatch):
+    def broken(*args, **kwargs):
+        raise KeyError('total_profit')
+    monkeypatch.setattr(service_module, 'backtest_combinations', broken)
+    body = {'command': 'backtest', 'csv': DAILY_CSV_PATH,
+            'params': {'grid_count': 5, 'price_deviation': 0.1, 'profit_ratio': 0.01, 'position_step': 0.1}}
+    status, payload = _run(ServiceServer(service)._dispatch('POST', '/', json.dumps(body).encode()))
+    assert status == 500 and 'KeyError' in payload['error']
+
+def test_http_server(service):
+    async def scenario():
+        server = ServiceServer(service)
+        address = await server.start(port=0)
+        host, port = address[len('http://'):].rsplit(':', 1)
+        connection = http.client.HTTPConnection(host, int(port), timeout=30)
+
+        def request(method, target, payload=None):
+            connection.request(method, target, None if payload is None else json.dumps(payload))
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+
+        # 同一连接上连续发送多个请求 (客户端在线程中运行, 服务端在事件循环中处理)
+        loop = asyncio.get_running_loop()
+        responses = []
+        for arguments in [('POST', '/analyze', {'csv': DAILY_CSV_PATH}),
+                          ('POST', '/', {'command': 'backtest', 'csv': DAILY_CSV_PATH,
+                                         'params': {'grid_count': 5}}),
+                          ('POST', '/analyze', {'csv': 'missing.csv'}),
+                          ('GET', '/status')]:
+            responses.append(await loop.run_in_executor(None, request, *arguments))
+        connection.close()
+        await server.stop()
+        return responses
+
+    analyze, invalid, missing, status = _run(scenario())
+    assert analyze[0] == 200 and analyze[1]['result']['symbol'] == 'MARA'
+    assert invalid[0] == 400 and 'price_deviation' in invalid[1]['error']
+    assert missing[0] == 400 and not missing[1]['ok']
+    assert status[0] == 200
+    assert status[1]['result']['requests'] == 4
+    assert status[1]['result']['datasets'] == [os.path.abspath(DAILY_CSV_PATH)]
+
+@pytest.mark.parametrize('length', ['abc', '-5'])
+def test_invalid_content_length_is_rejected(service, length):
+    async def scenario():
+        server = ServiceServer(service)
+        address = await server.start(port=0)
+        host, port = address[len('http://'):].rsplit(':', 1)
+        reader, writer = await asyncio.open_connection(host, int(port))
+        writer.write(f'POST /analyze HTTP/1.1\r\nContent-Length: {length}\r\n\r\n'.encode('ascii'))
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        await server.stop()
+        return response
+
+    head, body = _run(scenario()).split(b'\r\n\r\n', 1)
+    assert head.startswith(b'HTTP/1.1 400')
+    assert 'Content-Length' in json.loads(body)['error']
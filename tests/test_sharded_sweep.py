@@ -0,0 +1,132 @@
+# tests/test_sharded_sweep.py
+# moomoo-grid-optimizer/tests/test_sharded_sweep.py
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from src.parameter_optimizer import ParameterOptimizer
+from src import sharded_sweep
+from src.sharded_sweep import ShardedSweep, run_sharded_sweep
+
+CSV_PATH = os.path.join('data', 'mara-30min-20241001-1028.csv')
+DAILY_CSV_PATH = os.path.join('data', 'mara-daily-20241001-1028.csv')
+
+@pytest.fixture(scope='module')
+def expected(optimizer):
+    return optimizer.optimize(verbose=False)
+
+def _write_lock(sweep: ShardedSweep, shard: int, pid: int):
+    with open(sweep._lock_path(shard), 'w', encoding='utf-8') as f:
+        json.dump({'host': socket.gethostname(), 'pid': pid, 'claimed_at': time.time()}, f)
+
+def test_create_writes_numbered_shards(tmp_path, optimizer):
+    sweep = ShardedSweep.create(str(tmp_path), optimizer, shard_size=10)
+    assert sweep.shard_count == 9
+    assert sweep.manifest['combinations'] == optimizer._count_param_combinations()
+    assert sorted(os.listdir(tmp_path / 'shards'))[0] == 'shard-00000.json'
+    assert sweep.status() == {'shards': 9, 'done': 0, 'running': 0, 'pending': 9}
+
+def test_merge_matches_optimize(tmp_path, optimizer, expected):
+    sweep = ShardedSweep.create(str(tmp_path), optimizer, shard_size=10)
+    assert sweep.work() == 9
+    assert sweep.status()['done'] == 9
+    assert sweep.merge() == expected
+    assert sweep.merge(top_k=3) == expected[:3]
+    assert sweep.prune_report == optimizer.prune_report
+
+def test_restart_only_runs_unfinished_shards(tmp_path, optimizer, expected):
+    sweep = ShardedSweep.create(str(tmp_path), optimizer, shard_size=10)
+    assert sweep.work(max_shards=4) == 4
+    with pytest.raises(RuntimeError):
+        sweep.merge()
+
+    # 模拟处理第 4 个分片时崩溃的进程: 锁文件属于本机上已经退出的进程
+    finished = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                              capture_output=True, text=True, check=True)
+    _write_lock(sweep, 4, int(finished.stdout))
+
+    resumed = ShardedSweep.create(str(tmp_path), optimizer, shard_size=10)
+    done = []
+    assert resumed.work(on_progress=done.append) == 5
+    assert done == [4, 5, 6, 7, 8]
+    assert resumed.merge() == expected
+
+def test_live_lock_is_respected_until_timeout(tmp_path, optimizer):
+    sweep = ShardedSweep.create(str(tmp_path), optimizer, shard_size=40)
+    _write_lock(sweep, 0, os.getpid())
+    assert sweep.status()['running'] == 1
+    assert sweep.claim() == 1
+
+    # 锁文件长时间没有心跳时视为过期, 可以被重新领取
+    expired = ShardedSweep(str(tmp_path), lock_timeout=60)
+    old = time.time() - 120
+    os.utime(sweep._lock_path(0), (old, old))
+    assert expired.claim() == 0
+    assert not [name for name in os.listdir(tmp_path / 'locks') if name.endswith('.stale')]
+
+def test_lock_recreated_during_takeover_is_kept(tmp_path, optimizer):
+    sweep = ShardedSweep(ShardedSweep.create(str(tmp_path), optimizer, shard_size=40).work_dir,
+                         lock_timeout=60)
+    lock_path = sweep._lock_path(0)
+    old = time.time() - 120
+    _write_lock(sweep, 0, os.getpid())
+    os.utime(lock_path, (old, old))
+    is_stale = sweep._is_stale
+    checks = []
+
+    def racing_is_stale(path):
+        stale = is_stale(path)
+        if not checks:
+            # 判断为过期之后、改名之前, 另一个进程删除过期锁并领取了该分片
+            os.remove(lock_path)
+            _write_lock(sweep, 0, os.getpid())
+        checks.append(path)
+        return stale
+    sweep._is_stale = racing_is_stale
+
+    assert sweep.claim() == 1
+    with open(lock_path, encoding='utf-8') as f:
+        assert time.time() - json.load(f)['claimed_at'] < 60
+    assert not [name for name in os.listdir(tmp_path / 'locks') if name.endswith('.stale')]
+
+def test_heartbeat_runs_during_long_batches(tmp_path, optimizer, monkeypatch):
+    sweep = ShardedSweep(ShardedSweep.create(str(tmp_path), optimizer, shard_size=40).work_dir,
+                         lock_timeout=0.4)
+    original = sharded_sweep.backtest_combinations
+    ages = []
+
+    def slow(series, batch, engine, bounds):
+        started = time.time()
+        time.sleep(0.6)
+        ages.append(time.time() - os.path.getmtime(sweep._lock_path(0)))
+        assert os.path.getmtime(sweep._lock_path(0)) > started
+        return original(series, batch, engine, bounds)
+    monkeypatch.setattr(sharded_sweep, 'backtest_combinations', slow)
+
+    assert sweep.claim() == 0
+    sweep.run_shard(0)
+    assert ages and max(ages) < 0.4
+
+def test_create_rejects_other_data_or_settings(tmp_path, optimizer):
+    ShardedSweep.create(str(tmp_path), optimizer, shard_size=10)
+    other = ParameterOptimizer(CSV_PATH, '30min') if optimizer.timeframe == 'daily' else \
+        ParameterOptimizer(DAILY_CSV_PATH, 'daily')
+    with pytest.raises(ValueError):
+        ShardedSweep.create(str(tmp_path), other)
+    # 同一份数据但设置不同
+    for settings in ({'shard_size': 20}, {'shard_size': None}, {'engine': 'loop'}, {'prune': False}):
+        with pytest.raises(ValueError):
+            ShardedSweep.create(str(tmp_path), optimizer, **dict({'shard_size': 10}, **settings))
+    assert ShardedSweep.create(str(tmp_path), optimizer, shard_size=10, engine='batch').manifest['shard_size'] == 10
+    with pytest.raises(FileNotFoundError):
+        ShardedSweep(str(tmp_path / 'missing'))
+
+def test_parallel_workers_match_optimize(tmp_path, optimizer, expected):
+    assert run_sharded_sweep(optimizer, str(tmp_path), workers=2, shard_size=10) == expected
+    assert not os.listdir(tmp_path / 'locks')
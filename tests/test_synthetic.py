@@ -0,0 +1,69 @@
+# tests/test_synthetic.py
+# moomoo-grid-optimizer/tests/test_synthetic.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_loader import detect_timeframe, read_order_csv
+from src.parameter_optimizer import ParameterOptimizer
+from src.synthetic import (EXPORT_HEADER, generate_export, generate_prices, generate_times,
+                           write_moomoo_export)
+
+def test_generator_is_deterministic(tmp_path):
+    first = generate_export(str(tmp_path / 'a.csv'), 500, 'ou', seed=3)
+    second = generate_export(str(tmp_path / 'b.csv'), 500, 'ou', seed=3)
+    with open(first, 'rb') as a, open(second, 'rb') as b:
+        assert a.read() == b.read()
+    assert not np.array_equal(generate_prices(500, seed=3), generate_prices(500, seed=4))
+
+def test_header_matches_real_export(tmp_path):
+    path = generate_export(str(tmp_path / 'orders.csv'), 10)
+    with open(os.path.join('data', 'mara-daily-20241001-1028.csv'), encoding='utf-8-sig') as f:
+        real_header = f.readline().rstrip('\r\n')
+    with open(path, encoding='utf-8-sig') as f:
+        assert f.readline().rstrip('\n') == real_header == ','.join(EXPORT_HEADER)
+
+def test_price_models():
+    gbm = generate_prices(20000, 'gbm', volatility=0.6, seed=1)
+    ou = generate_prices(20000, 'ou', volatility=0.6, reversion=50, seed=1)
+    assert gbm.min() >= 0.01 and np.allclose(gbm, np.round(gbm, 2))
+    # 均值回复路径的离散程度远小于随机游走
+    assert abs(np.log(ou).mean() - np.log(20)) < 0.1
+    assert np.log(ou).std() < np.log(gbm).std()
+    with pytest.raises(ValueError):
+        generate_prices(10, 'unknown')
+
+@pytest.mark.parametrize('timeframe', ['daily', '30min'])
+def test_export_loads_with_expected_timeframe(tmp_path, timeframe):
+    path = generate_export(str(tmp_path / 'orders.csv'), 300, 'gbm', timeframe, seed=0)
+    df = read_order_csv(path)
+    assert len(df) == 300
+    assert detect_timeframe(df['成交时间']) == timeframe
+    assert df['成交时间'].is_monotonic_increasing
+
+    optimizer = ParameterOptimizer(path, timeframe)
+    assert len(optimizer.price_series) == 300
+    assert np.allclose(optimizer.price_series.prices, generate_prices(
+        300, 'gbm', periods_per_year=252 * (1 if timeframe == 'daily' else 13), seed=0))
+
+def test_cancelled_orders_are_filtered(tmp_path):
+    prices = generate_prices(1000, seed=2)
+    path = str(tmp_path / 'orders.csv')
+    write_moomoo_export(path, prices, generate_times(1000), cancelled_ratio=0.3, seed=2,
+                        chunk_size=128)
+    raw = pd.read_csv(path)
+    cancelled = raw['交易状态'] == '已撤单'
+    assert 200 < cancelled.sum() < 400
+    optimizer = ParameterOptimizer(path, '30min')
+    assert len(optimizer.orders_df) == (~cancelled).sum()
+    assert np.allclose(optimizer.price_series.prices, prices[~cancelled.to_numpy()])
+
+def test_large_daily_sizes_share_bars():
+    times = generate_times(1000, 'daily', fills_per_bar=4)
+    assert len(np.unique(times)) == 250
+    with pytest.raises(ValueError):
+        generate_times(10 ** 6, 'daily')
@@ -0,0 +1,32 @@
+# tests/test_trade_log.py
+# moomoo-grid-optimizer/tests/test_trade_log.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from src.parameter_optimizer import ParameterOptimizer
+from src.backtest_engine import GridBacktester
+from src.trade_log import TradeLog
+
+def test_trade_log_grows_and_converts():
+    log = TradeLog(capacity=2)
+    for i in range(5):
+        log.append(1_700_000_000_000_000_000 + i, TradeLog.BUY if i % 2 == 0 else TradeLog.SELL,
+                   16.0 + i, 100 * (i + 1), i % 3)
+    
+    assert len(log) == 5
+    assert log.price.tolist() == [16.0, 17.0, 18.0, 19.0, 20.0]
+    frame = log.to_frame(grid_prices=np.array([15.0, 16.0, 17.0]))
+    assert frame['type'].tolist() == ['buy', 'sell', 'buy', 'sell', 'buy']
+    assert frame['grid_price'].tolist() == [15.0, 16.0, 17.0, 15.0, 16.0]
+
+def test_metrics_only_mode_matches_recorded_mode():
+    optimizer = ParameterOptimizer(os.path.join('data', 'mara-30min-20241001-1028.csv'), '30min')
+    for params in optimizer._generate_param_combinations()[:20]:
+        recorded = GridBacktester(optimizer.price_series, params)
+        metrics_only = GridBacktester(optimizer.price_series, params, record_trades=False)
+        assert metrics_only.run_backtest() == recorded.run_backtest()
+        assert metrics_only.trades is None
+        assert len(recorded.trades) == recorded.trade_count
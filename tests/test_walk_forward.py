@@ -0,0 +1,65 @@
+# tests/test_walk_forward.py
+# moomoo-grid-optimizer/tests/test_walk_forward.py
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.parameter_optimizer import ParameterOptimizer
+from src.walk_forward import (WindowStatistics, evaluate_window, plan_windows, run_walk_forward,
+                              summarize_walk_forward)
+
+def test_window_statistics_match_pandas():
+    rng = np.random.default_rng(0)
+    prices = 1000 + np.cumsum(rng.normal(0, 1, 5000))
+    statistics = WindowStatistics(prices)
+    for start, stop in [(0, 5000), (10, 12), (1234, 4321), (4990, 5000)]:
+        mean, std = statistics.mean_std(start, stop)
+        assert mean == pytest.approx(prices[start:stop].mean(), rel=1e-12)
+        assert std == pytest.approx(pd.Series(prices[start:stop]).std(), rel=1e-9)
+
+def test_full_window_statistics_reproduce_param_ranges(optimizer):
+    mean, std = WindowStatistics(optimizer.price_series.prices).mean_std(0, len(optimizer.price_series))
+    assert ParameterOptimizer.param_ranges_for(optimizer.timeframe, mean, std) == optimizer.param_ranges
+
+def test_plan_windows(optimizer):
+    times = optimizer.price_series.times
+    windows = plan_windows(times, train_weeks=2, test_weeks=1)
+    assert len(windows) == 3
+    week = 7 * 24 * 3600 * 10**9
+    for window in windows:
+        assert window.test_start == window.train_stop
+        assert window.test_from - window.train_from == 2 * week
+        assert times[window.train_start] >= window.train_from
+        assert times[window.test_start] >= window.test_from
+        assert times[window.test_stop - 1] < window.test_to
+        assert pd.Timestamp(window.train_from).weekday() == 0
+    assert [b.train_from - a.train_from for a, b in zip(windows, windows[1:])] == [week, week]
+    assert windows[-1].test_stop == len(times)
+    assert plan_windows(times, train_weeks=10) == []
+
+def test_window_matches_optimizer_on_window_orders(optimizer):
+    series = optimizer.price_series
+    window = plan_windows(series.times, train_weeks=2, test_weeks=1)[1]
+    mean, std = WindowStatistics(series.prices).mean_std(window.train_start, window.train_stop)
+    outcome = evaluate_window(series, optimizer.timeframe, window, mean, std, top_n=3)
+
+    orders = optimizer.orders_df.sort_values('成交时间', kind='stable').iloc[window.train_start:window.train_stop]
+    expected = ParameterOptimizer(None, optimizer.timeframe, orders_df=orders).optimize(verbose=False, top_k=3)
+    assert len(expected) == 3
+    assert [s['params'] for s in outcome['selected']] == [r['params'] for r in expected]
+    assert [s['train_metrics'] for s in outcome['selected']] == [r['metrics'] for r in expected]
+
+def test_parallel_walk_forward_matches_sequential(optimizer):
+    sequential = run_walk_forward(optimizer, train_weeks=2, test_weeks=1)
+    progress = []
+    parallel = run_walk_forward(optimizer, train_weeks=2, test_weeks=1, workers=2,
+                                on_progress=progress.append)
+    assert parallel == sequential
+    assert len(progress) == len(sequential) == 3
+    summary = summarize_walk_forward(sequential)
+    assert summary['windows'] == 3
+    assert summary['selected'] == sum(1 for outcome in sequential if outcome['selected'])